@@ -1,32 +1,175 @@
-from django.contrib import admin
-from .models import CrimeCategory, Location, CrimeReport, CrimeUpdate, UserProfile
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import (
+    CrimeCategory, State, City, Area, Pincode, Location, CrimeReport, CrimeUpdate, ReportIndicator, Notification,
+    ArchivedReport, UserProfile,
+)
+from .forms import BulkReportUpdateForm
+from .bulk import bulk_update_reports
+from .changelist import CachedRelatedFieldListFilter, PerformanceModeAdmin
+
+class CrimeReportActionForm(ActionForm):
+    status = forms.ChoiceField(
+        choices=(('', 'Keep current status'),) + CrimeReport.STATUS_CHOICES,
+        required=False
+    )
+    assigned_to = forms.ModelChoiceField(
+        queryset=User.objects.filter(profile__user_type__in=['police', 'admin']),
+        required=False,
+        empty_label='Keep current assignment'
+    )
+    update_text = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'placeholder': 'Update note for all selected reports'})
+    )
 
 @admin.register(CrimeCategory)
 class CrimeCategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'description')
+    list_display = ('name', 'description', 'severity')
+    list_editable = ('severity',)
+    search_fields = ('name',)
+
+@admin.register(State)
+class StateAdmin(admin.ModelAdmin):
+    list_display = ('name',)
     search_fields = ('name',)
 
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'state')
+    search_fields = ('name', 'state__name')
+    list_filter = ('state',)
+    list_select_related = ('state',)
+
+@admin.register(Area)
+class AreaAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city')
+    search_fields = ('name', 'city__name')
+    list_select_related = ('city',)
+    raw_id_fields = ('city',)
+
+@admin.register(Pincode)
+class PincodeAdmin(admin.ModelAdmin):
+    list_display = ('code',)
+    search_fields = ('code',)
+
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('area', 'city', 'state', 'pincode')
-    search_fields = ('area', 'city', 'state', 'pincode')
-    list_filter = ('state', 'city')
+    search_fields = ('area__name', 'city__name', 'city__state__name', 'pincode__code')
+    list_filter = ('city__state', 'city')
+    list_select_related = ('area', 'city__state', 'pincode')
+    raw_id_fields = ('area', 'pincode')
+    exclude = ('city',)
+    ordering = ('city__state__name', 'city__name', 'area__name')
+
+    def get_queryset(self, request):
+        # Also used by the report form's location autocomplete
+        return super().get_queryset(request).select_related('area', 'city__state', 'pincode')
 
 @admin.register(CrimeReport)
-class CrimeReportAdmin(admin.ModelAdmin):
-    list_display = ('title', 'category', 'location', 'reported_by', 'reported_on', 'status')
-    list_filter = ('status', 'category', 'location__city', 'reported_on')
+class CrimeReportAdmin(PerformanceModeAdmin, admin.ModelAdmin):
+    list_display = ('title', 'category', 'location', 'reported_by', 'reported_on', 'status', 'priority')
+    list_filter = (
+        'status',
+        ('category', CachedRelatedFieldListFilter),
+        ('location__city', CachedRelatedFieldListFilter),
+        'reported_on',
+    )
+    list_select_related = ('category', 'location__area', 'location__city__state', 'location__pincode', 'reported_by')
     search_fields = ('title', 'description', 'reported_by__username')
+    full_text_search = (('id', 'crime_report.CrimeReport'),)
+    # The drill-down reads every report for its years; the reported_on filter reads none
+    date_hierarchy = None if settings.ADMIN_PERFORMANCE_MODE else 'reported_on'
+    autocomplete_fields = ('location', 'reported_by', 'assigned_to')
+    action_form = CrimeReportActionForm
+    actions = ['apply_bulk_update']
+    
+    @admin.action(description='Apply status/assignment and update note to selected reports')
+    def apply_bulk_update(self, request, queryset):
+        form = BulkReportUpdateForm(request.POST, reports=queryset)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    self.message_user(request, error, messages.ERROR)
+            return
+        
+        updated = bulk_update_reports(
+            queryset,
+            request.user,
+            form.cleaned_data['update_text'],
+            status=form.cleaned_data['status'],
+            assigned_to=form.cleaned_data['assigned_to'],
+        )
+        self.message_user(request, f'{updated} report(s) updated successfully.', messages.SUCCESS)
+    
+    def exact_search(self, search_term):
+        return Q(reported_by__in=User.objects.filter(username=search_term))
+
+@admin.register(ReportIndicator)
+class ReportIndicatorAdmin(admin.ModelAdmin):
+    list_display = ('value', 'kind', 'report', 'update')
+    list_filter = ('kind',)
+    search_fields = ('value',)
+    list_select_related = ('report', 'update')
+    raw_id_fields = ('report', 'update')
+
+@admin.register(ArchivedReport)
+class ArchivedReportAdmin(admin.ModelAdmin):
+    """Read-only; cases get here through ``manage.py archive_reports``."""
+    list_display = ('id', 'title', 'category', 'status', 'reported_on', 'archived_on')
+    list_filter = ('status', 'category')
+    search_fields = ('=id', 'title', 'description', 'reported_by__username')
     date_hierarchy = 'reported_on'
-    raw_id_fields = ('reported_by', 'assigned_to')
+    list_select_related = ('category',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('report', 'recipient', 'status', 'send_after', 'attempts', 'sent_on')
+    list_filter = ('status',)
+    search_fields = ('recipient__username', 'recipient__email', 'report__title')
+    list_select_related = ('report', 'recipient')
+    raw_id_fields = ('report', 'recipient')
+    readonly_fields = ('claim', 'last_error', 'created_on', 'sent_on')
+    actions = ['retry_now']
+
+    @admin.action(description='Send selected notifications on the next worker poll')
+    def retry_now(self, request, queryset):
+        # Only failed ones: pending and sending rows already have a turn coming
+        updated = 0
+        for notification in queryset.filter(status='failed'):
+            try:
+                with transaction.atomic():
+                    Notification.objects.filter(pk=notification.pk).update(
+                        status='pending', send_after=timezone.now(), attempts=0
+                    )
+                updated += 1
+            except IntegrityError:
+                # A newer notification for the same report is already queued
+                pass
+        self.message_user(request, f'{updated} notification(s) queued again.', messages.SUCCESS)
 
 @admin.register(CrimeUpdate)
-class CrimeUpdateAdmin(admin.ModelAdmin):
+class CrimeUpdateAdmin(PerformanceModeAdmin, admin.ModelAdmin):
     list_display = ('crime_report', 'updated_by', 'updated_on')
     list_filter = ('updated_on',)
+    list_select_related = ('crime_report', 'updated_by')
     search_fields = ('update_text', 'crime_report__title')
-    date_hierarchy = 'updated_on'
-    raw_id_fields = ('crime_report', 'updated_by')
+    full_text_search = (('id', 'crime_report.CrimeUpdate'), ('crime_report', 'crime_report.CrimeReport'))
+    date_hierarchy = None if settings.ADMIN_PERFORMANCE_MODE else 'updated_on'
+    autocomplete_fields = ('crime_report', 'updated_by')
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
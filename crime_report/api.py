@@ -0,0 +1,273 @@
+"""Versioned JSON API (``/api/v1/``) for reports, case updates, locations and
+categories, built on Django REST framework.
+
+* ``?fields=id,title,status`` returns only those fields, and
+  ``?expand=category,location,updates`` embeds the related objects instead of
+  their ids. Only the relations (and the description) that end up in the
+  response are loaded, with ``select_related``/``prefetch_related``.
+* Lists are cursor-paginated (``next``/``previous`` links, ``?page_size=``), so
+  deep pages cost the same as the first one.
+* ``POST .../reports/batch/`` and ``POST .../updates/batch/`` take a JSON array
+  and create every item in one transaction, or none of them.
+* The report list streams every matching report, unpaginated, when the client
+  accepts NDJSON or MessagePack (see crime_report.streaming).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils.decorators import method_decorator
+from rest_framework import mixins, permissions, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from . import priority, streaming
+
+from .geo import city_q
+from .models import CrimeCategory, CrimeReport, CrimeUpdate, Location
+from .permissions import is_staff_role, user_role
+from .ratelimit import ratelimit
+from .serializers import (
+    CategorySerializer, LocationSerializer, ReportFilterSerializer, ReportSerializer, UpdateSerializer,
+)
+
+
+def api_exception_handler(exc, context):
+    """DRF errors in the ``{'error': ...}`` shape the other JSON views use;
+    validation errors keep DRF's per-field form."""
+    response = exception_handler(exc, context)
+    if response is not None and isinstance(response.data, dict) and set(response.data) == {'detail'}:
+        response.data = {'error': response.data['detail']}
+    return response
+
+
+class IsPoliceOrAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return is_staff_role(request.user)
+
+
+class IsAdminOrReadOnly(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.method in permissions.SAFE_METHODS or user_role(request.user) == 'admin'
+
+
+class ApiCursorPagination(CursorPagination):
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = 'id'
+
+
+class ReportPagination(ApiCursorPagination):
+    ordering = ('-reported_on', '-id')
+
+
+class UpdatePagination(ApiCursorPagination):
+    ordering = ('-updated_on', '-id')
+
+
+# Columns of streamed report lists (?fields= picks a subset), as values_list paths
+REPORT_COLUMNS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'date_of_crime': 'date_of_crime',
+    'time_of_crime': 'time_of_crime',
+    'status': 'status',
+    'category': 'category_id',
+    'category_name': 'category__name',
+    'location': 'location_id',
+    'state': 'location__city__state__name',
+    'city': 'location__city__name',
+    'area': 'location__area__name',
+    'pincode': 'location__pincode__code',
+    'reported_by': 'reported_by__username',
+    'reported_on': 'reported_on',
+    'assigned_to': 'assigned_to__username',
+    'priority': 'priority',
+}
+
+
+def _batch_size(request):
+    """Rate limit cost of a batch request: one token per item it would create."""
+    if not isinstance(request.data, list):
+        return 1
+    return min(max(len(request.data), 1), settings.API_BATCH_MAX_ITEMS)
+
+
+def _csv_param(request, name):
+    return [value for value in request.query_params.get(name, '').split(',') if value]
+
+
+class BatchCreateMixin:
+    """``POST <list>/batch/`` with a JSON array: creates every item in one
+    transaction, or answers 400 with the errors listed by position."""
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request, *args, **kwargs):
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'error': 'Expected a non-empty JSON array'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.API_BATCH_MAX_ITEMS:
+            return Response({'error': f'At most {settings.API_BATCH_MAX_ITEMS} items per batch'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(ratelimit('report_crime'), name='create')
+@method_decorator(ratelimit('report_crime', cost=_batch_size), name='batch')
+class ReportViewSet(BatchCreateMixin, mixins.CreateModelMixin, mixins.UpdateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Reports visible to the user. Anyone signed in can file reports; police and
+    admins can change them (status and assignment included).
+
+    Filters: ``status``, ``category``, ``city``, ``date_from``, ``date_to``.
+    ``GET .../reports/queue/`` lists the user's open cases by priority."""
+    serializer_class = ReportSerializer
+    pagination_class = ReportPagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *streaming.renderer_classes()]
+
+    def get_permissions(self):
+        if self.action in ('update', 'partial_update', 'queue'):
+            return [permissions.IsAuthenticated(), IsPoliceOrAdmin()]
+        return [permissions.IsAuthenticated()]
+
+    def get_serializer(self, *args, **kwargs):
+        # Writes always take (and echo) the full set of writable fields
+        if self.request.method in permissions.SAFE_METHODS:
+            kwargs.setdefault('fields', _csv_param(self.request, 'fields'))
+            kwargs.setdefault('expand', _csv_param(self.request, 'expand'))
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        media_type = streaming.negotiate(request)
+        if media_type is None:
+            return super().list(request, *args, **kwargs)
+
+        columns = _csv_param(request, 'fields') or list(REPORT_COLUMNS)
+        unknown = set(columns) - set(REPORT_COLUMNS)
+        if unknown:
+            raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}"]})
+        rows = (
+            self._filter(CrimeReport.objects.visible_to(request.user))
+            .order_by('-reported_on', '-id')
+            .values_list(*(REPORT_COLUMNS[column] for column in columns))
+            .iterator(chunk_size=settings.STREAM_BATCH_SIZE)
+        )
+        return streaming.stream_rows(request, media_type, columns, rows)
+
+    def get_queryset(self):
+        queryset = CrimeReport.objects.visible_to(self.request.user)
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+
+        # Load what the response shows and nothing else
+        fields = set(self.get_serializer().fields)
+        expand = set(_csv_param(self.request, 'expand'))
+        related = [name for name in ('reported_by', 'assigned_to') if name in fields]
+        if 'category' in fields and 'category' in expand:
+            related.append('category')
+        if 'location' in fields and 'location' in expand:
+            related += ['location__city__state', 'location__area', 'location__pincode']
+        if related:
+            queryset = queryset.select_related(*related)
+        if 'updates' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('updates', queryset=CrimeUpdate.objects.select_related('updated_by'))
+            )
+        if 'description' not in fields:
+            queryset = queryset.defer('description')
+        return self._filter(queryset)
+
+    def _filter(self, queryset):
+        params = ReportFilterSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+        filters = Q()
+        if 'status' in params:
+            filters &= Q(status=params['status'])
+        if 'category' in params:
+            filters &= Q(category_id=params['category'])
+        if params.get('city'):
+            filters &= city_q(params['city'])
+        if 'date_from' in params:
+            filters &= Q(date_of_crime__gte=params['date_from'])
+        if 'date_to' in params:
+            filters &= Q(date_of_crime__lte=params['date_to'])
+        return queryset.filter(filters)
+
+    @action(detail=False, methods=['get'])
+    def queue(self, request, *args, **kwargs):
+        """The open cases assigned to the user, highest priority first
+        (``?limit=``, default PRIORITY_QUEUE_SIZE); the list filters apply."""
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            limit = serializers.IntegerField(min_value=1, max_value=settings.API_MAX_PAGE_SIZE).run_validation(limit)
+        cases = priority.work_queue(request.user, limit, self.get_queryset())
+        return Response(self.get_serializer(cases, many=True).data)
+
+    def perform_create(self, serializer):
+        serializer.save(reported_by=self.request.user)
+
+
+class UpdateViewSet(BatchCreateMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Case updates on the reports visible to the user (``?report=`` for one
+    report); police and admins add them."""
+    serializer_class = UpdateSerializer
+    pagination_class = UpdatePagination
+
+    def get_permissions(self):
+        if self.action in ('create', 'batch'):
+            return [permissions.IsAuthenticated(), IsPoliceOrAdmin()]
+        return [permissions.IsAuthenticated()]
+
+    def get_queryset(self):
+        queryset = CrimeUpdate.objects.select_related('updated_by')
+        if not is_staff_role(self.request.user):
+            queryset = queryset.filter(crime_report__in=CrimeReport.objects.visible_to(self.request.user))
+        report = self.request.query_params.get('report')
+        if report:
+            queryset = queryset.filter(crime_report_id=serializers.IntegerField().run_validation(report))
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(updated_by=self.request.user)
+
+
+class LocationViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Known places (``?pincode=``, ``?city=``). Posting a place returns the
+    existing location when there is one."""
+    serializer_class = LocationSerializer
+    pagination_class = ApiCursorPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Location.objects.select_related('city__state', 'area', 'pincode')
+        params = self.request.query_params
+        if params.get('pincode'):
+            queryset = queryset.filter(pincode__code=params['pincode'])
+        if params.get('city'):
+            queryset = queryset.filter(city__name__iexact=params['city'])
+        return queryset
+
+
+class CategoryViewSet(viewsets.ModelViewSet):
+    serializer_class = CategorySerializer
+    pagination_class = ApiCursorPagination
+    permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
+    queryset = CrimeCategory.objects.all()
+    # Deleting a category deletes its reports; that stays in the admin site
+    http_method_names = ['get', 'post', 'put', 'patch', 'head', 'options']
+
+
+router = DefaultRouter()
+router.register('reports', ReportViewSet, basename='report')
+router.register('updates', UpdateViewSet, basename='update')
+router.register('locations', LocationViewSet, basename='location')
+router.register('categories', CategoryViewSet, basename='category')
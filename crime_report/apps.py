@@ -5,4 +5,5 @@ class CrimeReportConfig(AppConfig):
     name = 'crime_report'
 
     def ready(self):
+        import crime_report.checks
         import crime_report.signals
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Archival of old closed cases.
+
+Cases in ``ARCHIVE_STATUSES`` with no activity (report or update) for
+``ARCHIVE_AFTER_DAYS`` are moved, in batches of ``ARCHIVE_BATCH_SIZE``, from
+CrimeReport into ArchivedReport: one row per case with its updates and
+indicators inline, and its evidence file copied to the "archive" storage. The
+live tables, which every list, count and aggregate reads, then only hold the
+cases that are still worked on. Their detection index rows go with them.
+
+Archived cases still count in UserStats: the counter and data version
+receivers skip the deletes made while archiving (``is_archiving``), and each
+batch bumps the data version once.
+
+``search_cases`` queries live and archived cases together.
+"""
+import contextvars
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .http_cache import CRIME_DATA
+from .models import ArchivedReport, CrimeReport, CrimeUpdate, DataVersion, ReportIndicator, archive_storage
+
+logger = logging.getLogger(__name__)
+
+_archiving = contextvars.ContextVar('crime_report_archiving', default=False)
+
+# Columns search_cases returns for both live and archived cases
+CASE_FIELDS = (
+    'id', 'title', 'status', 'date_of_crime', 'reported_on',
+    'category__name', 'location__city__name', 'location__city__state__name',
+)
+# Tables that shrink when cases are archived, for size reports
+HOT_TABLES = (CrimeReport, CrimeUpdate, ReportIndicator)
+
+
+def is_archiving():
+    """Whether reports being deleted now are moving to ArchivedReport."""
+    return _archiving.get()
+
+
+def archivable(older_than=None):
+    """Live cases due for archival: in ARCHIVE_STATUSES, with nothing reported or
+    updated in ``older_than`` days (ARCHIVE_AFTER_DAYS by default)."""
+    days = settings.ARCHIVE_AFTER_DAYS if older_than is None else older_than
+    cutoff = timezone.now() - timedelta(days=days)
+    return (
+        CrimeReport.objects.filter(status__in=settings.ARCHIVE_STATUSES, reported_on__lt=cutoff)
+        .annotate(last_activity=Greatest('reported_on', Coalesce(Max('updates__updated_on'), 'reported_on')))
+        .filter(last_activity__lt=cutoff)
+    )
+
+
+def _copy_evidence(report):
+    """Copies the report's evidence to cold storage; returns the name it was saved under."""
+    if not report.evidence_file:
+        return None
+    with report.evidence_file.open('rb') as fh:
+        return archive_storage().save(report.evidence_file.name, fh)
+
+
+def _delete_files(files):
+    for file in files:
+        try:
+            file.storage.delete(file.name)
+        except OSError as e:
+            logger.error(f"Could not delete evidence file {file.name}: {e}")
+
+
+def _archived_report(report, updates, indicators, evidence):
+    return ArchivedReport(
+        id=report.id,
+        title=report.title,
+        description=report.description,
+        date_of_crime=report.date_of_crime,
+        time_of_crime=report.time_of_crime,
+        location_id=report.location_id,
+        category_id=report.category_id,
+        reported_by_id=report.reported_by_id,
+        reported_on=report.reported_on,
+        status=report.status,
+        evidence_file=evidence,
+        assigned_to_id=report.assigned_to_id,
+        updates=updates,
+        indicators=indicators,
+        last_activity=report.last_activity,
+    )
+
+
+def archive_batch(report_ids, older_than=None):
+    """Moves those of ``report_ids`` that are still archivable into ArchivedReport,
+    in one transaction. Returns the number archived."""
+    copied = []
+    try:
+        with transaction.atomic():
+            reports = list(archivable(older_than).filter(id__in=report_ids))
+            if not reports:
+                return 0
+            ids = [report.id for report in reports]
+
+            updates = {report_id: [] for report_id in ids}
+            rows = (
+                CrimeUpdate.objects.filter(crime_report_id__in=ids)
+                .select_related('updated_by').order_by('updated_on', 'id')
+            )
+            for update in rows:
+                updates[update.crime_report_id].append({
+                    'id': update.id,
+                    'update_text': update.update_text,
+                    'updated_by': update.updated_by_id,
+                    'updated_by_name': update.updated_by.get_full_name() or update.updated_by.username,
+                    'updated_on': update.updated_on.isoformat(),
+                })
+            indicators = {report_id: set() for report_id in ids}
+            rows = ReportIndicator.objects.filter(report_id__in=ids).values_list('report_id', 'kind', 'value')
+            for report_id, kind, value in rows:
+                indicators[report_id].add((kind, value))
+
+            archived = []
+            for report in reports:
+                evidence = _copy_evidence(report)
+                if evidence:
+                    copied.append(evidence)
+                archived.append(_archived_report(report, updates[report.id], sorted(indicators[report.id]), evidence))
+            ArchivedReport.objects.bulk_create(archived)
+            # Cascades to the updates, indicators, detection index and notifications
+            token = _archiving.set(True)
+            try:
+                CrimeReport.objects.filter(id__in=ids).delete()
+            finally:
+                _archiving.reset(token)
+            DataVersion.bump(CRIME_DATA)
+
+            hot_files = [report.evidence_file for report in reports if report.evidence_file]
+            transaction.on_commit(lambda: _delete_files(hot_files))
+    except Exception:
+        # Nothing was moved; drop the copies
+        storage = archive_storage()
+        for name in copied:
+            storage.delete(name)
+        raise
+    return len(reports)
+
+
+def archive_cases(older_than=None, batch_size=None, limit=None, log=None):
+    """Archives every case ``archivable`` returns, one batch per transaction.
+    Returns the number archived."""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    # Ids first: archiving deletes from the table the filter reads
+    ids = list(archivable(older_than).order_by('id').values_list('id', flat=True))
+    if limit is not None:
+        ids = ids[:limit]
+    archived = 0
+    for start in range(0, len(ids), batch_size):
+        archived += archive_batch(ids[start:start + batch_size], older_than)
+        if log:
+            log(f'Archived {archived}/{len(ids)} cases')
+    return archived
+
+
+def table_sizes(models=HOT_TABLES):
+    """{table: (rows, bytes)}; bytes is None where the database cannot tell.
+    PostgreSQL counts the space of deleted rows until the table is vacuumed."""
+    sizes = {}
+    with connection.cursor() as cursor:
+        for model in models:
+            table = model._meta.db_table
+            rows = model.objects.count()
+            size = None
+            try:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+                    size = cursor.fetchone()[0]
+                elif connection.vendor == 'sqlite':
+                    # Bytes in use, as deleted rows' space stays in the file until VACUUM.
+                    # Needs SQLite built with the dbstat virtual table.
+                    with transaction.atomic():
+                        cursor.execute('SELECT SUM(pgsize - unused) FROM dbstat WHERE name = %s', [table])
+                        size = cursor.fetchone()[0]
+            except Exception:
+                size = None
+            sizes[table] = (rows, size)
+    return sizes
+
+
+def search_cases(user, query='', status=None, category=None, date_from=None, date_to=None, archived=None):
+    """Live and archived cases ``user`` may open, newest first, as CASE_FIELDS
+    dicts plus ``archived``. ``archived`` True or False limits the search to one
+    of the two."""
+    filters = Q()
+    if query:
+        filters &= Q(title__icontains=query) | Q(description__icontains=query)
+    if status:
+        filters &= Q(status=status)
+    if category:
+        filters &= Q(category_id=category)
+    if date_from:
+        filters &= Q(date_of_crime__gte=date_from)
+    if date_to:
+        filters &= Q(date_of_crime__lte=date_to)
+
+    live = (
+        CrimeReport.objects.visible_to(user).filter(filters)
+        .annotate(archived=Value(False)).values(*CASE_FIELDS, 'archived')
+    )
+    cold = (
+        ArchivedReport.objects.visible_to(user).filter(filters)
+        .annotate(archived=Value(True)).values(*CASE_FIELDS, 'archived')
+    )
+    if archived is True:
+        return cold.order_by('-reported_on', '-id')
+    if archived is False:
+        return live.order_by('-reported_on', '-id')
+    # The parts of a UNION cannot have their own (default) ordering
+    return live.order_by().union(cold.order_by(), all=True).order_by('-reported_on', '-id')
@@ -0,0 +1,100 @@
+"""Async variants of the read-heavy views, routed when ``USE_ASYNC_VIEWS`` is on.
+
+The pages' queries and contexts come from crime_report.pages, as for the sync
+views. Django's async ORM methods (``acount()`` and friends) run on a single
+thread-sensitive executor, so awaiting several of them together still executes
+them one after another. The views here instead run each independent query on
+its own worker thread and connection and await them together.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+
+from .http_cache import conditional_on_data_version
+from .permissions import STAFF_ROLES, user_role
+from .ratelimit import ratelimit
+from . import pages, streaming
+
+
+def _run_query(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # Worker threads don't see request_finished, so release the connection here
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+async def _gather(queries):
+    """Run independent query callables concurrently and return their results by name."""
+    results = await asyncio.gather(*(_run_query(query) for query in queries.values()))
+    return dict(zip(queries, results))
+
+
+def _request_user(request):
+    """Resolve the lazy ``request.user`` and its role (sync: hits the session and DB)."""
+    user = request.user
+    return user, user_role(user)
+
+
+async def _police_or_admin_check(request):
+    """Async equivalent of ``login_required`` + ``police_or_admin_required``."""
+    user, role = await sync_to_async(_request_user)(request)
+    if not user.is_authenticated:
+        return user, role, redirect_to_login(request.get_full_path())
+    if role not in STAFF_ROLES:
+        await sync_to_async(messages.error)(request, 'You do not have permission to access this page.')
+        return user, role, redirect('home')
+    return user, role, None
+
+
+async def home(request):
+    user, _ = await sync_to_async(_request_user)(request)
+    data = await _gather(pages.home_queries(user))
+    return await sync_to_async(render)(request, 'crime_report/home.html', pages.home_context(user, data))
+
+
+@conditional_on_data_version()
+async def crime_list(request):
+    user, _ = await sync_to_async(_request_user)(request)
+    paginator = pages.crime_list_paginator(request, user)
+    data = await _gather(pages.crime_list_queries(request, paginator))
+    context = pages.crime_list_context(request, paginator, data)
+    return await sync_to_async(render)(request, 'crime_report/crime_list.html', context)
+
+
+async def admin_dashboard(request):
+    user, role, denied = await _police_or_admin_check(request)
+    if denied:
+        return denied
+    data = await _gather(pages.dashboard_queries(user, role))
+    context = pages.dashboard_context(role, data)
+    return await sync_to_async(render)(request, 'crime_report/admin_dashboard.html', context)
+
+
+@ratelimit('crime_stats_api')
+@conditional_on_data_version(per_user=False, use_last_modified=True)
+async def crime_stats_api(request):
+    user, role = await sync_to_async(_request_user)(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if role not in STAFF_ROLES:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    media_type = streaming.negotiate(request)
+    if media_type is not None:
+        return streaming.stream_rows(request, media_type, streaming.STATS_COLUMNS, streaming.stats_rows())
+
+    now = timezone.now()
+    data = await _gather(pages.stats_queries(now))
+    response = JsonResponse(pages.stats_payload(now, data))
+    patch_vary_headers(response, ('Accept',))
+    return response
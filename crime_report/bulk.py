@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, inbox, priority
+from .iocs import index_updates
+from .notifications import enqueue as enqueue_notifications
+from .models import CrimeReport, CrimeUpdate
+from .signals import reports_bulk_updated
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def bulk_update_reports(reports, user, update_text, status=None, assigned_to=None):
+    """Apply a status change and/or assignment to every report in ``reports``
+    with one UPDATE, and attach the same update note to each of them.
+
+    Returns the number of reports updated.
+    """
+    with transaction.atomic():
+        # The counted fields as they were, for the per-user counters. The rows
+        # are locked (in id order, so concurrent bulk updates cannot deadlock)
+        # and updated by id, so a report that starts matching ``reports``
+        # meanwhile is not changed without being counted.
+        locked = (
+            CrimeReport.objects.filter(id__in=reports.values('id'))
+            .select_for_update().order_by('id')
+        )
+        before = list(locked.values('id', *CrimeReport.COUNTED_FIELDS))
+        if not before:
+            return 0
+        report_ids = [row.pop('id') for row in before]
+        
+        changes = {}
+        if status:
+            changes['status'] = status
+        if assigned_to:
+            changes['assigned_to'] = assigned_to
+        if changes:
+            CrimeReport.objects.filter(id__in=report_ids).update(**changes)
+            counters.reports_updated(before, status=status, assigned_to_id=assigned_to and assigned_to.pk)
+        
+        now = timezone.now()
+        if assigned_to:
+            inbox.assign(report_ids, assigned_to.pk, now)
+        updates = CrimeUpdate.objects.bulk_create(
+            [
+                CrimeUpdate(
+                    crime_report_id=report_id,
+                    update_text=update_text,
+                    updated_by=user,
+                    updated_on=now,
+                )
+                for report_id in report_ids
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        index_updates(updates)
+        inbox.record_updates(updates)
+        enqueue_notifications(updates)
+        priority.score_reports(report_ids)
+        
+        transaction.on_commit(lambda: reports_bulk_updated.send(
+            sender=CrimeReport,
+            report_ids=report_ids,
+            changes=changes,
+            updates=updates,
+            user=user,
+        ))
+    
+    return len(report_ids)
@@ -0,0 +1,116 @@
+"""Admin performance mode (ADMIN_PERFORMANCE_MODE) for the changelists of the
+large tables. A changelist page load then
+
+* counts at most ADMIN_EXACT_COUNT_LIMIT rows, showing the database's estimate
+  past that, and skips the second, unfiltered count,
+* reads the sidebar's related-field filter choices from the cache,
+* searches text through the full-text indexes (crime_report.search) instead
+  of LIKE scans over every row.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from . import search
+
+
+def estimated_count(model, using='default'):
+    """The database's estimate of the rows in ``model``'s table, or None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            # -1 until the table is first vacuumed or analyzed
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            # Rows at the last ANALYZE (or PRAGMA optimize)...
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone()[0]:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+            # ...or, never analyzed, the highest id, which counts deleted rows too
+            cursor.execute(
+                f'SELECT MAX({connection.ops.quote_name(model._meta.pk.column)}) '
+                f'FROM {connection.ops.quote_name(table)}'
+            )
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Counts up to ADMIN_EXACT_COUNT_LIMIT rows. Past that, an unfiltered list
+    shows the database's estimate and a filtered one the limit, so its last
+    pages are reached by narrowing the filter."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        counted = queryset.order_by()[:limit + 1].count()
+        if counted <= limit:
+            return counted
+        if not queryset.query.where:
+            return max(estimated_count(queryset.model, queryset.db) or 0, limit)
+        return limit
+
+
+class CachedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """A related-field filter whose choices (every row of the related table) are
+    cached for ADMIN_FILTER_CACHE_TIMEOUT; new rows show up that much later."""
+
+    def field_choices(self, field, request, model_admin):
+        if not settings.ADMIN_PERFORMANCE_MODE:
+            return super().field_choices(field, request, model_admin)
+        key = f'admin_filter_choices:{model_admin.model._meta.label_lower}:{self.field_path}'
+        choices = cache.get(key)
+        if choices is None:
+            choices = list(super().field_choices(field, request, model_admin))
+            cache.set(key, choices, settings.ADMIN_FILTER_CACHE_TIMEOUT)
+        return choices
+
+
+class PerformanceModeAdmin:
+    """ModelAdmin mixin applying the performance mode to a changelist.
+
+    ``full_text_search`` lists (field, model label) pairs: a row matches when
+    ``field`` is the id of a ``model`` row whose indexed text has every word
+    searched for. ``exact_search`` adds conditions that can use an index.
+    ``search_fields`` still apply with the mode off, or on databases without
+    full-text indexes.
+    """
+    full_text_search = ()
+
+    @property
+    def show_full_result_count(self):
+        return not settings.ADMIN_PERFORMANCE_MODE
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if not settings.ADMIN_PERFORMANCE_MODE:
+            return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+        return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def exact_search(self, search_term):
+        return Q()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not (settings.ADMIN_PERFORMANCE_MODE and self.full_text_search and search_term):
+            return super().get_search_results(request, queryset, search_term)
+        matches = self.exact_search(search_term.strip())
+        for field, label in self.full_text_search:
+            found = search.matching(apps.get_model(label), search_term, queryset.db)
+            if found is None:
+                return super().get_search_results(request, queryset, search_term)
+            matches |= Q(**{f'{field}__in': RawSQL(*found)})
+        return queryset.filter(matches), False
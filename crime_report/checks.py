@@ -0,0 +1,31 @@
+"""System checks, run by ``manage.py check`` (``--deploy`` adds the deployment
+ones) and before most other commands."""
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core import checks
+
+
+def _vendor_assets_missing(level, id):
+    # Pages link these files with no CDN fallback
+    missing = [path for path in settings.STATIC_VENDOR_ASSETS if not finders.find(path)]
+    if not missing:
+        return []
+    return [level(
+        f"{len(missing)} vendored static file(s) are missing, e.g. '{missing[0]}'; "
+        f"pages linking them will not load their styles and scripts.",
+        hint="Run 'python manage.py vendor_static'.",
+        id=id,
+    )]
+
+
+@checks.register(checks.Tags.staticfiles)
+def check_vendor_assets(app_configs, **kwargs):
+    # The deployment check below covers production settings
+    if not settings.DEBUG:
+        return []
+    return _vendor_assets_missing(checks.Warning, 'crime_report.W001')
+
+
+@checks.register(checks.Tags.staticfiles, deploy=True)
+def check_vendor_assets_deployed(app_configs, **kwargs):
+    return _vendor_assets_missing(checks.Error, 'crime_report.E001')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .http_cache import CRIME_DATA, USER_DATA, get_data_version
+from .inbox import request_unread_count
+
+
+def fragment_cache(request):
+    """Data versions for {% cache %} keys; only queried if a template uses them."""
+    return {
+        'data_version': SimpleLazyObject(lambda: get_data_version(request, CRIME_DATA)[0]),
+        'user_data_version': SimpleLazyObject(lambda: get_data_version(request, USER_DATA)[0]),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+
+
+def inbox_unread(request):
+    """Unread cases in the user's inbox, for the navbar; only queried if it is shown."""
+    return {
+        'inbox_unread': SimpleLazyObject(lambda: request_unread_count(request)),
+    }
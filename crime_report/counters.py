@@ -0,0 +1,195 @@
+"""Per-user report counters (UserStats) and signups per month (SignupMonth),
+which manage_users reads instead of aggregating over every report and user.
+
+Each write applies its own difference: saving a report compares the counted
+fields with those it was loaded with (CrimeReport.counted_state), deleting one
+takes it off, and bulk_update_reports passes the reports' previous state.
+Writes that skip all of these (``manage.py seed``, raw SQL) are put right with
+``rebuild``, which recounts from the reports; ``manage.py rebuild_user_stats``
+runs it for every user. Archived reports (ArchivedReport) count as well.
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedReport, CrimeReport, InboxItem, SignupMonth, UserStats
+
+COUNTERS = ('reports_filed', 'cases_assigned', 'cases_open', 'cases_resolved')
+
+
+def _counts(state):
+    """Counter of (user id, counter) for a report in ``state`` (a counted_state dict)."""
+    counts = Counter()
+    if state.get('reported_by_id'):
+        counts[state['reported_by_id'], 'reports_filed'] += 1
+    assignee = state.get('assigned_to_id')
+    if assignee:
+        counts[assignee, 'cases_assigned'] += 1
+        if state['status'] in CrimeReport.OPEN_STATUSES:
+            counts[assignee, 'cases_open'] += 1
+        elif state['status'] == 'resolved':
+            counts[assignee, 'cases_resolved'] += 1
+    return counts
+
+
+def _apply(delta, create_missing=True):
+    """Adds ``delta`` to the counters, with one UPDATE per distinct change."""
+    changes = defaultdict(dict)
+    for (user_id, counter), change in delta.items():
+        if change:
+            changes[user_id][counter] = change
+    groups = defaultdict(list)
+    for user_id, change in changes.items():
+        groups[tuple(sorted(change.items()))].append(user_id)
+
+    for change, user_ids in groups.items():
+        updated = UserStats.objects.filter(user_id__in=user_ids).update(
+            **{counter: F(counter) + amount for counter, amount in change}
+        )
+        if updated < len(user_ids) and create_missing:
+            # Users from before the counters, or whose row went missing: count them
+            existing = set(UserStats.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            rebuild(set(user_ids) - existing)
+
+
+def _recount_last_report(user_ids, not_after=None):
+    """Sets last_report_on for ``user_ids`` from their reports, live or archived;
+    with ``not_after``, only where it is no later than that."""
+    live, archived = (
+        Subquery(model.objects.filter(reported_by=OuterRef('user')).order_by('-reported_on').values('reported_on')[:1])
+        for model in (CrimeReport, ArchivedReport)
+    )
+    stats = UserStats.objects.filter(user_id__in=user_ids)
+    if not_after is not None:
+        stats = stats.filter(last_report_on__lte=not_after)
+    # Greatest is NULL when either is
+    stats.update(last_report_on=Greatest(Coalesce(live, archived), Coalesce(archived, live)))
+
+
+def report_saved(report, created):
+    before = {} if created else getattr(report, '_loaded_counted', None)
+    after = {name: getattr(report, name) for name in CrimeReport.COUNTED_FIELDS}
+    report._loaded_counted = after
+    if not created and (before is None or len(before) < len(after)):
+        # Saved without being loaded, or with counted fields deferred: what it
+        # was is unknown, so recount whoever it concerns
+        users = {after['reported_by_id'], after['assigned_to_id']}
+        users.update((before or {}).get(name) for name in ('reported_by_id', 'assigned_to_id'))
+        rebuild(users - {None})
+        return
+
+    delta = _counts(after)
+    delta.subtract(_counts(before))
+    _apply(delta)
+    if created:
+        UserStats.objects.filter(user_id=report.reported_by_id).filter(
+            Q(last_report_on__isnull=True) | Q(last_report_on__lt=report.reported_on)
+        ).update(last_report_on=report.reported_on)
+    elif (before['reported_by_id'], before['reported_on']) != (after['reported_by_id'], after['reported_on']):
+        _recount_last_report({before['reported_by_id'], after['reported_by_id']})
+
+
+def report_deleted(report):
+    before = {name: getattr(report, name) for name in CrimeReport.COUNTED_FIELDS}
+    delta = Counter()
+    delta.subtract(_counts(before))
+    # Deleting a user deletes their reports too; no row is recreated for them
+    _apply(delta, create_missing=False)
+    _recount_last_report([report.reported_by_id], not_after=report.reported_on)
+
+
+def reports_updated(before, status=None, assigned_to_id=None):
+    """Counts a bulk change of status and/or assignee to reports whose previous
+    counted_state dicts are ``before``."""
+    delta = Counter()
+    for state in before:
+        after = dict(state)
+        if status:
+            after['status'] = status
+        if assigned_to_id:
+            after['assigned_to_id'] = assigned_to_id
+        delta.update(_counts(after))
+        delta.subtract(_counts(state))
+    _apply(delta)
+
+
+def inbox_changed(changes, create_missing=True):
+    """Adds {user id: change} to the users' inbox_unread (see crime_report.inbox)."""
+    _apply(Counter({(user_id, 'inbox_unread'): change for user_id, change in changes.items()}), create_missing)
+
+
+def _month(joined):
+    return timezone.localtime(joined).date().replace(day=1)
+
+
+def user_joined(user):
+    UserStats.objects.bulk_create([UserStats(user=user)], ignore_conflicts=True)
+    month = _month(user.date_joined)
+    if SignupMonth.objects.filter(month=month).update(count=F('count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            SignupMonth.objects.create(month=month, count=1)
+    except IntegrityError:
+        # Another signup created the month first
+        SignupMonth.objects.filter(month=month).update(count=F('count') + 1)
+
+
+def user_left(user):
+    SignupMonth.objects.filter(month=_month(user.date_joined)).update(count=F('count') - 1)
+
+
+def rebuild(user_ids=None):
+    """Recounts UserStats for ``user_ids`` from the reports; for every user, and
+    SignupMonth too, when None. Returns the number of users counted."""
+    users = User.objects.all() if user_ids is None else User.objects.filter(id__in=user_ids)
+    filed = Counter()
+    last_report_on = {}
+    cases = defaultdict(lambda: [0, 0, 0])
+    for model in (CrimeReport, ArchivedReport):
+        reports = model.objects.order_by()
+        for user_id, count, latest in (
+            reports.filter(reported_by__in=users).values_list('reported_by').annotate(Count('id'), Max('reported_on'))
+        ):
+            filed[user_id] += count
+            last_report_on[user_id] = max(last_report_on.get(user_id, latest), latest)
+        for user_id, *counts in reports.filter(assigned_to__in=users).values_list('assigned_to').annotate(
+            assigned=Count('id'),
+            open=Count('id', filter=Q(status__in=CrimeReport.OPEN_STATUSES)),
+            resolved=Count('id', filter=Q(status='resolved')),
+        ):
+            cases[user_id] = [total + count for total, count in zip(cases[user_id], counts)]
+    unread = dict(
+        InboxItem.objects.filter(user__in=users, unread__gt=0)
+        .order_by().values_list('user').annotate(Count('id'))
+    )
+    rows = []
+    for user_id in users.order_by('id').values_list('id', flat=True):
+        cases_assigned, cases_open, cases_resolved = cases.get(user_id, (0, 0, 0))
+        rows.append(UserStats(
+            user_id=user_id,
+            reports_filed=filed[user_id],
+            last_report_on=last_report_on.get(user_id),
+            cases_assigned=cases_assigned,
+            cases_open=cases_open,
+            cases_resolved=cases_resolved,
+            inbox_unread=unread.get(user_id, 0),
+        ))
+
+    with transaction.atomic():
+        UserStats.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True,
+            unique_fields=['user'], update_fields=[*COUNTERS, 'last_report_on', 'inbox_unread'],
+        )
+        if user_ids is None:
+            months = (
+                User.objects.annotate(month=TruncMonth('date_joined', output_field=DateField()))
+                .order_by().values_list('month').annotate(Count('id'))
+            )
+            SignupMonth.objects.all().delete()
+            SignupMonth.objects.bulk_create([SignupMonth(month=month, count=count) for month, count in months])
+    return len(rows)
@@ -29,9 +29,7 @@ def can_view_report(view_func):
             raise PermissionDenied
         
         from .models import CrimeReport
-        report = CrimeReport.objects.get(pk=report_id)
-        
-        if not report.can_view_details(request.user):
+        if not CrimeReport.objects.visible_to(request.user).filter(pk=report_id).exists():
             messages.error(request, 'You do not have permission to view this report.')
             return redirect('crime_list')
             
@@ -0,0 +1,158 @@
+"""Duplicate and campaign detection for crime reports.
+
+Reports are matched two ways, both indexed whenever a report's text is saved:
+
+* A MinHash signature of the title and description (word 3-shingles), split
+  into ``DETECTION_LSH_BANDS`` bands. Each band is hashed to a bucket key, and
+  reports sharing any key become candidate duplicates, ranked by the Jaccard
+  similarity their signatures estimate. A lookup reads only the matching
+  buckets, however many reports there are.
+* The indicators of compromise mentioned in the report and its updates
+  (see crime_report.iocs), so reports from the same campaign are found by
+  exact match. Indicators unrelated reports share too (a mail provider's
+  domain, a private IP address) are left out, as in case priority.
+"""
+import hashlib
+import random
+import re
+import struct
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .iocs import links_cases
+from .models import CrimeReport, ReportBucket, ReportFingerprint, ReportIndicator
+
+# Stored signatures depend on these; changing them requires `manage.py index_reports`
+_PRIME = (1 << 61) - 1
+_rng = random.Random('cybercell-minhash')
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(settings.DETECTION_MINHASH_PERMUTATIONS)
+]
+_SIGNATURE = struct.Struct(f'<{settings.DETECTION_MINHASH_PERMUTATIONS}I')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _shingles(text):
+    words = WORD_RE.findall(text.lower())
+    if len(words) < 3:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def minhash(text):
+    """MinHash signature of ``text`` as a tuple of 32-bit ints, or None without words."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        for shingle in _shingles(text)
+    ]
+    if not hashes:
+        return None
+    return tuple(
+        min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF
+        for a, b in _PERMUTATIONS
+    )
+
+
+def bucket_keys(signature):
+    """One signed 64-bit key per LSH band of ``signature``."""
+    rows = len(signature) // settings.DETECTION_LSH_BANDS
+    keys = []
+    for band in range(settings.DETECTION_LSH_BANDS):
+        chunk = struct.pack(f'<H{rows}I', band, *signature[band * rows:(band + 1) * rows])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    """Jaccard similarity estimated from two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def index_report(report):
+    """(Re)writes the fingerprint and LSH buckets of ``report``."""
+    text = f'{report.title}\n{report.description}'
+    signature = minhash(text)
+    with transaction.atomic():
+        ReportFingerprint.objects.filter(report=report).delete()
+        ReportBucket.objects.filter(report=report).delete()
+        if signature is not None:
+            ReportFingerprint.objects.create(report=report, signature=_SIGNATURE.pack(*signature))
+            ReportBucket.objects.bulk_create([
+                ReportBucket(report=report, key=key) for key in bucket_keys(signature)
+            ])
+
+
+def _report_queryset():
+    return CrimeReport.objects.select_related('category', 'location__city__state')
+
+
+def find_duplicates(report, limit=5):
+    """[(report, similarity)] for the reports whose text most resembles ``report``'s,
+    most similar first, down to DETECTION_DUPLICATE_THRESHOLD."""
+    stored = ReportFingerprint.objects.filter(report=report).values_list('signature', flat=True).first()
+    if stored is None:
+        return []
+    signature = _SIGNATURE.unpack(bytes(stored))
+
+    # Boilerplate text can fill a bucket; only score a bounded number of candidates
+    candidate_ids = list(
+        ReportBucket.objects.filter(key__in=bucket_keys(signature))
+        .exclude(report_id=report.id)
+        .values_list('report_id', flat=True)
+        .distinct()[:settings.DETECTION_MAX_CANDIDATES]
+    )
+    scores = []
+    for report_id, other in ReportFingerprint.objects.filter(report_id__in=candidate_ids).values_list('report_id', 'signature'):
+        score = similarity(signature, _SIGNATURE.unpack(bytes(other)))
+        if score >= settings.DETECTION_DUPLICATE_THRESHOLD:
+            scores.append((score, report_id))
+    scores.sort(reverse=True)
+    scores = scores[:limit]
+
+    reports = _report_queryset().in_bulk([report_id for _, report_id in scores])
+    return [(reports[report_id], score) for score, report_id in scores if report_id in reports]
+
+
+def find_linked_reports(report, limit=5):
+    """[(indicator, [reports], total)] for each of ``report``'s indicators that other
+    reports also mention: the ``limit`` most recent such reports, and how many
+    there are in all. Only indicators that ``iocs.links_cases`` accepts count,
+    as in the priority score."""
+    # The same indicator can come from the report and several of its updates
+    indicators = list({
+        (indicator.kind, indicator.value): indicator for indicator in report.indicators.all()
+        if links_cases(indicator.kind, indicator.value)
+    }.values())
+    if not indicators:
+        return []
+    matches = Q()
+    for indicator in indicators:
+        matches |= Q(kind=indicator.kind, value=indicator.value)
+    others = ReportIndicator.objects.filter(matches).exclude(report_id=report.id)
+    totals = {
+        (row['kind'], row['value']): row['total']
+        for row in others.values('kind', 'value').annotate(total=Count('id')).order_by()
+    }
+
+    # A widely shared indicator (a bank's helpline) can match thousands of
+    # reports, so fetch only the most recent few per indicator
+    linked = {
+        (indicator.kind, indicator.value): list(
+            others.filter(kind=indicator.kind, value=indicator.value)
+            .order_by('-report__reported_on')
+            .values_list('report_id', flat=True)[:limit]
+        )
+        for indicator in indicators
+        if (indicator.kind, indicator.value) in totals
+    }
+    reports = _report_queryset().in_bulk([report_id for ids in linked.values() for report_id in ids])
+    results = []
+    for indicator in indicators:
+        key = (indicator.kind, indicator.value)
+        if key in linked:
+            results.append((indicator, [reports[report_id] for report_id in linked[key]], totals[key]))
+    return results
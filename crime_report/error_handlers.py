@@ -38,4 +38,12 @@ def handle_400(request, exception):
             'error': 'Bad request',
             'status_code': 400
         }, status=400)
-    return render(request, 'crime_report/errors/400.html', status=400)
\ No newline at end of file
+    return render(request, 'crime_report/errors/400.html', status=400)
+def handle_429(request):
+    """Too Many Requests, returned by crime_report.ratelimit (which adds Retry-After)."""
+    if request.path.startswith('/api/'):
+        return JsonResponse({
+            'error': 'Too many requests',
+            'status_code': 429
+        }, status=429)
+    return render(request, 'crime_report/errors/429.html', status=429)
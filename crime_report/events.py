@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+READ_BATCH_SIZE = 500
+
+
+class EventStore:
+    """Append-only event log in a small SQLite file shared by all worker processes."""
+
+    def __init__(self, path, retention):
+        self.path = str(path)
+        self.retention = retention
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS live_event ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'created REAL NOT NULL, '
+                'payload TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS live_event_created ON live_event (created)')
+            self._initialized = True
+        return conn
+
+    def append(self, events):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO live_event (created, payload) VALUES (?, ?)',
+                    [(now, json.dumps(event)) for event in events]
+                )
+                conn.execute('DELETE FROM live_event WHERE created < ?', (now - self.retention,))
+        finally:
+            conn.close()
+
+    def read_since(self, last_id, limit=None):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT id, payload FROM live_event WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, limit or READ_BATCH_SIZE)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(json.loads(payload), id=event_id) for event_id, payload in rows]
+
+    def latest_id(self):
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT MAX(id) FROM live_event').fetchone()
+        finally:
+            conn.close()
+        return row[0] or 0
+
+
+class EventHub:
+    """In-process pub/sub for live event subscribers.
+
+    Events are written to the shared ``EventStore`` and a single poller task per
+    process reads them back and fans them out to local subscriber queues, so
+    events published by any worker reach every connected officer.
+    """
+
+    def __init__(self, store, poll_interval, queue_size=100):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._cursor = None
+        self._task = None
+
+    def publish(self, events):
+        if not events or not settings.LIVE_EVENTS_ENABLED:
+            return
+        try:
+            self.store.append(events)
+        except sqlite3.Error as e:
+            logger.error(f"Error publishing live events: {str(e)}")
+
+    async def subscribe(self, accepts):
+        """Register a subscriber; ``accepts`` decides which events it receives."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[queue] = accepts
+        if self._cursor is None:
+            self._cursor = await asyncio.to_thread(self.store.latest_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.pop(queue, None)
+
+    @property
+    def cursor(self):
+        """Id of the last event fanned out to the subscriber queues."""
+        return self._cursor or 0
+
+    async def _poll(self):
+        while self._subscribers:
+            try:
+                events = await asyncio.to_thread(self.store.read_since, self._cursor)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading live events: {str(e)}")
+                events = []
+
+            for event in events:
+                self._cursor = event['id']
+                self._dispatch(event)
+
+            if len(events) < READ_BATCH_SIZE:
+                await asyncio.sleep(self.poll_interval)
+        # Forget the cursor so a later subscriber starts from the current tail
+        self._cursor = None
+
+    def _dispatch(self, event):
+        for queue, accepts in list(self._subscribers.items()):
+            if not accepts(event):
+                continue
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: end its stream so it reconnects with Last-Event-ID
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+def event_filter(user_id, user_type):
+    """Admins see every event. Police see activity on the cases assigned to
+    them and new reports nobody is assigned to yet (the shared work queue),
+    not those filed straight to another officer. Anyone else only sees the
+    reports they may open (CrimeReport.objects.visible_to)."""
+    def accepts(event):
+        if user_type == 'admin':
+            return True
+        if event.get('assigned_to_id') == user_id:
+            return True
+        if user_type == 'police':
+            return event['type'] == 'report_created' and event.get('assigned_to_id') is None
+        return event.get('reported_by_id') == user_id
+    return accepts
+
+
+def report_event(event_type, report, **extra):
+    return dict({
+        'type': event_type,
+        'report_id': report.id,
+        'title': report.title,
+        'status': report.status,
+        'reported_by_id': report.reported_by_id,
+        'assigned_to_id': report.assigned_to_id,
+    }, **extra)
+
+
+hub = EventHub(
+    EventStore(settings.LIVE_EVENTS_DB, settings.LIVE_EVENTS_RETENTION),
+    settings.LIVE_EVENTS_POLL_INTERVAL,
+)
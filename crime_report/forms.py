@@ -3,7 +3,7 @@ from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from .models import CrimeReport, Location, UserProfile, CrimeUpdate
+from .models import CrimeReport, Location, UserProfile, CrimeUpdate, normalize_place_name
 
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -47,22 +47,32 @@ class UserProfileForm(forms.ModelForm):
             'address': forms.Textarea(attrs={'rows': 3}),
         }
 
-class LocationForm(forms.ModelForm):
-    class Meta:
-        model = Location
-        fields = ('city', 'state', 'area', 'pincode')
-        widgets = {
-            'city': forms.TextInput(attrs={'class': 'form-control'}),
-            'state': forms.TextInput(attrs={'class': 'form-control'}),
-            'area': forms.TextInput(attrs={'class': 'form-control'}),
-            'pincode': forms.TextInput(attrs={'class': 'form-control', 'pattern': '[0-9]{6}', 'title': 'Enter a valid 6-digit pincode'}),
-        }
+class LocationForm(forms.Form):
+    """City/state/area/pincode as typed by the reporter; ``save()`` maps them onto
+    the normalized location hierarchy, reusing existing rows."""
+    city = forms.CharField(max_length=100, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    state = forms.CharField(max_length=100, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    area = forms.CharField(max_length=100, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    pincode = forms.CharField(
+        max_length=6,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'pattern': '[0-9]{6}', 'title': 'Enter a valid 6-digit pincode'})
+    )
     
     def clean_pincode(self):
         pincode = self.cleaned_data.get('pincode')
         if not pincode.isdigit() or len(pincode) != 6:
             raise ValidationError('Please enter a valid 6-digit pincode.')
         return pincode
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in ('city', 'state', 'area'):
+            if cleaned_data.get(field):
+                cleaned_data[field] = normalize_place_name(cleaned_data[field])
+        return cleaned_data
+    
+    def save(self):
+        return Location.objects.resolve(**self.cleaned_data)
 
 class CrimeReportForm(forms.ModelForm):
     class Meta:
@@ -162,4 +172,51 @@ class UserTypeUpdateForm(forms.ModelForm):
                     'department': 'Department is required for police officers.'
                 })
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+class BulkReportUpdateForm(forms.Form):
+    """Status change, assignment and shared note applied to a set of reports."""
+    status = forms.ChoiceField(
+        choices=(('', 'Keep current status'),) + CrimeReport.STATUS_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    assigned_to = forms.ModelChoiceField(
+        queryset=User.objects.none(),
+        required=False,
+        empty_label='Keep current assignment',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    update_text = forms.CharField(
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 3})
+    )
+    
+    def __init__(self, *args, reports=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reports = reports if reports is not None else CrimeReport.objects.none()
+        self.fields['assigned_to'].queryset = User.objects.filter(
+            profile__user_type__in=['police', 'admin']
+        )
+    
+    def clean_update_text(self):
+        update_text = self.cleaned_data.get('update_text')
+        if len(update_text.strip()) < 10:
+            raise ValidationError('Update text must be at least 10 characters long.')
+        return update_text
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        status = cleaned_data.get('status')
+        assigned_to = cleaned_data.get('assigned_to')
+        
+        if not self.reports.exists():
+            raise ValidationError('Select at least one report to update.')
+        
+        # Same rule as CrimeStatusUpdateForm, checked for every selected row at once
+        if (status in ['investigating', 'resolved'] and not assigned_to and
+                self.reports.filter(assigned_to__isnull=True).exists()):
+            raise ValidationError({
+                'assigned_to': 'An officer must be assigned for investigating or resolved cases.'
+            })
+        
+        return cleaned_data
@@ -0,0 +1,119 @@
+"""Lookups over the State/City/Area/Pincode hierarchy."""
+import csv
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import City, CrimeReport, Location, normalize_place_name
+
+
+def city_q(value, prefix='location__'):
+    """Q for a ``?city=`` filter: a City id, or a city name from older links."""
+    value = value.strip()
+    if value.isdigit():
+        return Q(**{f'{prefix}city_id': int(value)})
+    return Q(**{f'{prefix}city__name__iexact': normalize_place_name(value)})
+
+
+@functools.lru_cache(maxsize=None)
+def _centroids():
+    with open(settings.PINCODE_CENTROIDS_FILE, newline='', encoding='utf-8') as f:
+        return {row['pincode']: (float(row['latitude']), float(row['longitude'])) for row in csv.DictReader(f)}
+
+
+def locate_pincode(code):
+    """(centroid, precision) for a pincode from PINCODE_CENTROIDS_FILE: its own
+    centroid ('pincode') when listed, else that of its sorting district, the
+    first three digits ('district'), else (None, None)."""
+    centroids = _centroids()
+    if code in centroids:
+        return centroids[code], 'pincode'
+    if code[:3] in centroids:
+        return centroids[code[:3]], 'district'
+    return None, None
+
+
+def pincode_centroid(code):
+    """(latitude, longitude) for a pincode, or None; see locate_pincode."""
+    return locate_pincode(code)[0]
+
+
+def reports_by_city(limit=10):
+    """Report counts per city, busiest first, as ``{'city_id', 'city', 'state',
+    'count'}`` dicts. Grouping happens on the integer city key; names are
+    fetched afterwards for the ``limit`` rows only."""
+    rows = list(
+        CrimeReport.objects.values('location__city_id')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'location__city_id')[:limit]
+    )
+    cities = City.objects.select_related('state').in_bulk([row['location__city_id'] for row in rows])
+    return [
+        {
+            'city_id': row['location__city_id'],
+            'city': cities[row['location__city_id']].name,
+            'state': cities[row['location__city_id']].state.name,
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+class PincodeIndex:
+    """In-memory pincode -> known areas map, built with a single query.
+
+    Loaded on first use (or up front with ``PINCODE_INDEX_PRELOAD``) and
+    rebuilt after ``PINCODE_INDEX_TTL`` seconds, so areas added by other
+    processes show up; this process's own new locations are added at once.
+    """
+
+    def __init__(self):
+        self._areas = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        areas = {}
+        rows = Location.objects.values_list(
+            'pincode__code', 'area_id', 'area__name', 'city_id', 'city__name', 'city__state__name'
+        ).order_by('pincode__code', 'area__name')
+        for code, area_id, area, city_id, city, state in rows.iterator(chunk_size=5000):
+            areas.setdefault(code, []).append(
+                {'area_id': area_id, 'area': area, 'city_id': city_id, 'city': city, 'state': state}
+            )
+        with self._lock:
+            self._areas = areas
+            self._loaded_at = time.monotonic()
+        return areas
+
+    def lookup(self, code):
+        """Areas (with their city and state) known for ``code``, or []."""
+        areas = self._areas
+        if areas is None or time.monotonic() - self._loaded_at > settings.PINCODE_INDEX_TTL:
+            areas = self.load()
+        return list(areas.get(code, ()))
+
+    def add(self, location):
+        with self._lock:
+            if self._areas is None:
+                return
+            entries = self._areas.setdefault(location.pincode.code, [])
+            if any(entry['area_id'] == location.area_id for entry in entries):
+                return
+            entries.append({
+                'area_id': location.area_id,
+                'area': location.area.name,
+                'city_id': location.city_id,
+                'city': location.city.name,
+                'state': location.city.state.name,
+            })
+
+    def clear(self):
+        with self._lock:
+            self._areas = None
+
+
+pincode_index = PincodeIndex()
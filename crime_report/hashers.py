@@ -0,0 +1,27 @@
+"""Password hashers tuned through settings.
+
+Django's stock parameters are sized for a dedicated machine (Argon2 with
+100 MiB and 8 lanes, PBKDF2 with 600,000 iterations: 200-300 ms per hash on one
+core), and every login pays that cost once. These keep the stock algorithm
+names and hash formats, so they verify hashes made by the stock hashers and the
+other way round, but take their cost from ``PASSWORD_ARGON2_PARAMS`` and
+``PASSWORD_SCRYPT_PARAMS``. When the parameters change, Django rehashes each
+password at its owner's next successful login (``must_update``).
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    time_cost = settings.PASSWORD_ARGON2_PARAMS['time_cost']
+    memory_cost = settings.PASSWORD_ARGON2_PARAMS['memory_cost']  # KiB
+    parallelism = settings.PASSWORD_ARGON2_PARAMS['parallelism']
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = settings.PASSWORD_SCRYPT_PARAMS['work_factor']
+    block_size = settings.PASSWORD_SCRYPT_PARAMS['block_size']
+    parallelism = settings.PASSWORD_SCRYPT_PARAMS['parallelism']
+    # scrypt needs 128 * N * r bytes; OpenSSL refuses more than 32 MiB unless told,
+    # and hashes made with a larger work factor must still verify
+    maxmem = max(64 * 1024 * 1024, 4 * 128 * work_factor * block_size * parallelism)
@@ -0,0 +1,139 @@
+"""Crime hotspots for the dashboard map, served as GeoJSON tiles.
+
+Reports are counted per pincode centroid in the database, so a window costs
+one grouped query however many reports it covers. The centroids are then
+binned into a Web Mercator grid of ``HOTSPOT_GRID_SIZE`` x ``HOTSPOT_GRID_SIZE``
+cells per map tile. Both steps are cached per window, zoom level and data
+version, so panning the map only slices cached cells. NumPy does the binning
+when it is installed; a plain loop gives the same result otherwise.
+"""
+import datetime
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import CrimeReport
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Web Mercator stops at the latitude where the map becomes square
+MAX_LATITUDE = 85.05112878
+
+
+def _mercator(latitude, longitude):
+    """Normalized Web Mercator (x, y) in [0, 1], y growing southwards like tile rows."""
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    sin = math.sin(math.radians(latitude))
+    return (longitude + 180.0) / 360.0, 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+
+
+def _latitude(y):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def window_start(days):
+    """Local midnight ``days - 1`` days ago, so a window is stable for the whole day."""
+    start = timezone.localdate() - datetime.timedelta(days=days - 1)
+    return timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+
+
+def map_options():
+    """Settings the dashboard map needs, for the template."""
+    return {
+        'windows': settings.HOTSPOT_WINDOWS,
+        'default_window': settings.HOTSPOT_DEFAULT_WINDOW,
+        'max_zoom': settings.HOTSPOT_MAX_ZOOM,
+        'base_tiles': settings.HOTSPOT_BASE_TILES,
+    }
+
+
+def _cache_key(*parts):
+    return ':'.join(['hotspots', *map(str, parts), timezone.localdate().isoformat()])
+
+
+def hotspot_points(days, version):
+    """[(x, y, count)] for the pincode centroids with reports in the last ``days``
+    days, in normalized Mercator coordinates."""
+    key = _cache_key('points', days, version)
+    points = cache.get(key)
+    if points is None:
+        rows = (
+            CrimeReport.objects
+            .filter(reported_on__gte=window_start(days), location__pincode__latitude__isnull=False)
+            .values_list('location__pincode__latitude', 'location__pincode__longitude')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        points = [(*_mercator(latitude, longitude), count) for latitude, longitude, count in rows]
+        cache.set(key, points, settings.HOTSPOT_CACHE_TIMEOUT)
+    return points
+
+
+def _bin(points, cells_per_side):
+    """Sums the point counts per grid cell: {(column, row): count}."""
+    if not points:
+        return {}
+    last = cells_per_side - 1
+    if np is not None:
+        data = np.asarray(points, dtype=np.float64)
+        columns = np.minimum((data[:, 0] * cells_per_side).astype(np.int64), last)
+        rows = np.minimum((data[:, 1] * cells_per_side).astype(np.int64), last)
+        cells, inverse = np.unique(columns * cells_per_side + rows, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=data[:, 2])
+        return {
+            (int(cell // cells_per_side), int(cell % cells_per_side)): int(count)
+            for cell, count in zip(cells, counts)
+        }
+
+    binned = defaultdict(int)
+    for x, y, count in points:
+        binned[min(int(x * cells_per_side), last), min(int(y * cells_per_side), last)] += count
+    return dict(binned)
+
+
+def hotspot_grid(days, zoom, version):
+    """Non-empty grid cells at ``zoom`` for the last ``days`` days. Tile (x, y)
+    covers columns ``x * HOTSPOT_GRID_SIZE`` onwards, and rows likewise."""
+    key = _cache_key('grid', days, zoom, version)
+    cells = cache.get(key)
+    if cells is None:
+        cells = _bin(hotspot_points(days, version), 2 ** zoom * settings.HOTSPOT_GRID_SIZE)
+        cache.set(key, cells, settings.HOTSPOT_CACHE_TIMEOUT)
+    return cells
+
+
+def hotspot_tile(days, zoom, x, y, version):
+    """GeoJSON FeatureCollection of the cells with reports inside tile (zoom, x, y).
+
+    Each cell is a Polygon with its report ``count`` and an ``intensity`` relative
+    to the busiest cell at this zoom level, so adjacent tiles share one scale.
+    """
+    size = settings.HOTSPOT_GRID_SIZE
+    cells_per_side = 2 ** zoom * size
+    cells = hotspot_grid(days, zoom, version)
+    peak = max(cells.values(), default=0)
+
+    features = []
+    for (column, row), count in sorted(cells.items()):
+        if column // size != x or row // size != y:
+            continue
+        west = round(column / cells_per_side * 360.0 - 180.0, 6)
+        east = round((column + 1) / cells_per_side * 360.0 - 180.0, 6)
+        north = round(_latitude(row / cells_per_side), 6)
+        south = round(_latitude((row + 1) / cells_per_side), 6)
+        features.append({
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+            },
+            'properties': {'count': count, 'intensity': round(count / peak, 4)},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,123 @@
+import asyncio
+import datetime
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .inbox import request_unread_count
+from .models import DataVersion
+
+# DataVersion row bumped on every CrimeReport/CrimeUpdate/CrimeCategory write and
+# on writes to the location hierarchy (State/City/Area/Pincode/Location)
+CRIME_DATA = 'crime_data'
+# DataVersion row bumped on every User/UserProfile write (logins excluded)
+USER_DATA = 'user_data'
+
+
+def get_data_version(request, name=CRIME_DATA):
+    """Returns (version, updated_on) for ``name``, read at most once per request."""
+    versions = request.__dict__.setdefault('_data_versions', {})
+    if name not in versions:
+        versions[name] = DataVersion.current(name)
+    return versions[name]
+
+
+def _validators(request, per_user, use_last_modified):
+    """Returns (etag, last_modified) for the current data version, or None to skip."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    # Shared validators are for signed-in API clients; let the view handle the rest
+    if not per_user and not request.user.is_authenticated:
+        return None
+    # A 304 would hide pending flash messages, so always render those pages
+    if per_user and len(messages.get_messages(request)):
+        return None
+
+    version, updated_on = get_data_version(request)
+    # The date covers "today"/month-relative content that changes without writes,
+    # and must be the local one those pages are computed in;
+    # Accept picks between JSON and the streaming formats (crime_report.streaming)
+    today = timezone.localdate()
+    parts = [version, today.isoformat(), request.META.get('HTTP_ACCEPT', '')]
+    if per_user:
+        # Pages embed role-dependent navigation and a CSRF token tied to the CSRF cookie
+        user = request.user
+        user_type = user.profile.user_type if hasattr(user, 'profile') else ''
+        parts += [user.pk or 0, user_type, request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')]
+        if user_type in ('police', 'admin'):
+            # The navbar's inbox badge; reading a case changes it without a data version bump
+            parts.append(request_unread_count(request))
+    etag = quote_etag(hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest())
+
+    last_modified = None
+    if use_last_modified and updated_on is not None:
+        # Like the ETag, a response from before today's local midnight is stale
+        # even without writes, so If-Modified-Since must not revalidate it
+        midnight = timezone.make_aware(datetime.datetime.combine(today, datetime.time()))
+        last_modified = timegm(max(updated_on, midnight).utctimetuple())
+    return etag, last_modified
+
+
+def apply_cache_policy(request, response):
+    """Sets Cache-Control from HTTP_CACHE_POLICIES for the requesting user's role."""
+    user = request.user
+    if not user.is_authenticated:
+        role = 'anonymous'
+    else:
+        role = user.profile.user_type if hasattr(user, 'profile') else 'citizen'
+    response['Cache-Control'] = settings.HTTP_CACHE_POLICIES.get(role, 'private, no-cache')
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def _finish(request, response, validators):
+    if validators is not None and response.status_code in (200, 304):
+        etag, last_modified = validators
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        apply_cache_policy(request, response)
+    return response
+
+
+def conditional_on_data_version(per_user=True, use_last_modified=False):
+    """Answers conditional GETs with 304 from the data version alone, before the
+    view computes anything, and adds ETag (and optionally Last-Modified) plus the
+    role's Cache-Control policy to full responses.
+
+    ``per_user`` must stay on for HTML pages, which differ between users.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                validators = await sync_to_async(_validators)(request, per_user, use_last_modified)
+                if validators is not None:
+                    response = get_conditional_response(
+                        request, etag=validators[0], last_modified=validators[1]
+                    )
+                    if response is not None:
+                        return await sync_to_async(_finish)(request, response, validators)
+                response = await view_func(request, *args, **kwargs)
+                return await sync_to_async(_finish)(request, response, validators)
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                validators = _validators(request, per_user, use_last_modified)
+                if validators is not None:
+                    response = get_conditional_response(
+                        request, etag=validators[0], last_modified=validators[1]
+                    )
+                    if response is not None:
+                        return _finish(request, response, validators)
+                response = view_func(request, *args, **kwargs)
+                return _finish(request, response, validators)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,183 @@
+"""Officers' inboxes: an InboxItem for each case assigned to them, with the
+number of updates on it they have not seen. The inbox page reads one range of
+the inbox_user_activity_idx index, and the navbar's unread badge reads
+UserStats.inbox_unread (the cases with unread updates) by primary key, instead
+of querying the assignments on every request.
+
+Assigning a case moves it to the new assignee's inbox as unread. An update by
+anyone but the assignee adds one to its unread count, and the assignee
+opening the case marks it read. Writes that skip the model signals and
+bulk_update_reports (``manage.py seed``, raw SQL) are put right with
+``rebuild``; ``manage.py rebuild_inbox`` runs it for every user.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import counters
+from .models import CrimeReport, InboxItem, UserStats
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), settings.INBOX_BATCH_SIZE):
+        yield ids[start:start + settings.INBOX_BATCH_SIZE]
+
+
+def _file(assignee_id, report_ids, when):
+    """Puts those of ``report_ids`` missing from the assignee's inbox in it, unread.
+    Returns the number added."""
+    existing = set(
+        InboxItem.objects.filter(user_id=assignee_id, report_id__in=report_ids).values_list('report_id', flat=True)
+    )
+    items = [
+        InboxItem(user_id=assignee_id, report_id=report_id, unread=1, last_activity=when)
+        for report_id in report_ids if report_id not in existing
+    ]
+    InboxItem.objects.bulk_create(items, ignore_conflicts=True)
+    return len(items)
+
+
+def assign(report_ids, assignee_id, when):
+    """Moves ``report_ids`` into ``assignee_id``'s inbox, or out of every inbox
+    when None."""
+    changes = Counter()
+    with transaction.atomic():
+        for batch in _batches(report_ids):
+            moved = InboxItem.objects.filter(report_id__in=batch).exclude(user_id=assignee_id)
+            for user_id, unread in moved.filter(unread__gt=0).order_by().values_list('user').annotate(Count('id')):
+                changes[user_id] -= unread
+            moved.delete()
+            if assignee_id:
+                changes[assignee_id] += _file(assignee_id, batch, when)
+        counters.inbox_changed(changes)
+
+
+def record_updates(updates):
+    """Counts each of ``updates`` as unread in its case's assignee's inbox,
+    unless the assignee wrote it."""
+    report_ids = {update.crime_report_id for update in updates}
+    assignees = {}
+    for batch in _batches(report_ids):
+        assignees.update(
+            CrimeReport.objects.filter(id__in=batch, assigned_to__isnull=False).values_list('id', 'assigned_to_id')
+        )
+
+    unseen = defaultdict(Counter)  # {assignee: {report: updates they did not write}}
+    seen = defaultdict(set)
+    latest = {}
+    for update in updates:
+        assignee_id = assignees.get(update.crime_report_id)
+        if not assignee_id:
+            continue
+        if update.updated_by_id == assignee_id:
+            seen[assignee_id].add(update.crime_report_id)
+        else:
+            unseen[assignee_id][update.crime_report_id] += 1
+        latest[assignee_id] = max(latest.get(assignee_id, update.updated_on), update.updated_on)
+
+    changes = Counter()
+    with transaction.atomic():
+        for assignee_id, report_ids in seen.items():
+            for batch in _batches(report_ids):
+                InboxItem.objects.filter(user_id=assignee_id, report_id__in=batch).update(
+                    last_activity=Greatest('last_activity', Value(latest[assignee_id])),
+                )
+        for assignee_id, counts in unseen.items():
+            when = latest[assignee_id]
+            by_count = defaultdict(list)
+            for report_id, count in counts.items():
+                by_count[count].append(report_id)
+            for count, report_ids in by_count.items():
+                for batch in _batches(report_ids):
+                    items = InboxItem.objects.filter(user_id=assignee_id, report_id__in=batch)
+                    # Unread cases first, so the second UPDATE counts only those turning unread
+                    touched = items.filter(unread__gt=0).update(
+                        unread=F('unread') + count, last_activity=Greatest('last_activity', Value(when)),
+                    )
+                    turned = items.filter(unread=0).update(
+                        unread=count, last_activity=Greatest('last_activity', Value(when)),
+                    )
+                    changes[assignee_id] += turned
+                    if touched + turned < len(batch):
+                        # Assigned before the inboxes, or outside the signals
+                        changes[assignee_id] += _file(assignee_id, batch, when)
+        counters.inbox_changed(changes)
+
+
+def mark_read(user, report_id):
+    if InboxItem.objects.filter(user=user, report_id=report_id, unread__gt=0).update(unread=0):
+        counters.inbox_changed({user.pk: -1})
+
+
+def mark_all_read(user):
+    """Marks every case in ``user``'s inbox read. Returns the number that were unread."""
+    read = InboxItem.objects.filter(user=user, unread__gt=0).update(unread=0)
+    if read:
+        counters.inbox_changed({user.pk: -read})
+    return read
+
+
+def report_deleted(report):
+    changes = Counter()
+    for user_id in InboxItem.objects.filter(report=report, unread__gt=0).values_list('user_id', flat=True):
+        changes[user_id] -= 1
+    # Deleting a user deletes their reports too; no row is recreated for them
+    counters.inbox_changed(changes, create_missing=False)
+
+
+def unread_count(user):
+    """Cases in ``user``'s inbox with unread updates: one primary key lookup."""
+    return UserStats.objects.filter(user_id=user.pk).values_list('inbox_unread', flat=True).first() or 0
+
+
+def request_unread_count(request):
+    """``unread_count`` of the request's user, read at most once per request."""
+    if '_inbox_unread' not in request.__dict__:
+        request._inbox_unread = unread_count(request.user)
+    return request._inbox_unread
+
+
+def items(user, unread_only=False):
+    """``user``'s inbox, latest activity first."""
+    inbox = InboxItem.objects.filter(user=user)
+    if unread_only:
+        inbox = inbox.filter(unread__gt=0)
+    return inbox.select_related('report__category').order_by('-last_activity')
+
+
+def rebuild(user_ids=None):
+    """Makes the inboxes of ``user_ids`` (every user, when None) match the case
+    assignments: cases assigned elsewhere are taken out, and assigned cases
+    missing are put in, read. Unread counts of the cases already there are kept.
+    Returns the number of cases added."""
+    inboxes = InboxItem.objects.all() if user_ids is None else InboxItem.objects.filter(user_id__in=user_ids)
+    assigned = CrimeReport.objects.filter(assigned_to__isnull=False)
+    if user_ids is not None:
+        assigned = assigned.filter(assigned_to__in=user_ids)
+    missing = (
+        assigned.exclude(inbox_items__user=F('assigned_to'))
+        .annotate(last_activity=Greatest('reported_on', Coalesce(Max('updates__updated_on'), 'reported_on')))
+        .order_by().values_list('id', 'assigned_to_id', 'last_activity')
+    )
+    added = 0
+    with transaction.atomic():
+        inboxes.exclude(report__assigned_to=F('user')).delete()
+        rows = []
+        for report_id, assignee_id, last_activity in missing:
+            rows.append(InboxItem(user_id=assignee_id, report_id=report_id, last_activity=last_activity))
+            if len(rows) == settings.INBOX_BATCH_SIZE:
+                added += len(InboxItem.objects.bulk_create(rows, ignore_conflicts=True))
+                rows = []
+        added += len(InboxItem.objects.bulk_create(rows, ignore_conflicts=True))
+
+        unread = (
+            InboxItem.objects.filter(user=OuterRef('user'), unread__gt=0)
+            .order_by().values('user').annotate(count=Count('id')).values('count')
+        )
+        stats = UserStats.objects.all() if user_ids is None else UserStats.objects.filter(user_id__in=user_ids)
+        stats.update(inbox_unread=Coalesce(Subquery(unread), 0))
+    return added
@@ -0,0 +1,243 @@
+"""Indicators of compromise (IOCs) mentioned in reports and case updates.
+
+``extract_iocs`` parses URLs, domains, IP addresses, phone numbers, email
+addresses, crypto wallet addresses and UPI IDs out of free text, normalized
+so that each indicator has one spelling. ``ReportIndicator`` keeps them per
+report and per update, indexed on (kind, value); the signals rewrite a
+report's or update's rows whenever its text changes, so a lookup is one
+indexed query instead of a LIKE scan over every description.
+"""
+import ipaddress
+import re
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import ReportIndicator
+
+URL_RE = re.compile(r'\b(?:https?://|www\.)[^\s<>"\']+', re.IGNORECASE)
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+# VPAs look like emails without a dot in the handle's domain: name@okaxis, 98xxxxxx@ybl
+UPI_RE = re.compile(r'(?<![\w.@-])[\w.-]{2,}@[a-zA-Z][a-zA-Z0-9]{1,63}(?![\w@-]|\.\w)')
+WALLET_RES = [
+    re.compile(r'\b0x[a-fA-F0-9]{40}\b'),  # Ethereum and other EVM chains
+    re.compile(r'\bbc1[ac-hj-np-z02-9]{11,71}\b', re.IGNORECASE),  # Bitcoin bech32
+    re.compile(r'\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b'),  # Bitcoin legacy
+    re.compile(r'\bT[1-9A-HJ-NP-Za-km-z]{33}\b'),  # Tron
+]
+IPV4_RE = re.compile(r'(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])')
+IPV6_RE = re.compile(r'(?<![\w:])(?:[0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{0,4}(?![\w:])')
+HOSTNAME_RE = re.compile(r'(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24}', re.IGNORECASE)
+PHONE_RE = re.compile(r'(?<![\w+])\+?\d[\d\s-]{8,15}\d(?!\w)')
+
+# Bare domains in prose ("visit sbi-kyc.top") are only recognized with these
+# TLDs, so file names like "statement.pdf" are not taken for domains
+DOMAIN_TLDS = frozenset([
+    'com', 'net', 'org', 'info', 'biz', 'in', 'co', 'io', 'me', 'app', 'xyz', 'top', 'online', 'site',
+    'live', 'shop', 'store', 'club', 'link', 'click', 'vip', 'icu', 'cc', 'tk', 'ml', 'ga', 'cf', 'gq',
+    'ru', 'cn', 'uk', 'us', 'pk', 'bd', 'ly', 'gl', 'to', 'ws', 'su', 'pw', 'work', 'support', 'help',
+])
+
+# Mail providers and platforms that victims and scammers alike use: a report
+# naming one says nothing about who is behind it, and every report would link
+# to every other. Addresses and URLs on them are still indicators.
+COMMON_DOMAINS = frozenset([
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'yahoo.co.in', 'yahoo.in', 'ymail.com', 'rocketmail.com',
+    'outlook.com', 'hotmail.com', 'live.com', 'msn.com', 'icloud.com', 'me.com', 'aol.com', 'gmx.com',
+    'mail.com', 'protonmail.com', 'proton.me', 'zoho.com', 'zohomail.in', 'rediffmail.com', 'rediff.com',
+    'yandex.com', 'yandex.ru', 'mail.ru', 'tutanota.com', 'google.com', 'youtube.com', 'facebook.com',
+    'instagram.com', 'whatsapp.com', 'telegram.org', 't.me', 'wa.me', 'twitter.com', 'x.com',
+    'linkedin.com', 'amazon.in', 'amazon.com', 'flipkart.com',
+])
+
+
+def _normalize_phone(match):
+    digits = re.sub(r'\D', '', match)
+    if len(digits) == 12 and digits.startswith('91'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    if len(digits) == 10 and digits[0] in '6789':
+        return digits
+    if match.startswith('+') and 8 <= len(digits) <= 15:
+        return f'+{digits}'
+    return None
+
+
+def _normalize_ip(match):
+    try:
+        ip = ipaddress.ip_address(match)
+    except ValueError:
+        return None
+    return None if ip.is_unspecified else str(ip)
+
+
+def _domain(host):
+    return None if host in COMMON_DOMAINS else ('domain', host)
+
+
+def _host_indicator(host):
+    host = host.lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    ip = _normalize_ip(host.strip('[]'))
+    if ip:
+        return ('ip', ip)
+    return _domain(host) if HOSTNAME_RE.fullmatch(host) else None
+
+
+def _url_indicators(match):
+    url = match.rstrip('.,;:!?)]}')
+    if not re.match(r'https?://', url, re.IGNORECASE):
+        url = f'http://{url}'
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+    except ValueError:
+        return []
+    if not host:
+        return []
+    indicators = [('url', f'{host.lower().removeprefix("www.")}{parts.path.rstrip("/")}'
+                          f'{"?" + parts.query if parts.query else ""}')]
+    host_indicator = _host_indicator(host)
+    if host_indicator:
+        indicators.append(host_indicator)
+    return indicators
+
+
+def _email_indicators(match):
+    address = match.lower()
+    domain = _domain(address.rpartition('@')[2])
+    return [('email', address), domain] if domain else [('email', address)]
+
+
+def _wallet(match):
+    # EVM and bech32 addresses are case-insensitive; base58 ones are not
+    if match[:2] == '0x' or match[:3].lower() == 'bc1':
+        return match.lower()
+    # Long runs of digits are account or reference numbers, not addresses
+    return match if any(char.isalpha() for char in match) else None
+
+
+def extract_iocs(text):
+    """{(kind, value)} for every indicator in ``text``, normalized. Each match is
+    blanked out before the next pattern runs, so an email is not also read as a
+    UPI ID nor a wallet address as a phone number."""
+    iocs = set()
+
+    def take(pattern, normalize):
+        nonlocal text
+        for match in pattern.findall(text):
+            for ioc in normalize(match):
+                iocs.add((ioc[0], ioc[1][:255]))
+        text = pattern.sub(' ', text)
+
+    take(URL_RE, _url_indicators)
+    take(EMAIL_RE, _email_indicators)
+    take(UPI_RE, lambda match: [('upi', match.lower())])
+    for pattern in WALLET_RES:
+        take(pattern, lambda match: [('crypto', wallet)] if (wallet := _wallet(match)) else [])
+    take(IPV4_RE, lambda match: [('ip', ip)] if (ip := _normalize_ip(match)) else [])
+    take(IPV6_RE, lambda match: [('ip', ip)] if (ip := _normalize_ip(match)) else [])
+    take(HOSTNAME_RE, lambda match: [domain]
+         if match.rpartition('.')[2].lower() in DOMAIN_TLDS and (domain := _domain(match.lower())) else [])
+    take(PHONE_RE, lambda match: [('phone', phone)] if (phone := _normalize_phone(match)) else [])
+    return iocs
+
+
+def links_cases(kind, value):
+    """Whether reports sharing this indicator are likely about the same scam.
+    Common domains (indexed by older versions of ``extract_iocs``) and private
+    addresses (home routers, LANs) are shared by unrelated reports."""
+    if kind == 'domain':
+        return value not in COMMON_DOMAINS
+    if kind == 'ip':
+        return ipaddress.ip_address(value).is_global
+    return True
+
+
+def parse_query(query):
+    """Indicators to look up for a search string. A bare hostname is accepted
+    with any TLD, unlike in report text."""
+    query = query.strip()
+    iocs = extract_iocs(query)
+    if not iocs and HOSTNAME_RE.fullmatch(query):
+        iocs.add(('domain', query.lower().removeprefix('www.')))
+    return iocs
+
+
+def _replace(rows, **source):
+    with transaction.atomic():
+        ReportIndicator.objects.filter(**source).delete()
+        ReportIndicator.objects.bulk_create(rows)
+
+
+def index_report(report):
+    """Rewrites the indicators taken from ``report``'s title and description."""
+    iocs = extract_iocs(f'{report.title}\n{report.description}')
+    _replace(
+        [ReportIndicator(report=report, kind=kind, value=value) for kind, value in sorted(iocs)],
+        report=report, update__isnull=True,
+    )
+
+
+def index_update(update):
+    """Rewrites the indicators taken from a case update's text."""
+    iocs = extract_iocs(update.update_text)
+    _replace(
+        [ReportIndicator(report_id=update.crime_report_id, update=update, kind=kind, value=value)
+         for kind, value in sorted(iocs)],
+        update=update,
+    )
+
+
+def index_updates(updates):
+    """Indexes freshly bulk-created updates, which bypass post_save. Bulk updates
+    share one note, so each distinct text is parsed once."""
+    parsed = {}
+    rows = []
+    for update in updates:
+        if update.update_text not in parsed:
+            parsed[update.update_text] = sorted(extract_iocs(update.update_text))
+        rows.extend(
+            ReportIndicator(report_id=update.crime_report_id, update=update, kind=kind, value=value)
+            for kind, value in parsed[update.update_text]
+        )
+    ReportIndicator.objects.bulk_create(rows, batch_size=500)
+
+
+def linked_cases(iocs, limit=None):
+    """(cases, truncated): the cases mentioning any of ``iocs`` (in the report or
+    an update), newest first, each with the indicators that matched, and whether
+    more than ``limit`` cases did. One query over the (kind, value) index."""
+    matches = Q()
+    for kind, value in iocs:
+        matches |= Q(kind=kind, value=value)
+    rows = (
+        ReportIndicator.objects.filter(matches)
+        .order_by('-report__reported_on', 'report_id')
+        .values_list(
+            'report_id', 'report__title', 'report__status', 'report__reported_on',
+            'report__category__name', 'report__location__city__name', 'report__assigned_to__username',
+            'kind', 'value', 'update_id',
+        )
+    )
+    cases = {}
+    for report_id, title, status, reported_on, category, city, assigned_to, kind, value, update_id in rows.iterator():
+        case = cases.get(report_id)
+        if case is None:
+            if limit is not None and len(cases) == limit:
+                return list(cases.values()), True
+            case = cases[report_id] = {
+                'id': report_id,
+                'title': title,
+                'status': status,
+                'reported_on': reported_on,
+                'category': category,
+                'city': city,
+                'assigned_to': assigned_to,
+                'matches': [],
+            }
+        case['matches'].append({'kind': kind, 'value': value, 'update_id': update_id})
+    return list(cases.values()), False
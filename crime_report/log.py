@@ -0,0 +1,245 @@
+"""Logging pipeline: request threads only enqueue records, and a background
+listener thread formats and writes them.
+
+``QueueListenerHandler`` is the only handler attached to loggers. It stamps
+each record with the current request ID, applies per-logger sampling and
+hands the record to a queue. Its ``QueueListener`` thread drives the real
+handlers: ``CompressedRotatingFileHandler`` (JSON lines, rotated by size and
+age, rotated files gzipped) and the console.
+
+Each process rotates its own handle on the log file, so with several worker
+processes give each its own ``LOG_FILE`` or log to the console only.
+"""
+import atexit
+import contextvars
+import copy
+import datetime
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import shutil
+import time
+
+_request_id = contextvars.ContextVar('crime_report_request_id', default=None)
+
+# LogRecord attributes that are not "extra" fields passed by the caller
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'request_id',
+}
+
+
+def set_request_id(request_id):
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds ``record.request_id`` (None outside a request)."""
+
+    def filter(self, record):
+        request_id = _request_id.get()
+        if request_id is None:
+            # django.request logs the response status after the middleware has
+            # returned, but passes the request along
+            request_id = getattr(getattr(record, 'request', None), 'request_id', None)
+        record.request_id = request_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records below WARNING from the given loggers.
+
+    ``rates`` maps logger names to the fraction kept; the longest matching
+    prefix wins (``django`` also covers ``django.server``), and loggers with
+    no entry are kept in full.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._resolved = {}
+
+    def _rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, prefix = 1.0, name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                    .isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'request_id': getattr(record, 'request_id', None),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+
+    def enqueue_sentinel(self):
+        # Wait for room: a full queue at shutdown would otherwise raise queue.Full
+        self.queue.put(self._sentinel)
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """Enqueues records for a background ``QueueListener`` driving ``handlers``.
+
+    ``handlers`` are other configured handlers, referenced from dictConfig as
+    ``'cfg://handlers.<name>'``. Attach the request ID and sampling filters
+    here: filters run in the calling thread, before the record is queued.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        # Indexing (unlike iterating) makes dictConfig resolve the cfg:// references
+        handlers = [handlers[i] for i in range(len(handlers))]
+        if not all(isinstance(handler, logging.Handler) for handler in handlers):
+            # dictConfig configures handlers in name order, so the targets are
+            # only instances here if their names sort before this handler's
+            raise ValueError('Target handlers must be configured first; give them names '
+                             'that sort before the queue handler')
+        super().__init__(queue.Queue(queue_size))
+        self.dropped = 0
+        self.listener = _QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        # Resolve what cannot cross threads safely (the message arguments and the
+        # traceback); formatting is left to the target handlers in the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def _dropped_record(self):
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f'Dropped {self.dropped} log record(s): the log queue was full', None, None,
+        )
+        record.request_id = None
+        record.dropped = self.dropped
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                # Report the loss as soon as the queue has room again
+                self.queue.put_nowait(self._dropped_record())
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on a backed-up disk; count what was lost instead
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            if self.dropped:
+                # Straight to the targets; the listener thread has stopped
+                self.listener.handle(self._dropped_record())
+                self.dropped = 0
+            self.listener = None
+        super().close()
+
+
+class CompressedRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """Rolls the file over at ``max_bytes`` or every ``interval`` seconds, whichever
+    comes first, gzipping the old file to ``<name>.<timestamp>.gz`` and keeping
+    the newest ``backup_count`` of those."""
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, interval=24 * 3600, backup_count=14,
+                 encoding='utf-8', delay=False):
+        super().__init__(filename, 'a', encoding=encoding, delay=delay)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        started = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = started + interval if interval else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            message = f'{self.format(record)}\n'
+            if self.stream.tell() + len(message) >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            destination = f'{self.baseFilename}.{stamp}.gz'
+            counter = 1
+            while os.path.exists(destination):
+                destination = f'{self.baseFilename}.{stamp}-{counter}.gz'
+                counter += 1
+            self.rotate(self.baseFilename, destination)
+            self._purge()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+        if not self.delay:
+            self.stream = self._open()
+
+    def rotate(self, source, dest):
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def _purge(self):
+        if self.backup_count <= 0:
+            return
+        backups = sorted(glob.glob(f'{glob.escape(self.baseFilename)}.*.gz'), key=os.path.getmtime)
+        for path in backups[:-self.backup_count]:
+            os.remove(path)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from crime_report import archive
+
+
+def _size(size):
+    if size is None:
+        return 'size unknown'
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+
+class Command(BaseCommand):
+    help = ('Move closed cases with no activity for ARCHIVE_AFTER_DAYS into the archive table, '
+            'with their evidence in the "archive" storage, and report how much the live tables shrank.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help=f'Days without activity (default: {settings.ARCHIVE_AFTER_DAYS})')
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+                            help=f'Cases per transaction (default: {settings.ARCHIVE_BATCH_SIZE})')
+        parser.add_argument('--limit', type=int, help='Archive at most this many cases')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the cases that would be archived')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archive.archivable(options['older_than']).count()
+            self.stdout.write(f"{count} case(s) would be archived")
+            return
+
+        before = archive.table_sizes()
+        archived = archive.archive_cases(
+            older_than=options['older_than'], batch_size=options['batch_size'], limit=options['limit'],
+            log=self.stdout.write,
+        )
+        after = archive.table_sizes()
+
+        for table, (rows, size) in before.items():
+            rows_after, size_after = after[table]
+            line = f'{table:<28} rows {rows} -> {rows_after}'
+            if rows:
+                line += f' (-{(rows - rows_after) / rows:.0%})'
+            line += f', {_size(size)} -> {_size(size_after)}'
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} case(s)'))
@@ -0,0 +1,226 @@
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+
+from crime_report import profiling
+from crime_report.models import CrimeReport, CrimeCategory
+from crime_report.synthetic import FIXTURES, generate_dataset
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the core CyberCell flows against a synthetic dataset in a throwaway '
+            'database and record latency percentiles and query counts as a JSON baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=10000,
+                            help='Synthetic reports to generate (default: 10000)')
+        parser.add_argument('--seed', type=int, default=42, help='Dataset seed (default: 42)')
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Timed requests per scenario (default: 20)')
+        parser.add_argument('--warmup', type=int, default=2,
+                            help='Untimed requests per scenario (default: 2)')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Only run this scenario (repeatable)')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Compare against a previous results file')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Regression threshold in percent for --compare (default: 10)')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if --compare finds a regression')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark database (and its dataset) between runs')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'], serialize=False
+        )
+        setup_test_environment()
+        try:
+            if not CrimeReport.objects.exists():
+                self.stdout.write(f"Generating dataset with {options['reports']} reports...")
+                started = time.perf_counter()
+                call_command('loaddata', *FIXTURES, verbosity=0)
+                generate_dataset(options['reports'], seed=options['seed'],
+                                 log=lambda message: self.stdout.write(f'  {message}'))
+                self.stdout.write(f'Dataset ready in {time.perf_counter() - started:.1f}s')
+            results = self._run(options)
+        finally:
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        failed = [name for name, row in results['scenarios'].items() if not 200 <= row['status'] < 400]
+        if failed:
+            # An error page is usually much faster than the page it replaces
+            raise CommandError(f"Scenario(s) answered with an error status, their timings are not "
+                               f"comparable: {', '.join(failed)}")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if baseline is not None:
+            regressions = self._compare(baseline, results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{regressions} scenario(s) regressed beyond {options['threshold']}%")
+
+    def _scenarios(self):
+        citizen = User.objects.filter(profile__user_type='citizen', reported_crimes__isnull=False).first()
+        officer = User.objects.filter(profile__user_type='police').first()
+        admin = User.objects.filter(profile__user_type='admin').first()
+        report = CrimeReport.objects.filter(reported_by=citizen).order_by('id').first()
+        category = CrimeCategory.objects.order_by('id').first()
+        today = datetime.date.today().isoformat()
+
+        def report_data():
+            return {
+                'title': 'Benchmark phishing report',
+                'description': 'Received a message asking to verify my account with a link.',
+                'date_of_crime': today,
+                'category': category.id,
+                'city': 'Mumbai',
+                'state': 'Maharashtra',
+                'area': 'Andheri',
+                'pincode': '400053',
+            }
+
+        # name: (user, method, path, data factory)
+        return {
+            'home': (None, 'get', '/', None),
+            'crime_list': (None, 'get', '/crimes/', None),
+            # Signed-out visitors are only listed resolved cases
+            'crime_list_filtered': (officer, 'get', f'/crimes/?status=pending&category={category.id}&page=2', None),
+            'crime_detail': (citizen, 'get', f'/crime/{report.id}/', None),
+            'report_crime': (citizen, 'post', '/report/', report_data),
+            'manage_reports': (admin, 'get', '/manage-reports/', None),
+            'admin_dashboard': (admin, 'get', '/dashboard/', None),
+            'crime_stats_api': (admin, 'get', '/api/crime-stats/', None),
+            # The zoom-4 tile covering western and southern India
+            'hotspot_tile': (admin, 'get', '/api/hotspots/4/11/6.geojson?days=365', None),
+            'api_reports': (admin, 'get', '/api/v1/reports/?expand=category,location&page_size=50', None),
+        }
+
+    def _run(self, options):
+        scenarios = self._scenarios()
+        selected = options['scenarios'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        results = {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'reports': CrimeReport.objects.count(),
+                'users': User.objects.count(),
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+            },
+            'scenarios': {},
+        }
+
+        # Template render time is taken from the profiling hooks
+        profiling.install_hooks()
+        # Repeated submissions would soon be throttled; the limiter has its own
+        # benchmark (benchmark_ratelimit)
+        with override_settings(RATELIMIT_ENABLED=False):
+            for name in selected:
+                user, method, path, data = scenarios[name]
+                client = Client()
+                if user is not None:
+                    client.force_login(user)
+                request = getattr(client, method)
+
+                for _ in range(options['warmup']):
+                    request(path, data()) if data else request(path)
+
+                latencies, queries, template_times = [], [], []
+                status_codes = set()
+                for _ in range(options['iterations']):
+                    with CaptureQueriesContext(connection) as captured:
+                        profile, token = profiling.start_profile()
+                        start = time.perf_counter()
+                        response = request(path, data()) if data else request(path)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        profiling.stop_profile(profile, token)
+                    queries.append(len(captured))
+                    template_times.append(profile.template_time * 1000)
+                    status_codes.add(response.status_code)
+
+                ordered = sorted(latencies)
+                results['scenarios'][name] = {
+                    'path': path,
+                    # The worst status answered, so one error fails the scenario
+                    'status': max(status_codes),
+                    'mean_ms': round(statistics.mean(ordered), 2),
+                    'p50_ms': round(_percentile(ordered, 50), 2),
+                    'p95_ms': round(_percentile(ordered, 95), 2),
+                    'p99_ms': round(_percentile(ordered, 99), 2),
+                    'max_ms': round(ordered[-1], 2),
+                    'template_p50_ms': round(_percentile(sorted(template_times), 50), 2),
+                    'queries': max(queries),
+                }
+                row = results['scenarios'][name]
+                line = (f"{name:<22} {row['status']}  p50={row['p50_ms']}ms  p95={row['p95_ms']}ms  "
+                        f"p99={row['p99_ms']}ms  template={row['template_p50_ms']}ms  queries={row['queries']}")
+                self.stdout.write(line if 200 <= row['status'] < 400 else self.style.ERROR(line))
+
+        return results
+
+    def _compare(self, baseline, results, threshold):
+        self.stdout.write(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} "
+                          f"({baseline['meta'].get('reports')} reports):")
+        regressions = 0
+        for name, row in results['scenarios'].items():
+            before = baseline['scenarios'].get(name)
+            if before is None:
+                self.stdout.write(f'{name:<22} (new scenario)')
+                continue
+            change = ((row['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100) if before['p50_ms'] else 0.0
+            query_change = row['queries'] - before['queries']
+            line = (f"{name:<22} p50 {before['p50_ms']} -> {row['p50_ms']}ms ({change:+.1f}%)  "
+                    f"queries {before['queries']} -> {row['queries']} ({query_change:+d})")
+            if change > threshold or query_change > 0:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        return regressions
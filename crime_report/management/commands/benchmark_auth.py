@@ -0,0 +1,147 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+PASSWORD = 'Benchmark-password-42'
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+
+def _available_profiles():
+    profiles = list(settings.PASSWORD_HASHER_PROFILES)
+    if argon2 is None:
+        profiles.remove('argon2')
+    return profiles
+
+
+def _hashers_for(profile):
+    preferred = settings.PASSWORD_HASHER_PROFILES[profile]
+    return [preferred, *(path for path in settings.PASSWORD_HASHERS if path != preferred)]
+
+
+class Command(BaseCommand):
+    help = ('Time password hashing and the login and registration flows at increasing concurrency '
+            'for each password hasher profile (PASSWORD_HASHER_PROFILES), in a throwaway database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help='Only this hasher profile (repeatable, default: all available)')
+        parser.add_argument('--concurrency', default='1,4,16',
+                            help='Comma-separated concurrency levels (default: 1,4,16)')
+        parser.add_argument('--requests', type=int, default=40,
+                            help='Requests per flow and concurrency level (default: 40)')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        available = _available_profiles()
+        profiles = options['profiles'] or available
+        unknown = set(profiles) - set(available)
+        if unknown:
+            raise CommandError(f"Unknown or unavailable profile(s): {', '.join(sorted(unknown))}")
+        levels = [int(level) for level in options['concurrency'].split(',')]
+
+        # A file rather than SQLite's shared in-memory database, whose table locks
+        # fail concurrent writers instead of making them wait
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_name = test_settings.get('NAME')
+        if connection.vendor == 'sqlite' and not test_name:
+            test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'cybercell_benchmark_auth.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        setup_test_environment()
+        results = []
+        try:
+            # Repeated logins from one address would soon be throttled
+            with override_settings(RATELIMIT_ENABLED=False, ALLOWED_HOSTS=['testserver']):
+                for profile in profiles:
+                    with override_settings(PASSWORD_HASHERS=_hashers_for(profile)):
+                        results.append(self._time_hasher(profile))
+                        for concurrency in levels:
+                            results.append(self._run(profile, 'login', concurrency, options['requests']))
+                            results.append(self._run(profile, 'register', concurrency, options['requests']))
+        finally:
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = test_name
+
+        if options['json_output']:
+            with open(options['json_output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_output']}"))
+
+    def _time_hasher(self, profile):
+        hasher = get_hasher()
+        encoded = make_password(PASSWORD)
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            hasher.verify(PASSWORD, encoded)
+            timings.append((time.perf_counter() - start) * 1000)
+        result = {'profile': profile, 'flow': 'hash', 'algorithm': hasher.algorithm,
+                  'p50_ms': round(statistics.median(timings), 2)}
+        self.stdout.write(f"{profile:<7} {hasher.algorithm} hash: {result['p50_ms']}ms")
+        return result
+
+    def _run(self, profile, flow, concurrency, total):
+        prefix = f'bench_{profile}_{flow}_{concurrency}_'
+        if flow == 'login':
+            # Every account shares one hash; the cost of checking it is the same
+            encoded = make_password(PASSWORD)
+            User.objects.bulk_create([User(username=f'{prefix}{i}', password=encoded) for i in range(total)])
+
+        def request(i):
+            client = Client(raise_request_exception=False)
+            start = time.perf_counter()
+            if flow == 'login':
+                response = client.post('/login/', {'username': f'{prefix}{i}', 'password': PASSWORD})
+            else:
+                response = client.post('/register/', {
+                    'username': f'{prefix}{i}', 'email': f'{prefix}{i}@example.com',
+                    'first_name': 'Bench', 'last_name': 'Mark',
+                    'password1': PASSWORD, 'password2': PASSWORD,
+                })
+            latency = time.perf_counter() - start
+            # Each pool thread would otherwise keep its own connection open
+            connection.close()
+            return latency, response.status_code != 302
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(request, range(total)))
+        elapsed = time.perf_counter() - started
+
+        ordered = sorted(latency * 1000 for latency, _ in outcomes)
+        result = {
+            'profile': profile,
+            'flow': flow,
+            'concurrency': concurrency,
+            'requests': total,
+            'errors': sum(error for _, error in outcomes),
+            'throughput': round(total / elapsed, 1),
+            'p50_ms': round(_percentile(ordered, 50), 2),
+            'p95_ms': round(_percentile(ordered, 95), 2),
+            'p99_ms': round(_percentile(ordered, 99), 2),
+        }
+        self.stdout.write(
+            f"{profile:<7} {flow:<9} c={concurrency:<4} {result['throughput']:>7} req/s  "
+            f"p50={result['p50_ms']}ms  p95={result['p95_ms']}ms  p99={result['p99_ms']}ms  "
+            f"errors={result['errors']}"
+        )
+        return result
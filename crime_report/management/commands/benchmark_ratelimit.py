@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from crime_report.models import RateLimitBucket
+from crime_report.ratelimit import ratelimit
+
+
+def _view(request):
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = ('Measure the per-request overhead of the rate limiter (crime_report.ratelimit) '
+            'against the configured database, in microseconds.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000,
+                            help='Requests per case (default: 20000)')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        user = User(pk=1, username='benchmark')
+        # A budget that never runs out, one that is always exhausted, and a
+        # scope that does not count GET requests
+        scopes = {
+            'rl_bench_open': {'methods': ('POST',), 'user': (10 ** 9, 1), 'ip': (10 ** 9, 1)},
+            'rl_bench_closed': {'methods': ('POST',), 'ip': (1, 3600)},
+            'rl_bench_skipped': {'methods': ('POST',), 'ip': (1, 3600)},
+        }
+        cases = [
+            ('no limiter', _view, 'post', user),
+            ('allowed (user + ip)', ratelimit('rl_bench_open')(_view), 'post', user),
+            ('allowed (ip, anonymous)', ratelimit('rl_bench_open')(_view), 'post', AnonymousUser()),
+            ('rejected (429)', ratelimit('rl_bench_closed')(_view), 'post', AnonymousUser()),
+            ('method not counted', ratelimit('rl_bench_skipped')(_view), 'get', AnonymousUser()),
+        ]
+
+        self.stdout.write(f"Database: {settings.DATABASES['default']['ENGINE']}, "
+                          f"{iterations} requests per case")
+        with override_settings(RATELIMITS={**settings.RATELIMITS, **scopes}, RATELIMIT_ENABLED=True):
+            RateLimitBucket.objects.filter(key__startswith='rl:rl_bench_').delete()
+            baseline = None
+            for name, view, method, request_user in cases:
+                # An API path, so rejections are answered with JSON rather than a page
+                request = getattr(factory, method)('/api/benchmark/')
+                request.user = request_user
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter_ns()
+                    response = view(request)
+                    timings.append(time.perf_counter_ns() - start)
+                timings.sort()
+                p50 = timings[len(timings) // 2] / 1000
+                p99 = timings[min(len(timings) - 1, len(timings) * 99 // 100)] / 1000
+                mean = statistics.mean(timings) / 1000
+                if baseline is None:
+                    baseline = p50
+                self.stdout.write(
+                    f'{name:<26} {response.status_code}  p50={p50:.1f}us  p99={p99:.1f}us  mean={mean:.1f}us  '
+                    f'overhead={p50 - baseline:+.1f}us'
+                )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from crime_report import detection, iocs
+from crime_report.models import CrimeReport, CrimeUpdate
+
+
+class Command(BaseCommand):
+    help = ('Build the duplicate-detection fingerprints and the indicator index for existing reports '
+            'and case updates. Reports and updates are indexed when saved.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Reindex every report and update, not only reports without a fingerprint '
+                                 '(needed after changing the DETECTION_* settings or crime_report.iocs)')
+
+    def handle(self, *args, **options):
+        reports = CrimeReport.objects.order_by('id')
+        if not options['all']:
+            reports = reports.filter(fingerprint__isnull=True)
+        # Ids first: indexing writes to the tables the filter reads
+        report_ids = list(reports.values_list('id', flat=True))
+
+        for start in range(0, len(report_ids), 1000):
+            batch = CrimeReport.objects.filter(id__in=report_ids[start:start + 1000]).only('id', 'title', 'description')
+            for report in batch:
+                detection.index_report(report)
+                iocs.index_report(report)
+            self.stdout.write(f'Indexed {min(start + 1000, len(report_ids))}/{len(report_ids)} reports')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(report_ids)} report(s)'))
+
+        if options['all']:
+            updates = CrimeUpdate.objects.all()
+        else:
+            updates = CrimeUpdate.objects.filter(crime_report_id__in=report_ids)
+        update_ids = list(updates.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(update_ids), 1000):
+            batch = CrimeUpdate.objects.filter(id__in=update_ids[start:start + 1000]).only('id', 'crime_report_id', 'update_text')
+            for update in batch:
+                iocs.index_update(update)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(update_ids)} update(s)'))
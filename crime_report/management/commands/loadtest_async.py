@@ -0,0 +1,149 @@
+import asyncio
+import importlib
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, AsyncClient
+from django.urls import clear_url_caches
+
+DEFAULT_PATHS = ['/', '/crimes/', '/dashboard/', '/api/crime-stats/']
+
+
+def _use_async_views(enabled):
+    """Re-route the read-heavy pages to their sync or async variants."""
+    settings.USE_ASYNC_VIEWS = enabled
+    importlib.reload(importlib.import_module('crime_report.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def _summarize(mode, path, concurrency, latencies, errors, elapsed):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+    return {
+        'mode': mode,
+        'path': path,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.mean(ordered) * 1000, 2) if ordered else 0.0,
+        'p50_ms': round(percentile(50), 2),
+        'p95_ms': round(percentile(95), 2),
+        'p99_ms': round(percentile(99), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Compare latency and throughput of the sync views through the WSGI handler '
+            'with the async views through the ASGI handler at increasing concurrency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True,
+                            help='Police or admin user the requests are made as')
+        parser.add_argument('--concurrency', default='1,4,16,32',
+                            help='Comma-separated concurrency levels (default: 1,4,16,32)')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Requests per path and concurrency level (default: 100)')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help=f'Path to load (repeatable, default: {" ".join(DEFAULT_PATHS)})')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        paths = options['paths'] or DEFAULT_PATHS
+        total = options['requests']
+
+        login_client = Client()
+        login_client.force_login(user)
+        cookies = {key: morsel.value for key, morsel in login_client.cookies.items()}
+
+        results = []
+        use_async_views = settings.USE_ASYNC_VIEWS
+        allowed_hosts = settings.ALLOWED_HOSTS
+        ratelimit_enabled = settings.RATELIMIT_ENABLED
+        # The in-process test clients always send Host: testserver
+        settings.ALLOWED_HOSTS = [*allowed_hosts, 'testserver']
+        # Every request comes from one user and address, which the stats API would throttle
+        settings.RATELIMIT_ENABLED = False
+        try:
+            for path in paths:
+                for concurrency in levels:
+                    _use_async_views(False)
+                    results.append(self._run_wsgi(path, concurrency, total, cookies))
+                    _use_async_views(True)
+                    results.append(asyncio.run(self._run_asgi(path, concurrency, total, cookies)))
+                    for result in results[-2:]:
+                        self._print_result(result)
+        finally:
+            _use_async_views(use_async_views)
+            settings.ALLOWED_HOSTS = allowed_hosts
+            settings.RATELIMIT_ENABLED = ratelimit_enabled
+
+        if options['json_output']:
+            with open(options['json_output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_output']}"))
+
+    def _run_wsgi(self, path, concurrency, total, cookies):
+        def worker(count):
+            client = Client(raise_request_exception=False)
+            client.cookies.load(cookies)
+            latencies, errors = [], 0
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.get(path)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+            outcomes = list(pool.map(worker, shares))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for outcome in outcomes for latency in outcome[0]]
+        return _summarize('wsgi', path, concurrency, latencies, sum(o[1] for o in outcomes), elapsed)
+
+    async def _run_asgi(self, path, concurrency, total, cookies):
+        async def worker(count):
+            client = AsyncClient(raise_request_exception=False)
+            client.cookies.load(cookies)
+            latencies, errors = [], 0
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+            return latencies, errors
+
+        started = time.perf_counter()
+        shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        outcomes = await asyncio.gather(*(worker(share) for share in shares))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for outcome in outcomes for latency in outcome[0]]
+        return _summarize('asgi', path, concurrency, latencies, sum(o[1] for o in outcomes), elapsed)
+
+    def _print_result(self, result):
+        self.stdout.write(
+            f"{result['mode']:<5} {result['path']:<20} c={result['concurrency']:<4} "
+            f"{result['throughput']:>8} req/s  p50={result['p50_ms']}ms  "
+            f"p95={result['p95_ms']}ms  p99={result['p99_ms']}ms  errors={result['errors']}"
+        )
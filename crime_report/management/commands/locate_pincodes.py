@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from crime_report.geo import locate_pincode
+from crime_report.models import DataVersion, Pincode
+from crime_report.http_cache import CRIME_DATA
+
+
+class Command(BaseCommand):
+    help = ('Set pincode coordinates from PINCODE_CENTROIDS_FILE. New pincodes are located '
+            'when saved; run this after replacing the dataset.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true',
+                            help='Also update pincodes that already have coordinates')
+
+    def handle(self, *args, **options):
+        pincodes = Pincode.objects.all()
+        if not options['refresh']:
+            pincodes = pincodes.filter(latitude__isnull=True)
+
+        located, unplaced = [], []
+        by_district = 0
+        for pincode in pincodes.iterator(chunk_size=2000):
+            centroid, precision = locate_pincode(pincode.code)
+            if centroid is None:
+                unplaced.append(pincode.code)
+                continue
+            by_district += precision == 'district'
+            pincode.latitude, pincode.longitude = centroid
+            located.append(pincode)
+        # bulk_update skips post_save, so invalidate the cached hotspots here
+        Pincode.objects.bulk_update(located, ['latitude', 'longitude'], batch_size=1000)
+        if located:
+            DataVersion.bump(CRIME_DATA)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Located {len(located)} pincode(s), {by_district} of them only at their sorting district'
+        ))
+        if unplaced:
+            # The bundled dataset is a sample; most pincodes need a complete one
+            examples = ', '.join(sorted(unplaced)[:10])
+            self.stdout.write(self.style.WARNING(
+                f'Could not place {len(unplaced)} pincode(s), e.g. {examples}: neither they nor their '
+                f'sorting district are in {settings.PINCODE_CENTROIDS_FILE}'
+            ))
@@ -0,0 +1,54 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from crime_report import priority
+from crime_report.notifications import process_batch
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Send the queued case update emails (crime_report.notifications): claims due notifications '
+            'in batches and sends each batch over one mail connection, retrying failures with backoff. '
+            'Also rescores the cases linked to reports whose text changed (crime_report.priority).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send everything due now and exit instead of polling')
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_BATCH_SIZE,
+                            help=f'Notifications per batch (default: {settings.NOTIFICATION_BATCH_SIZE})')
+        parser.add_argument('--interval', type=float, default=settings.NOTIFICATION_POLL_INTERVAL,
+                            help=f'Seconds between polls when the queue is empty '
+                                 f'(default: {settings.NOTIFICATION_POLL_INTERVAL})')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total_sent = 0
+        try:
+            while True:
+                try:
+                    claimed, sent = process_batch(batch_size)
+                    queued, rescored = priority.process_linked_rescores()
+                except Exception as e:
+                    # A database hiccup should not stop the worker; try again next poll
+                    logger.error(f"Worker batch failed: {e}")
+                    claimed = sent = queued = rescored = 0
+                    if options['once']:
+                        raise
+                total_sent += sent
+                if claimed:
+                    self.stdout.write(f'Sent {sent} of {claimed} notification(s)')
+                if queued:
+                    self.stdout.write(f'Rescored {rescored} case(s) linked to {queued} changed report(s)')
+                # A full batch means more are probably due
+                if claimed == batch_size or queued == settings.PRIORITY_RESCORE_BATCH_SIZE:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} notification(s)'))
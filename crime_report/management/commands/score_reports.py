@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from crime_report import priority
+
+
+class Command(BaseCommand):
+    help = ('Recompute the priority of every open case. Cases are rescored when they change; '
+            'run this hourly (cron) so age, time since the last update and category severity '
+            'changes are reflected too.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scored = priority.rescore_open(log=lambda message: self.stdout.write(f'  {message}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {scored} case(s) in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,90 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from crime_report import counters, inbox, search
+from crime_report.http_cache import CRIME_DATA, USER_DATA
+from crime_report.models import DataVersion
+from crime_report.synthetic import STATUS_WEIGHTS, ensure_categories, generate_dataset
+
+
+def _weights(value):
+    """Parses "name=weight,name=weight" into a dict."""
+    weights = {}
+    for item in value.split(','):
+        name, sep, weight = item.rpartition('=')
+        try:
+            weights[name.strip()] = float(weight)
+        except ValueError:
+            sep = ''
+        if not sep or not name.strip():
+            raise CommandError(f'Expected name=weight, got "{item}"')
+    return weights
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with a deterministic synthetic dataset (crime_report.synthetic): users with '
+            'profiles, locations, reports and case updates, bulk-inserted without per-row signals.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=100000, help='Reports to create (default: 100000)')
+        parser.add_argument('--users', type=int, help='Citizens to create (default: reports / 10)')
+        parser.add_argument('--officers', type=int, help='Police officers to create (default: users / 100)')
+        parser.add_argument('--updates-per-report', type=int, default=2,
+                            help='Average updates per non-pending report (default: 2)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; it also prefixes the usernames, so use a new one per run (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert batch (default: 5000)')
+        parser.add_argument('--status', type=_weights,
+                            help='Status weights, e.g. "pending=40,investigating=30,resolved=20,closed=10"')
+        parser.add_argument('--category', type=_weights,
+                            help='Category weights by name, e.g. "Phishing=3,Online Fraud=2" (default: uniform)')
+        parser.add_argument('--city', type=_weights,
+                            help='City weights by name, e.g. "Mumbai=3,Delhi=2" (default: uniform)')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=f"synth{options['seed']}_").exists():
+            raise CommandError(f"This database already has the dataset for seed {options['seed']}; "
+                               f"pass another --seed")
+        # SQLite cannot change it inside a transaction (call_command from one)
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                # A crash mid-seed only loses synthetic rows, so skip waiting for fsync
+                cursor.execute('PRAGMA synchronous = OFF')
+
+        ensure_categories()
+        # Index the report and update text in one pass at the end, not row by row
+        search.drop_triggers()
+        started = time.perf_counter()
+        try:
+            counts = generate_dataset(
+                options['reports'],
+                users=options['users'],
+                officers=options['officers'],
+                updates_per_report=options['updates_per_report'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                status_weights=options['status'] or STATUS_WEIGHTS,
+                category_weights=options['category'],
+                city_weights=options['city'],
+                log=lambda message: self.stdout.write(f'  {message}'),
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        finally:
+            search.install()
+        elapsed = time.perf_counter() - started
+
+        # Nothing went through the signals that keep the inboxes, counters and cached pages current
+        inbox.rebuild()
+        counters.rebuild()
+        DataVersion.bump(CRIME_DATA)
+        DataVersion.bump(USER_DATA)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['users']} users, {counts['reports']} reports and {counts['updates']} updates "
+            f"in {elapsed:.1f}s ({counts['reports'] / elapsed:.0f} reports/s)"
+        ))
+        self.stdout.write('Run "python manage.py index_reports" to build the duplicate and indicator indexes, '
+                          'then "python manage.py score_reports" to rank the open cases.')
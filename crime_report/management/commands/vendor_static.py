@@ -0,0 +1,43 @@
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from crime_report.storage import SOURCE_MAP_RE
+
+
+class Command(BaseCommand):
+    help = ('Download the pinned third-party browser libraries in STATIC_VENDOR_ASSETS into '
+            'static/, so the site and collectstatic work without internet access.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Download again even if a file is already vendored')
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help='Per-download timeout in seconds (default: 30)')
+
+    def handle(self, *args, **options):
+        target = Path(settings.STATICFILES_DIRS[0])
+        failures = 0
+        for name, url in settings.STATIC_VENDOR_ASSETS.items():
+            path = target / name
+            if path.exists() and not options['force']:
+                self.stdout.write(f'{name} already vendored')
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=options['timeout']) as response:
+                    content = response.read()
+            except OSError as e:
+                failures += 1
+                self.stderr.write(self.style.ERROR(f'{name}: cannot download {url}: {e}'))
+                continue
+            if name.endswith(('.css', '.js')):
+                # The .map files are not vendored, and collectstatic rejects missing references
+                content = SOURCE_MAP_RE.sub(b'', content)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            self.stdout.write(self.style.SUCCESS(f'{name} ({len(content)} bytes)'))
+
+        if failures:
+            raise CommandError(f'{failures} file(s) could not be downloaded')
@@ -1,13 +1,44 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import HttpResponseForbidden
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+import logging
+import random
 import re
 import time
+import uuid
 
-class SecurityMiddleware:
+from . import log, profiling
+
+profiling_logger = logging.getLogger('crime_report.profiling')
+
+REQUEST_ID_RE = re.compile(r'[A-Za-z0-9._-]{8,64}')
+
+class AsyncCapableMiddleware:
+    """Base for middleware that runs in either mode, like Django's own, so the
+    async views are not adapted back to sync (one thread hop per middleware)
+    under ASGI. Subclasses implement ``__call__`` and ``__acall__``."""
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
-        
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+class SecurityMiddleware(AsyncCapableMiddleware):
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self._reject(request) or self.get_response(request)
+        return self._add_headers(response)
+    
+    async def __acall__(self, request):
+        # The body is already read under ASGI, so parsing it does no I/O
+        response = self._reject(request) or await self.get_response(request)
+        return self._add_headers(response)
+    
+    def _reject(self, request):
         # Check for suspicious SQL injection patterns
         if self._has_sql_injection(request):
             return HttpResponseForbidden('Forbidden')
@@ -21,9 +52,9 @@ class SecurityMiddleware:
             for uploaded_file in request.FILES.values():
                 if uploaded_file.size > settings.MAX_UPLOAD_SIZE:
                     return HttpResponseForbidden('File too large')
-        
-        response = self.get_response(request)
-        
+        return None
+    
+    def _add_headers(self, response):
         # Add security headers
         response['X-Content-Type-Options'] = 'nosniff'
         response['X-Frame-Options'] = 'DENY'
@@ -57,11 +88,19 @@ class SecurityMiddleware:
             return True
         return False
 
-class SessionSecurityMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-    
+class SessionSecurityMiddleware(AsyncCapableMiddleware):
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._touch_session(request)
+        return self.get_response(request)
+    
+    async def __acall__(self, request):
+        # Resolving request.user and saving the session hit the database
+        await sync_to_async(self._touch_session)(request)
+        return await self.get_response(request)
+    
+    def _touch_session(self, request):
         if request.user.is_authenticated:
             # Check if session has expired
             if 'last_activity' in request.session:
@@ -72,6 +111,98 @@ class SessionSecurityMiddleware:
             
             # Update last activity time
             request.session['last_activity'] = time.time()
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """Opt-in per-view timing: wall time, SQL count/time, template time and cache hits.
+    
+    Enabled with PROFILING_ENABLED; a PROFILING_SAMPLE_RATE fraction of requests
+    is recorded into per-URL-name rolling windows, summarized by the
+    profiling_stats endpoint and logged every PROFILING_LOG_INTERVAL seconds.
+    """
+    store = profiling.ProfileStore(getattr(settings, 'PROFILING_WINDOW', 1000))
+    
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.log_interval = settings.PROFILING_LOG_INTERVAL
+        self.last_logged = time.monotonic()
+        profiling.install_hooks()
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+        
+        profile, token = profiling.start_profile()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.stop_profile(profile, token)
+        self._record(request, profile)
+        return response
+    
+    async def __acall__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        
+        # The profile is a context variable, which the view's worker threads inherit
+        profile, token = profiling.start_profile()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.stop_profile(profile, token)
+        self._record(request, profile)
+        return response
+    
+    def _record(self, request, profile):
+        match = getattr(request, 'resolver_match', None)
+        self.store.add(match.view_name if match else 'unresolved', profile)
         
-        response = self.get_response(request)
-        return response
\ No newline at end of file
+        if self.log_interval and time.monotonic() - self.last_logged >= self.log_interval:
+            self.last_logged = time.monotonic()
+            self._log_summary()
+    
+    def _log_summary(self):
+        for view_name, stats in self.store.summary().items():
+            profiling_logger.info(
+                f"{view_name}: {stats['requests']} req, "
+                f"p50={stats['wall_ms']['p50']}ms p95={stats['wall_ms']['p95']}ms, "
+                f"{stats['sql_queries_mean']} queries/{stats['sql_ms_mean']}ms SQL, "
+                f"{stats['template_ms_mean']}ms templates, cache hit ratio {stats['cache_hit_ratio']}"
+            )
+
+class RequestIdMiddleware(AsyncCapableMiddleware):
+    """Tags every log record of a request with its ID (a well-formed incoming
+    X-Request-ID header, or a new one) and returns it in X-Request-ID."""
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_id = self._request_id(request)
+        token = log.set_request_id(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            log.reset_request_id(token)
+        response['X-Request-ID'] = request_id
+        return response
+    
+    async def __acall__(self, request):
+        request_id = self._request_id(request)
+        token = log.set_request_id(request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            log.reset_request_id(token)
+        response['X-Request-ID'] = request_id
+        return response
+    
+    def _request_id(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_RE.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return request_id
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0002_alter_crimecategory_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:00
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0003_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='State',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cities', to='crime_report.state')),
+            ],
+            options={
+                'verbose_name_plural': 'Cities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Area',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='areas', to='crime_report.city')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Pincode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True, validators=[django.core.validators.RegexValidator(message='Pincode must be 6 digits', regex='^\\d{6}$')])),
+            ],
+            options={
+                'ordering': ['code'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='state',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='unique_state_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('state'), name='unique_city_name_per_state'),
+        ),
+        migrations.AddConstraint(
+            model_name='area',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('city'), name='unique_area_name_per_city'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='location',
+            unique_together=set(),
+        ),
+        migrations.AlterModelOptions(
+            name='location',
+            options={},
+        ),
+        # Filled in by 0005 and renamed over the free-text columns by 0006
+        migrations.AddField(
+            model_name='location',
+            name='area_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='locations', to='crime_report.area'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='city_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='locations', to='crime_report.city'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='pincode_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='locations', to='crime_report.pincode'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def normalize_place_name(value):
+    # Frozen copy of crime_report.models.normalize_place_name
+    value = ' '.join(value.split())
+    if value.islower():
+        value = value.title()
+    return value
+
+
+def normalize_locations(apps, schema_editor):
+    """Point every Location at State/City/Area/Pincode rows, matching names
+    case-insensitively, then merge Locations that end up identical."""
+    State = apps.get_model('crime_report', 'State')
+    City = apps.get_model('crime_report', 'City')
+    Area = apps.get_model('crime_report', 'Area')
+    Pincode = apps.get_model('crime_report', 'Pincode')
+    Location = apps.get_model('crime_report', 'Location')
+    CrimeReport = apps.get_model('crime_report', 'CrimeReport')
+
+    states, cities, areas, pincodes = {}, {}, {}, {}
+    merged = defaultdict(list)
+    for location in Location.objects.order_by('id'):
+        state_name = normalize_place_name(location.state)
+        state = states.get(state_name.lower())
+        if state is None:
+            state = states[state_name.lower()] = State.objects.create(name=state_name)
+
+        city_name = normalize_place_name(location.city)
+        city = cities.get((state.id, city_name.lower()))
+        if city is None:
+            city = cities[(state.id, city_name.lower())] = City.objects.create(state=state, name=city_name)
+
+        area_name = normalize_place_name(location.area)
+        area = areas.get((city.id, area_name.lower()))
+        if area is None:
+            area = areas[(city.id, area_name.lower())] = Area.objects.create(city=city, name=area_name)
+
+        code = location.pincode.strip()
+        pincode = pincodes.get(code)
+        if pincode is None:
+            pincode = pincodes[code] = Pincode.objects.create(code=code)
+
+        merged[(area.id, pincode.id)].append(location.id)
+        location.area_ref, location.city_ref, location.pincode_ref = area, city, pincode
+        location.save(update_fields=['area_ref', 'city_ref', 'pincode_ref'])
+
+    for location_ids in merged.values():
+        keep, duplicates = location_ids[0], location_ids[1:]
+        if duplicates:
+            CrimeReport.objects.filter(location_id__in=duplicates).update(location_id=keep)
+            Location.objects.filter(id__in=duplicates).delete()
+
+
+def restore_location_names(apps, schema_editor):
+    Location = apps.get_model('crime_report', 'Location')
+    for location in Location.objects.select_related('area_ref', 'city_ref__state', 'pincode_ref'):
+        location.area = location.area_ref.name
+        location.city = location.city_ref.name
+        location.state = location.city_ref.state.name
+        location.pincode = location.pincode_ref.code
+        location.save(update_fields=['area', 'city', 'state', 'pincode'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0004_state_city_area_pincode'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_locations, restore_location_names),
+    ]
@@ -0,0 +1,84 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0005_deduplicate_locations'),
+    ]
+
+    operations = [
+        # Defaults only so that unapplying can add the columns back before
+        # 0005 fills them in again
+        migrations.AlterField(
+            model_name='location',
+            name='area',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='city',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='state',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='pincode',
+            field=models.CharField(default='', max_length=10),
+        ),
+        migrations.RemoveField(
+            model_name='location',
+            name='area',
+        ),
+        migrations.RemoveField(
+            model_name='location',
+            name='city',
+        ),
+        migrations.RemoveField(
+            model_name='location',
+            name='state',
+        ),
+        migrations.RemoveField(
+            model_name='location',
+            name='pincode',
+        ),
+        migrations.RenameField(
+            model_name='location',
+            old_name='area_ref',
+            new_name='area',
+        ),
+        migrations.RenameField(
+            model_name='location',
+            old_name='city_ref',
+            new_name='city',
+        ),
+        migrations.RenameField(
+            model_name='location',
+            old_name='pincode_ref',
+            new_name='pincode',
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='area',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='locations', to='crime_report.area'),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='city',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='locations', to='crime_report.city'),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='pincode',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='locations', to='crime_report.pincode'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='location',
+            unique_together={('area', 'pincode')},
+        ),
+    ]
@@ -0,0 +1,42 @@
+import csv
+from pathlib import Path
+
+from django.db import migrations, models
+
+CENTROIDS_FILE = Path(__file__).resolve().parent.parent / 'data' / 'pincode_centroids.csv'
+
+
+def locate_pincodes(apps, schema_editor):
+    """Fill in coordinates for existing pincodes from the bundled dataset."""
+    Pincode = apps.get_model('crime_report', 'Pincode')
+    with open(CENTROIDS_FILE, newline='', encoding='utf-8') as f:
+        centroids = {row['pincode']: (float(row['latitude']), float(row['longitude'])) for row in csv.DictReader(f)}
+
+    located = []
+    for pincode in Pincode.objects.all():
+        centroid = centroids.get(pincode.code) or centroids.get(pincode.code[:3])
+        if centroid:
+            pincode.latitude, pincode.longitude = centroid
+            located.append(pincode)
+    Pincode.objects.bulk_update(located, ['latitude', 'longitude'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0006_location_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pincode',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pincode',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(locate_pincodes, migrations.RunPython.noop),
+    ]
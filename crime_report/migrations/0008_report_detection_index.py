@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0007_pincode_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportFingerprint',
+            fields=[
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='crime_report.crimereport')),
+                ('signature', models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReportBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='crime_report.crimereport')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReportIndicator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('phone', 'Phone number'), ('url', 'URL'), ('upi', 'UPI ID'), ('email', 'Email address')], max_length=10)),
+                ('value', models.CharField(max_length=255)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indicators', to='crime_report.crimereport')),
+            ],
+            options={
+                'ordering': ['kind', 'value'],
+                'indexes': [models.Index(fields=['kind', 'value'], name='indicator_lookup_idx')],
+                'unique_together': {('report', 'kind', 'value')},
+            },
+        ),
+    ]
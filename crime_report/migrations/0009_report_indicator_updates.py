@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def drop_update_indicators(apps, schema_editor):
+    # Update rows can repeat a report's (kind, value), which the restored
+    # unique_together forbids; `manage.py index_reports --all` rebuilds them
+    ReportIndicator = apps.get_model('crime_report', 'ReportIndicator')
+    ReportIndicator.objects.filter(update__isnull=False).delete()
+    ReportIndicator.objects.exclude(kind__in=['phone', 'url', 'upi', 'email']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0008_report_detection_index'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='reportindicator',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='reportindicator',
+            name='update',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='indicators', to='crime_report.crimeupdate'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, drop_update_indicators),
+        migrations.AlterField(
+            model_name='reportindicator',
+            name='kind',
+            field=models.CharField(choices=[('phone', 'Phone number'), ('url', 'URL'), ('domain', 'Domain'), ('ip', 'IP address'), ('upi', 'UPI ID'), ('email', 'Email address'), ('crypto', 'Crypto wallet')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:26
+
+import crime_report.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('crime_report', '0010_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReport',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('date_of_crime', models.DateField()),
+                ('time_of_crime', models.TimeField(blank=True, null=True)),
+                ('reported_on', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('investigating', 'Under Investigation'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('evidence_file', models.FileField(blank=True, null=True, storage=crime_report.models.archive_storage, upload_to='evidence/')),
+                ('updates', models.JSONField(default=list)),
+                ('indicators', models.JSONField(default=list)),
+                ('last_activity', models.DateTimeField()),
+                ('archived_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_assigned_reports', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reports', to='crime_report.crimecategory')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reports', to='crime_report.location')),
+                ('reported_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-reported_on'],
+                'indexes': [models.Index(fields=['reported_on'], name='archived_report_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncMonth
+
+
+def count_users(apps, schema_editor):
+    """Fills the counters for existing users; frozen copy of crime_report.counters.rebuild."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    CrimeReport = apps.get_model('crime_report', 'CrimeReport')
+    UserStats = apps.get_model('crime_report', 'UserStats')
+    SignupMonth = apps.get_model('crime_report', 'SignupMonth')
+
+    reports = CrimeReport.objects.order_by()
+    filed = {
+        user_id: (count, latest)
+        for user_id, count, latest in reports.values_list('reported_by').annotate(Count('id'), Max('reported_on'))
+    }
+    cases = {
+        user_id: counts
+        for user_id, *counts in reports.exclude(assigned_to=None).values_list('assigned_to').annotate(
+            assigned=Count('id'),
+            open=Count('id', filter=Q(status__in=['pending', 'investigating'])),
+            resolved=Count('id', filter=Q(status='resolved')),
+        )
+    }
+    rows = []
+    for user_id in User.objects.order_by('id').values_list('id', flat=True):
+        reports_filed, last_report_on = filed.get(user_id, (0, None))
+        cases_assigned, cases_open, cases_resolved = cases.get(user_id, (0, 0, 0))
+        rows.append(UserStats(
+            user_id=user_id,
+            reports_filed=reports_filed,
+            last_report_on=last_report_on,
+            cases_assigned=cases_assigned,
+            cases_open=cases_open,
+            cases_resolved=cases_resolved,
+        ))
+    UserStats.objects.bulk_create(rows, batch_size=500)
+
+    months = (
+        User.objects.annotate(month=TruncMonth('date_joined', output_field=models.DateField()))
+        .order_by().values_list('month').annotate(Count('id'))
+    )
+    SignupMonth.objects.bulk_create([SignupMonth(month=month, count=count) for month, count in months])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('crime_report', '0011_archivedreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignupMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('reports_filed', models.IntegerField(default=0)),
+                ('last_report_on', models.DateTimeField(blank=True, null=True)),
+                ('cases_assigned', models.IntegerField(default=0)),
+                ('cases_open', models.IntegerField(default=0)),
+                ('cases_resolved', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'user stats',
+                'indexes': [models.Index(fields=['-reports_filed'], name='userstats_top_reporters_idx')],
+            },
+        ),
+        migrations.RunPython(count_users, migrations.RunPython.noop),
+    ]
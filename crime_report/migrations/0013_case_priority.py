@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:40
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Frozen copy of crime_report.priority.extract_amount
+_NUMBER = r'\d[\d,]*(?:\.\d+)?'
+_UNIT = r'(?:\s*(?P<{}>lakhs?|lacs?|crores?|cr|k)\b)?'
+AMOUNT_RE = re.compile(
+    rf'(?:₹|\brs\.?|\binr\b)\s*(?P<prefixed>{_NUMBER}){_UNIT.format("prefixed_unit")}'
+    rf'|\b(?P<suffixed>{_NUMBER}){_UNIT.format("suffixed_unit")}\s*(?:rupees|rs\b|inr\b)',
+    re.IGNORECASE,
+)
+UNITS = {'k': 1_000, 'lakh': 100_000, 'lac': 100_000, 'crore': 10_000_000, 'cr': 10_000_000}
+MAX_AMOUNT = Decimal('999999999999.99')
+SEVERITIES = {'Ransomware': 5, 'Online Fraud': 5, 'Identity Theft': 4, 'Data Breach': 4}
+
+
+def extract_amount(text):
+    amounts = []
+    for match in AMOUNT_RE.finditer(text or ''):
+        number = match['prefixed'] or match['suffixed']
+        unit = (match['prefixed_unit'] or match['suffixed_unit'] or '').lower().rstrip('s')
+        try:
+            amount = Decimal(number.replace(',', '')) * UNITS.get(unit, 1)
+        except InvalidOperation:
+            continue
+        amounts.append(min(amount, MAX_AMOUNT))
+    return max(amounts) if amounts else None
+
+
+def prepare_priorities(apps, schema_editor):
+    """Severities for the stock categories and amounts for existing reports. Open
+    cases get priority 1, so they are in the work queues until `manage.py
+    score_reports` scores them."""
+    CrimeCategory = apps.get_model('crime_report', 'CrimeCategory')
+    CrimeReport = apps.get_model('crime_report', 'CrimeReport')
+    for name, severity in SEVERITIES.items():
+        CrimeCategory.objects.filter(name=name).update(severity=severity)
+
+    reports = []
+    for report in CrimeReport.objects.only('id', 'description').iterator():
+        report.reported_amount = extract_amount(report.description)
+        if report.reported_amount is not None:
+            reports.append(report)
+    CrimeReport.objects.bulk_update(reports, ['reported_amount'], batch_size=500)
+    CrimeReport.objects.filter(status__in=['pending', 'investigating']).update(priority=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0012_userstats_signupmonth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crimecategory',
+            name='severity',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Minor'), (3, 'Moderate'), (4, 'High'), (5, 'Critical')], default=3),
+        ),
+        migrations.AddField(
+            model_name='crimereport',
+            name='priority',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='crimereport',
+            name='reported_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['-priority', '-reported_on'], name='report_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['assigned_to', '-priority', '-reported_on'], name='report_queue_idx'),
+        ),
+        migrations.RunPython(prepare_priorities, migrations.RunPython.noop),
+    ]
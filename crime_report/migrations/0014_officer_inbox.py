@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import Max
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_inboxes(apps, schema_editor):
+    """Puts every assigned case in its assignee's inbox, read (frozen copy of
+    crime_report.inbox.rebuild for empty inboxes)."""
+    CrimeReport = apps.get_model('crime_report', 'CrimeReport')
+    InboxItem = apps.get_model('crime_report', 'InboxItem')
+    assigned = (
+        CrimeReport.objects.filter(assigned_to__isnull=False)
+        .annotate(last_activity=Greatest('reported_on', Coalesce(Max('updates__updated_on'), 'reported_on')))
+        .order_by().values_list('id', 'assigned_to_id', 'last_activity')
+    )
+    InboxItem.objects.bulk_create(
+        [
+            InboxItem(report_id=report_id, user_id=assignee_id, last_activity=last_activity)
+            for report_id, assignee_id, last_activity in assigned
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('crime_report', '0013_case_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='inbox_unread',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='InboxItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to='crime_report.crimereport')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_activity'],
+                'indexes': [models.Index(fields=['user', '-last_activity'], name='inbox_user_activity_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inboxitem',
+            constraint=models.UniqueConstraint(fields=('report', 'user'), name='one_inbox_item_per_case'),
+        ),
+        migrations.RunPython(fill_inboxes, migrations.RunPython.noop),
+    ]
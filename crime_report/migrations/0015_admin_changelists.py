@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0014_officer_inbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['-reported_on'], name='report_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crimeupdate',
+            index=models.Index(fields=['-updated_on'], name='update_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0015_admin_changelists'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('full_at', models.FloatField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crime_report', '0016_ratelimit_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRescore',
+            fields=[
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='crime_report.crimereport')),
+                ('queued_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
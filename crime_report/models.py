@@ -1,13 +1,26 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from django.core.files.storage import storages
 from .validators import validate_file_extension, validate_file_size, validate_file_content
+from .permissions import is_staff_role
 
 class CrimeCategory(models.Model):
+    SEVERITY_CHOICES = (
+        (1, 'Low'),
+        (2, 'Minor'),
+        (3, 'Moderate'),
+        (4, 'High'),
+        (5, 'Critical'),
+    )
+    
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
+    # Weighs in the priority of its cases (see crime_report.priority)
+    severity = models.PositiveSmallIntegerField(choices=SEVERITY_CHOICES, default=3)
     
     def __str__(self):
         return self.name
@@ -16,24 +29,140 @@ class CrimeCategory(models.Model):
         verbose_name_plural = "Crime Categories"
         ordering = ['name']
 
-class Location(models.Model):
-    city = models.CharField(max_length=100)
-    state = models.CharField(max_length=100)
-    area = models.CharField(max_length=100)
-    pincode = models.CharField(
+def normalize_place_name(value):
+    """Collapses whitespace and title-cases all-lowercase names ("mumbai " becomes
+    "Mumbai"). Names are matched case-insensitively, so "MUMBAI" is the same city."""
+    value = ' '.join(value.split())
+    if value.islower():
+        value = value.title()
+    return value
+
+class State(models.Model):
+    name = models.CharField(max_length=100)
+    
+    def __str__(self):
+        return self.name
+    
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='unique_state_name'),
+        ]
+
+class City(models.Model):
+    state = models.ForeignKey(State, on_delete=models.PROTECT, related_name='cities')
+    name = models.CharField(max_length=100)
+    
+    def __str__(self):
+        return self.name
+    
+    class Meta:
+        verbose_name_plural = "Cities"
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), 'state', name='unique_city_name_per_state'),
+        ]
+
+class Area(models.Model):
+    city = models.ForeignKey(City, on_delete=models.PROTECT, related_name='areas')
+    name = models.CharField(max_length=100)
+    
+    def __str__(self):
+        return self.name
+    
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), 'city', name='unique_area_name_per_city'),
+        ]
+
+class Pincode(models.Model):
+    code = models.CharField(
         max_length=10,
+        unique=True,
         validators=[RegexValidator(
             regex=r'^\d{6}$',
             message='Pincode must be 6 digits'
         )]
     )
+    # Centroid from the bundled dataset (see crime_report.geo.pincode_centroid)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    
+    def __str__(self):
+        return self.code
+    
+    class Meta:
+        ordering = ['code']
+
+def _get_or_create_by_name(model, name, **parents):
+    """Case-insensitive get_or_create on ``name``, safe against concurrent inserts."""
+    try:
+        return model.objects.get(name__iexact=name, **parents)
+    except model.DoesNotExist:
+        try:
+            with transaction.atomic():
+                return model.objects.create(name=name, **parents)
+        except IntegrityError:
+            return model.objects.get(name__iexact=name, **parents)
+
+class LocationManager(models.Manager):
+    def resolve(self, state, city, area, pincode):
+        """Returns the Location for these names, creating whatever part of the
+        State/City/Area/Pincode hierarchy does not exist yet."""
+        state = _get_or_create_by_name(State, normalize_place_name(state))
+        city = _get_or_create_by_name(City, normalize_place_name(city), state=state)
+        area = _get_or_create_by_name(Area, normalize_place_name(area), city=city)
+        pincode, _ = Pincode.objects.get_or_create(code=pincode.strip())
+        try:
+            with transaction.atomic():
+                location, _ = self.get_or_create(area=area, pincode=pincode, defaults={'city': city})
+        except IntegrityError:
+            location = self.get(area=area, pincode=pincode)
+        return location
+
+class Location(models.Model):
+    """An area/pincode pair that reports point at. ``city`` repeats ``area.city``
+    so reports can be filtered and grouped by city with a single join."""
+    area = models.ForeignKey(Area, on_delete=models.PROTECT, related_name='locations')
+    city = models.ForeignKey(City, on_delete=models.PROTECT, related_name='locations')
+    pincode = models.ForeignKey(Pincode, on_delete=models.PROTECT, related_name='locations')
+    
+    objects = LocationManager()
+    
+    @property
+    def state(self):
+        return self.city.state
+    
+    def save(self, *args, **kwargs):
+        self.city_id = self.area.city_id
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.area}, {self.city}, {self.state} - {self.pincode}"
     
     class Meta:
-        ordering = ['state', 'city', 'area']
-        unique_together = ['city', 'state', 'area', 'pincode']
+        unique_together = ['area', 'pincode']
+
+class CrimeReportQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Reports ``user`` may open: all of them for police and admins, otherwise
+        the ones they reported or are assigned to."""
+        if is_staff_role(user):
+            return self
+        if not user.is_authenticated:
+            return self.none()
+        return self.filter(models.Q(reported_by=user) | models.Q(assigned_to=user))
+    
+    def listed_for(self, user):
+        """Reports shown to ``user`` in lists: the visible ones plus resolved cases,
+        which are public."""
+        if is_staff_role(user):
+            return self
+        public = models.Q(status__in=CrimeReport.PUBLIC_STATUSES)
+        if not user.is_authenticated:
+            return self.filter(public)
+        return self.filter(public | models.Q(reported_by=user) | models.Q(assigned_to=user))
 
 class CrimeReport(models.Model):
     STATUS_CHOICES = (
@@ -42,6 +171,11 @@ class CrimeReport(models.Model):
         ('resolved', 'Resolved'),
         ('closed', 'Closed'),
     )
+    # Statuses whose reports appear in public lists (title, category and place only)
+    PUBLIC_STATUSES = ('resolved',)
+    # Statuses counted as an officer's open cases in UserStats
+    OPEN_STATUSES = ('pending', 'investigating')
+    COUNTED_FIELDS = ('reported_by_id', 'assigned_to_id', 'status', 'reported_on')
     
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -66,6 +200,29 @@ class CrimeReport(models.Model):
         related_name='assigned_crimes',
         limit_choices_to={'profile__user_type__in': ['police', 'admin']}
     )
+    # Largest amount (INR) named in the description, and the case's place in the
+    # work queue (see crime_report.priority): 0 unless the case is open
+    reported_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False)
+    priority = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = CrimeReportQuerySet.as_manager()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the post_save signal skip reindexing when the text did not change
+        instance._loaded_text = (instance.__dict__.get('title'), instance.__dict__.get('description'))
+        # Lets the UserStats counters apply the difference on save (see crime_report.counters)
+        instance._loaded_counted = instance.counted_state()
+        return instance
+    
+    def counted_state(self):
+        """The fields UserStats counts, as loaded ({} for fields left deferred)."""
+        return {name: self.__dict__[name] for name in self.COUNTED_FIELDS if name in self.__dict__}
+    
+    def text_changed(self):
+        """Whether title or description differ from what was loaded from the database."""
+        return getattr(self, '_loaded_text', None) != (self.title, self.description)
     
     def __str__(self):
         return self.title
@@ -95,12 +252,18 @@ class CrimeReport(models.Model):
     
     def can_view_details(self, user):
         """Check if user can view full details"""
-        return (user == self.reported_by or 
-                user == self.assigned_to or 
-                user.profile.user_type in ['police', 'admin'])
+        return user.is_authenticated and (
+            user.pk in (self.reported_by_id, self.assigned_to_id) or is_staff_role(user)
+        )
     
     class Meta:
         ordering = ['-reported_on']
+        indexes = [
+            # The default ordering, so pages of every list read only their rows
+            models.Index(fields=['-reported_on'], name='report_recent_idx'),
+            models.Index(fields=['-priority', '-reported_on'], name='report_priority_idx'),
+            models.Index(fields=['assigned_to', '-priority', '-reported_on'], name='report_queue_idx'),
+        ]
         permissions = [
             ("can_assign_cases", "Can assign cases to officers"),
             ("can_update_status", "Can update case status"),
@@ -127,6 +290,167 @@ class CrimeUpdate(models.Model):
     
     class Meta:
         ordering = ['-updated_on']
+        indexes = [
+            models.Index(fields=['-updated_on'], name='update_recent_idx'),
+        ]
+
+class ReportFingerprint(models.Model):
+    """MinHash signature of a report's title and description (see crime_report.detection)."""
+    report = models.OneToOneField(CrimeReport, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"Fingerprint of {self.report_id}"
+
+class ReportBucket(models.Model):
+    """One LSH band of a report's signature; reports sharing a key are candidate duplicates."""
+    report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name='lsh_buckets')
+    key = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.report_id}: {self.key}"
+
+class ReportIndicator(models.Model):
+    """An indicator of compromise mentioned in a report, or in one of its updates
+    when ``update`` is set (see crime_report.iocs)."""
+    KIND_CHOICES = (
+        ('phone', 'Phone number'),
+        ('url', 'URL'),
+        ('domain', 'Domain'),
+        ('ip', 'IP address'),
+        ('upi', 'UPI ID'),
+        ('email', 'Email address'),
+        ('crypto', 'Crypto wallet'),
+    )
+
+    report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name='indicators')
+    update = models.ForeignKey(CrimeUpdate, on_delete=models.CASCADE, null=True, blank=True, related_name='indicators')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.value}"
+
+    class Meta:
+        ordering = ['kind', 'value']
+        indexes = [
+            models.Index(fields=['kind', 'value'], name='indicator_lookup_idx'),
+        ]
+
+def archive_storage():
+    """Cold storage for archived evidence (the "archive" entry of STORAGES)."""
+    return storages['archive']
+
+class ArchivedReport(models.Model):
+    """A closed case moved out of the live tables by ``manage.py archive_reports``
+    (see crime_report.archive). It keeps its CrimeReport id; its updates and
+    indicators are kept inline, and its evidence file in cold storage."""
+    STATUS_CHOICES = CrimeReport.STATUS_CHOICES
+
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    date_of_crime = models.DateField()
+    time_of_crime = models.TimeField(null=True, blank=True)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='archived_reports')
+    category = models.ForeignKey(CrimeCategory, on_delete=models.CASCADE, related_name='archived_reports')
+    reported_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_reports')
+    reported_on = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    evidence_file = models.FileField(upload_to='evidence/', storage=archive_storage, null=True, blank=True)
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_assigned_reports'
+    )
+    # [{'id', 'update_text', 'updated_by', 'updated_by_name', 'updated_on'}], oldest first
+    updates = models.JSONField(default=list)
+    # [[kind, value]] from ReportIndicator, for the record
+    indicators = models.JSONField(default=list)
+    last_activity = models.DateTimeField()
+    archived_on = models.DateTimeField(default=timezone.now)
+
+    # Same visibility rules as live reports
+    objects = CrimeReportQuerySet.as_manager()
+
+    def __str__(self):
+        return self.title
+
+    def can_view_details(self, user):
+        return user.is_authenticated and (
+            user.pk in (self.reported_by_id, self.assigned_to_id) or is_staff_role(user)
+        )
+
+    class Meta:
+        ordering = ['-reported_on']
+        indexes = [
+            models.Index(fields=['reported_on'], name='archived_report_date_idx'),
+        ]
+
+class Notification(models.Model):
+    """An email to a reporter about the updates on their report since ``since``,
+    sent by ``manage.py run_worker`` (see crime_report.notifications). Updates
+    arriving while one is pending join it instead of queuing another email."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name='notifications')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    since = models.DateTimeField()
+    send_after = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claim = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_on = models.DateTimeField(default=timezone.now)
+    sent_on = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Notification to {self.recipient_id} about {self.report_id} ({self.status})"
+
+    class Meta:
+        ordering = ['send_after']
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='notification_due_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['report', 'recipient'],
+                condition=models.Q(status='pending'),
+                name='one_pending_notification',
+            ),
+        ]
+
+class PendingRescore(models.Model):
+    """A report whose text changed: ``manage.py run_worker`` rescores the open
+    cases sharing its indicators (see crime_report.priority)."""
+    report = models.OneToOneField(CrimeReport, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    queued_on = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Rescore cases linked to {self.report_id}"
+
+class InboxItem(models.Model):
+    """A case in its assignee's inbox, with the number of updates on it they have
+    not seen yet (see crime_report.inbox)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inbox_items')
+    report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name='inbox_items')
+    unread = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Case {self.report_id} in the inbox of {self.user_id} ({self.unread} unread)"
+
+    class Meta:
+        ordering = ['-last_activity']
+        indexes = [
+            models.Index(fields=['user', '-last_activity'], name='inbox_user_activity_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['report', 'user'], name='one_inbox_item_per_case'),
+        ]
 
 class UserProfile(models.Model):
     USER_TYPES = (
@@ -176,4 +500,68 @@ class UserProfile(models.Model):
         return self.user_type == 'admin'
     
     class Meta:
-        ordering = ['-user_type', 'user__username']
\ No newline at end of file
+        ordering = ['-user_type', 'user__username']
+
+class UserStats(models.Model):
+    """Per-user counters for manage_users, changed on every write to a report
+    rather than counted on each page view (see crime_report.counters)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    reports_filed = models.IntegerField(default=0)
+    last_report_on = models.DateTimeField(null=True, blank=True)
+    cases_assigned = models.IntegerField(default=0)
+    cases_open = models.IntegerField(default=0)
+    cases_resolved = models.IntegerField(default=0)
+    # Cases in the user's inbox with updates they have not seen (see crime_report.inbox)
+    inbox_unread = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"Stats for {self.user_id}"
+    
+    class Meta:
+        verbose_name_plural = 'user stats'
+        indexes = [
+            models.Index(fields=['-reports_filed'], name='userstats_top_reporters_idx'),
+        ]
+
+class SignupMonth(models.Model):
+    """Users who joined in each month (``month`` is its first day)."""
+    month = models.DateField(unique=True)
+    count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.month:%b %Y}: {self.count}"
+    
+    class Meta:
+        ordering = ['-month']
+
+class DataVersion(models.Model):
+    """Counter bumped on every write to a group of models, used for HTTP validators
+    and template fragment cache keys."""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_on = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+    
+    @classmethod
+    def bump(cls, name):
+        now = timezone.now()
+        updated = cls.objects.filter(name=name).update(version=models.F('version') + 1, updated_on=now)
+        if not updated:
+            cls.objects.get_or_create(name=name, defaults={'version': 1, 'updated_on': now})
+    
+    @classmethod
+    def current(cls, name):
+        """Returns (version, updated_on) for ``name``."""
+        row = cls.objects.filter(name=name).values_list('version', 'updated_on').first()
+        return row or (0, None)
+
+class RateLimitBucket(models.Model):
+    """A token bucket of crime_report.ratelimit, stored as the time it will be
+    full again; the row is meaningless (and purged) after that."""
+    key = models.CharField(max_length=100, unique=True)
+    full_at = models.FloatField(db_index=True)  # epoch seconds; the row's expiry
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,193 @@
+"""Email notifications to reporters about updates on their cases, through an
+outbox table.
+
+Adding a case update only inserts a ``Notification`` row, in the same
+transaction, so officers never wait on SMTP. A pending notification collects
+every update to its report until it is due, ``NOTIFICATION_COALESCE_WINDOW``
+seconds after the first one, and is then sent as one email listing them all.
+
+``manage.py run_worker`` claims due rows in batches (a claim token and a lease,
+so several workers can run side by side and a crashed worker's batch is picked
+up again once the lease runs out), sends each batch over one connection from
+``get_connection()``, and retries failures with exponential backoff until
+``NOTIFICATION_MAX_ATTEMPTS`` is reached.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CrimeReport, CrimeUpdate, Notification
+
+logger = logging.getLogger(__name__)
+
+# Rows a worker may pick up: due ones, and those whose worker's lease ran out
+CLAIMABLE_STATUSES = ('pending', 'sending')
+
+
+def enqueue(updates):
+    """Queues a notification to the reporter of each report in ``updates``,
+    unless one is already pending for it. Three queries for any number of updates."""
+    if not settings.NOTIFICATIONS_ENABLED or not updates:
+        return
+    since = {}
+    updaters = {}
+    for update in updates:
+        report_id = update.crime_report_id
+        if report_id not in since or update.updated_on < since[report_id]:
+            since[report_id] = update.updated_on
+        updaters.setdefault(report_id, set()).add(update.updated_by_id)
+
+    pending = set(
+        Notification.objects.filter(status='pending', report_id__in=since).values_list('report_id', 'recipient_id')
+    )
+    reporters = (
+        CrimeReport.objects.filter(id__in=since).exclude(reported_by__email='')
+        .values_list('id', 'reported_by_id')
+    )
+    send_after = timezone.now() + timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW)
+    rows = [
+        Notification(report_id=report_id, recipient_id=reporter_id, since=since[report_id], send_after=send_after)
+        for report_id, reporter_id in reporters
+        # Nobody needs an email about their own note
+        if (report_id, reporter_id) not in pending and updaters[report_id] != {reporter_id}
+    ]
+    # A concurrent update may have queued the same notification; that one will do
+    Notification.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def claim(batch_size):
+    """Claims up to ``batch_size`` due notifications for this worker and returns them."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = (
+        Notification.objects.filter(status__in=CLAIMABLE_STATUSES, send_after__lte=now)
+        .order_by('send_after').values_list('id', flat=True)[:batch_size]
+    )
+    # The conditions are checked again row by row, so of two workers reading the
+    # same ids each row goes to only one of them
+    Notification.objects.filter(
+        id__in=list(due), status__in=CLAIMABLE_STATUSES, send_after__lte=now,
+    ).update(status='sending', claim=token, send_after=now + timedelta(seconds=settings.NOTIFICATION_LEASE))
+    return list(
+        Notification.objects.filter(claim=token, status='sending')
+        .select_related('report', 'recipient').order_by('send_after', 'id')
+    )
+
+
+def _updates_since(notifications):
+    """{report id: [updates since its notification's ``since``, oldest first]}, in one query."""
+    if not notifications:
+        return {}
+    since = {}
+    for notification in notifications:
+        since[notification.report_id] = min(notification.since, since.get(notification.report_id, notification.since))
+    updates = {report_id: [] for report_id in since}
+    rows = (
+        CrimeUpdate.objects.filter(crime_report_id__in=since, updated_on__gte=min(since.values()))
+        .select_related('updated_by').order_by('updated_on', 'id')
+    )
+    for update in rows:
+        if update.updated_on >= since[update.crime_report_id]:
+            updates[update.crime_report_id].append(update)
+    return updates
+
+
+def build_message(notification, updates, connection=None):
+    report = notification.report
+    context = {
+        'recipient': notification.recipient,
+        'report': report,
+        'updates': updates,
+        'report_url': settings.NOTIFICATION_SITE_URL.rstrip('/') + reverse('crime_detail', args=[report.pk]),
+    }
+    count = len(updates)
+    subject = f'{count} update{"s" if count != 1 else ""} on your report #{report.pk}: {report.title}'
+    return EmailMessage(
+        subject=subject[:200],
+        body=render_to_string('crime_report/emails/case_update.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[notification.recipient.email],
+        connection=connection,
+    )
+
+
+def _retry(notification, error, final=False):
+    """Puts a failed notification back in the queue with backoff, or gives up on
+    it after the last attempt (or at once when ``final``)."""
+    notification.attempts += 1
+    notification.last_error = error
+    notification.claim = ''
+    if final or notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+        notification.status = 'failed'
+        logger.error(f"Giving up on notification {notification.id} after {notification.attempts} attempts: {error}")
+    else:
+        notification.status = 'pending'
+        delay = settings.NOTIFICATION_RETRY_BACKOFF * 2 ** (notification.attempts - 1)
+        notification.send_after = timezone.now() + timedelta(seconds=delay)
+    fields = ['status', 'attempts', 'last_error', 'claim', 'send_after']
+    try:
+        with transaction.atomic():
+            notification.save(update_fields=fields)
+    except IntegrityError:
+        # Newer updates queued another notification meanwhile; it takes over
+        # this one's updates and is sent when it is due
+        pending = Notification.objects.filter(
+            report_id=notification.report_id, recipient_id=notification.recipient_id, status='pending',
+        )
+        pending.filter(since__gt=notification.since).update(since=notification.since)
+        notification.delete()
+
+
+def deliver(notifications):
+    """Sends ``notifications`` over one connection. Returns the number sent."""
+    updates = _updates_since(notifications)
+    sent = []
+    failed = []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Could not connect to the mail server: {e}")
+        for notification in notifications:
+            _retry(notification, f'Connection failed: {e}')
+        return 0
+
+    try:
+        for notification in notifications:
+            if not notification.recipient.email:
+                _retry(notification, 'Recipient has no email address', final=True)
+                continue
+            if not updates[notification.report_id]:
+                # The updates were deleted before the email went out
+                sent.append(notification.id)
+                continue
+            message = build_message(notification, updates[notification.report_id], connection)
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                failed.append((notification, str(e) or e.__class__.__name__))
+            else:
+                sent.append(notification.id)
+    finally:
+        connection.close()
+
+    if sent:
+        Notification.objects.filter(id__in=sent).update(status='sent', sent_on=timezone.now(), claim='')
+    for notification, error in failed:
+        _retry(notification, error)
+    return len(sent)
+
+
+def process_batch(batch_size=None):
+    """Claims and sends one batch of due notifications. Returns (claimed, sent)."""
+    notifications = claim(batch_size or settings.NOTIFICATION_BATCH_SIZE)
+    if not notifications:
+        return 0, 0
+    return len(notifications), deliver(notifications)
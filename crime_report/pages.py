@@ -0,0 +1,237 @@
+"""The data behind the read-heavy pages, shared by the sync views and their
+async variants (crime_report.async_views).
+
+Each page is described by a dict of independent query callables and a
+function building the template context from their results. The sync views
+run the queries one after another; the async views run them concurrently.
+The sync views leave the queries behind {% cache %} fragments to the
+template, which only calls them when the fragment is not cached.
+"""
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .geo import city_q, reports_by_city
+from .models import City, CrimeCategory, CrimeReport
+from . import hotspots, inbox
+
+
+# Queries only used inside cached template fragments, per page
+CRIME_LIST_FRAGMENTS = ('categories', 'cities')
+DASHBOARD_FRAGMENTS = ('recent_reports',)
+
+
+def run_queries(queries, deferred=()):
+    """Runs ``queries`` in turn and returns their results by name; the
+    ``deferred`` ones are returned uncalled, for the template to call."""
+    return {name: query if name in deferred else query() for name, query in queries.items()}
+
+
+def status_counts(queryset=None):
+    """Total and per-status report counts in a single aggregate query."""
+    queryset = CrimeReport.objects.all() if queryset is None else queryset
+    return queryset.aggregate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status, _ in CrimeReport.STATUS_CHOICES}
+    )
+
+
+def home_queries(user):
+    recent_reports = (
+        CrimeReport.objects.listed_for(user).select_related('category', 'location__city__state')
+        .order_by('-reported_on')[:5]
+    )
+    return {
+        'crime_categories': lambda: list(CrimeCategory.objects.all()[:5]),
+        'recent_reports': lambda: list(recent_reports),
+        'counts': status_counts,
+    }
+
+
+def home_context(user, data):
+    counts = data['counts']
+    return {
+        'crime_categories': data['crime_categories'],
+        'recent_reports': data['recent_reports'],
+        'total_reports': counts['total'],
+        'resolved_reports': counts['resolved'],
+        'pending_reports': counts['pending'],
+        'investigating_reports': counts['investigating'],
+        'show_all_reports': user.is_authenticated,
+    }
+
+
+def crime_list_paginator(request, user):
+    """The filtered report list for ``request``'s query string, 10 per page."""
+    queryset = CrimeReport.objects.listed_for(user).select_related('category', 'location__city__state')
+
+    # Apply filters
+    filters = Q()
+
+    category = request.GET.get('category')
+    if category:
+        filters &= Q(category_id=category)
+
+    status = request.GET.get('status')
+    if status:
+        filters &= Q(status=status)
+
+    city = request.GET.get('city')
+    if city:
+        filters &= city_q(city)
+
+    date_from = request.GET.get('date_from')
+    if date_from:
+        filters &= Q(date_of_crime__gte=date_from)
+
+    date_to = request.GET.get('date_to')
+    if date_to:
+        filters &= Q(date_of_crime__lte=date_to)
+
+    return Paginator(queryset.filter(filters).order_by('-reported_on'), 10)
+
+
+def crime_list_queries(request, paginator):
+    def current_page():
+        page_obj = paginator.get_page(request.GET.get('page'))
+        page_obj.object_list = list(page_obj.object_list)
+        return page_obj
+
+    return {
+        'page_obj': current_page,
+        'categories': lambda: list(CrimeCategory.objects.all()),
+        'cities': lambda: list(City.objects.select_related('state').order_by('name')),
+        'counts': status_counts,
+    }
+
+
+def crime_list_context(request, paginator, data):
+    page_obj = data['page_obj']
+    counts = data['counts']
+    return {
+        'paginator': paginator,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+        'object_list': page_obj.object_list,
+        'reports': page_obj.object_list,
+        'categories': data['categories'],
+        'filters': request.GET,
+        'cities': data['cities'],
+        'total_reports': counts['total'],
+        'resolved_reports': counts['resolved'],
+        'pending_reports': counts['pending'],
+    }
+
+
+def dashboard_queries(user, user_type):
+    queries = {
+        'counts': status_counts,
+        'crime_by_category': lambda: list(CrimeCategory.objects.annotate(count=Count('crimereport'))),
+        'recent_reports': lambda: list(CrimeReport.objects.order_by('-reported_on')[:10]),
+        'total_users': User.objects.count,
+    }
+    # Latest cases in this officer's inbox (if police)
+    if user_type == 'police':
+        queries['inbox_items'] = lambda: list(inbox.items(user)[:settings.INBOX_PREVIEW_SIZE])
+    return queries
+
+
+def _top_locations():
+    crime_by_location = reports_by_city()
+    total_location_reports = sum(loc['count'] for loc in crime_by_location)
+    locations = []
+    for loc in crime_by_location:
+        percentage = (loc['count'] / total_location_reports * 100) if total_location_reports > 0 else 0
+        # For demo purposes, generate a random trend between -20 and 20
+        trend = random.randint(-20, 20)
+        locations.append({
+            'city': loc['city'],
+            'state': loc['state'],
+            'count': loc['count'],
+            'percentage': round(percentage, 1),
+            'trend': trend
+        })
+    return locations
+
+
+def dashboard_context(user_type, data):
+    counts = data['counts']
+    total_reports = counts['total']
+    investigating_percentage = (counts['investigating'] / total_reports * 100) if total_reports > 0 else 0
+    return {
+        'stats': {
+            'total_reports': total_reports,
+            'pending_reports': counts['pending'],
+            'investigating_reports': counts['investigating'],
+            'resolved_reports': counts['resolved'],
+            'closed_reports': counts['closed'],
+        },
+        'crime_by_category': data['crime_by_category'],
+        'recent_reports': data['recent_reports'],
+        'inbox_items': data.get('inbox_items'),
+        'user_type': user_type,
+        'investigating_percentage': round(investigating_percentage, 1),
+        'total_reports': total_reports,
+        'pending_reports': counts['pending'],
+        'investigating_reports': counts['investigating'],
+        'resolved_reports': counts['resolved'],
+        # A callable, so the template only runs it when the hotspots fragment is not cached
+        'top_locations': _top_locations,
+        'hotspot_map': hotspots.map_options(),
+        'total_users': data['total_users'],
+        'today': timezone.now()
+    }
+
+
+def _last_months(now, count=12):
+    """[(year, month)] for the ``count`` months up to ``now``'s, oldest first."""
+    months = []
+    for i in range(count):
+        month = now.month - i
+        year = now.year
+        if month <= 0:
+            month += 12
+            year -= 1
+        months.append((year, month))
+    months.reverse()
+    return months
+
+
+def stats_queries(now):
+    def month_counts():
+        first_year, first_month = _last_months(now)[0]
+        rows = CrimeReport.objects.filter(
+            reported_on__gte=now.replace(year=first_year, month=first_month, day=1,
+                                         hour=0, minute=0, second=0, microsecond=0)
+        ).annotate(month=TruncMonth('reported_on')).values('month').annotate(count=Count('id'))
+        return {(row['month'].year, row['month'].month): row['count'] for row in rows}
+
+    return {
+        'crime_by_category': lambda: list(
+            CrimeCategory.objects.annotate(count=Count('crimereport')).values('name', 'count')
+        ),
+        'crime_by_location': reports_by_city,
+        'counts': status_counts,
+        'month_counts': month_counts,
+    }
+
+
+def stats_payload(now, data):
+    """The crime_stats_api JSON document."""
+    return {
+        'crime_by_category': data['crime_by_category'],
+        'crime_by_location': data['crime_by_location'],
+        'crime_by_status': [
+            {'status': label, 'count': data['counts'][status]}
+            for status, label in CrimeReport.STATUS_CHOICES
+        ],
+        'crime_by_month': [
+            {'month': f'{year}-{month:02d}', 'count': data['month_counts'].get((year, month), 0)}
+            for year, month in _last_months(now)
+        ],
+    }
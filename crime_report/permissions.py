@@ -0,0 +1,27 @@
+"""Per-user role lookups for report visibility checks.
+
+``CrimeReport.objects.visible_to(user)`` and ``CrimeReport.can_view_details``
+need the user's role on every request. It is read from the user's profile
+once per request and memoized on the user object, so checking many reports
+costs no further queries. Nothing outlives the request: a role kept across
+requests would be per-process, and a demoted user would keep access in the
+workers that had not heard of the change.
+"""
+
+STAFF_ROLES = ('police', 'admin')
+
+
+def user_role(user):
+    """'anonymous' for signed-out users, else the profile's user_type."""
+    if not user.is_authenticated:
+        return 'anonymous'
+    role = getattr(user, '_cached_role', None)
+    if role is None:
+        role = user.profile.user_type if hasattr(user, 'profile') else 'citizen'
+        user._cached_role = role
+    return role
+
+
+def is_staff_role(user):
+    """Whether ``user`` is a police officer or admin, who see every report."""
+    return user_role(user) in STAFF_ROLES
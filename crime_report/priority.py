@@ -0,0 +1,208 @@
+"""Case priority: a score per report, stored in CrimeReport.priority and indexed
+with the assignee, so an officer's work queue is one index range scan.
+
+An open case scores points (the PRIORITY_* settings) for
+
+* the severity of its category,
+* its age, up to PRIORITY_AGE_MAX_DAYS,
+* the time since its last update, up to PRIORITY_STALE_MAX_DAYS,
+* the largest amount of money its description names (log scale),
+* the other reports sharing one of its indicators (log scale), counting only
+  indicators that ``iocs.links_cases`` accepts.
+
+Open cases score at least 1, resolved and closed ones 0. A report is rescored
+whenever it is saved or gets an update. When its text changes, the open cases
+linked to it are queued (``PendingRescore``) and rescored by ``manage.py
+run_worker``, so the save does not wait on them. Age and staleness grow on
+their own, so ``manage.py score_reports`` rescores every open case; run it
+hourly. It also applies changes to category severities and catches up on
+queued rescores lost to a crashed worker.
+"""
+import math
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .http_cache import CRIME_DATA
+from .iocs import links_cases
+from .models import CrimeReport, CrimeUpdate, DataVersion, PendingRescore, ReportIndicator
+
+_NUMBER = r'\d[\d,]*(?:\.\d+)?'
+_UNIT = r'(?:\s*(?P<{}>lakhs?|lacs?|crores?|cr|k)\b)?'
+# "Rs. 45,000", "₹2.5 lakh", "INR 10k", "30000 rupees"
+AMOUNT_RE = re.compile(
+    rf'(?:₹|\brs\.?|\binr\b)\s*(?P<prefixed>{_NUMBER}){_UNIT.format("prefixed_unit")}'
+    rf'|\b(?P<suffixed>{_NUMBER}){_UNIT.format("suffixed_unit")}\s*(?:rupees|rs\b|inr\b)',
+    re.IGNORECASE,
+)
+UNITS = {'k': 1_000, 'lakh': 100_000, 'lac': 100_000, 'crore': 10_000_000, 'cr': 10_000_000}
+# Largest value CrimeReport.reported_amount holds
+MAX_AMOUNT = Decimal('999999999999.99')
+
+
+def extract_amount(text):
+    """The largest amount of money (INR) named in ``text``, or None."""
+    amounts = []
+    for match in AMOUNT_RE.finditer(text or ''):
+        number = match['prefixed'] or match['suffixed']
+        unit = (match['prefixed_unit'] or match['suffixed_unit'] or '').lower().rstrip('s')
+        try:
+            amount = Decimal(number.replace(',', '')) * UNITS.get(unit, 1)
+        except InvalidOperation:
+            continue
+        amounts.append(min(amount, MAX_AMOUNT))
+    return max(amounts) if amounts else None
+
+
+def score(severity, reported_on, last_activity, amount, linked, now):
+    """Priority of an open case; see the module docstring."""
+    def days_since(moment):
+        return max(0.0, (now - moment).total_seconds() / 86400)
+
+    points = settings.PRIORITY_SEVERITY_POINTS * severity
+    points += settings.PRIORITY_AGE_POINTS * min(days_since(reported_on), settings.PRIORITY_AGE_MAX_DAYS)
+    points += settings.PRIORITY_STALE_POINTS * min(days_since(last_activity), settings.PRIORITY_STALE_MAX_DAYS)
+    if amount and amount >= 1:
+        points += settings.PRIORITY_AMOUNT_POINTS * math.log10(amount)
+    points += settings.PRIORITY_LINKED_POINTS * math.log2(1 + min(linked, settings.PRIORITY_LINKED_MAX))
+    return max(1, round(points))
+
+
+def _linked_counts(report_ids):
+    """{report id: other reports sharing its most widely shared indicator}. Each
+    indicator is counted once, however many of ``report_ids`` mention it."""
+    mentioned = defaultdict(set)
+    rows = ReportIndicator.objects.filter(report_id__in=report_ids).values_list('report_id', 'kind', 'value')
+    for report_id, kind, value in rows:
+        if links_cases(kind, value):
+            mentioned[kind, value].add(report_id)
+    values = defaultdict(list)
+    for kind, value in mentioned:
+        values[kind].append(value)
+    matches = Q()
+    for kind, kind_values in values.items():
+        matches |= Q(kind=kind, value__in=kind_values)
+
+    linked = {}
+    if not matches:
+        return linked
+    sharing = (
+        ReportIndicator.objects.filter(matches)
+        .order_by().values_list('kind', 'value').annotate(Count('report_id', distinct=True))
+    )
+    for kind, value, reports in sharing:
+        for report_id in mentioned.get((kind, value), ()):
+            linked[report_id] = max(linked.get(report_id, 0), reports - 1)
+    return linked
+
+
+def _score_batch(report_ids):
+    now = timezone.now()
+    reports = list(
+        CrimeReport.objects.filter(id__in=report_ids).values_list(
+            'id', 'status', 'priority', 'category__severity', 'reported_on', 'reported_amount',
+        )
+    )
+    open_ids = [row[0] for row in reports if row[1] in CrimeReport.OPEN_STATUSES]
+    last_updates = dict(
+        CrimeUpdate.objects.filter(crime_report_id__in=open_ids)
+        .order_by().values_list('crime_report_id').annotate(Max('updated_on'))
+    )
+    linked = _linked_counts(open_ids)
+
+    scores = {}
+    changed = []
+    for report_id, status, old, severity, reported_on, amount in reports:
+        if status in CrimeReport.OPEN_STATUSES:
+            last_activity = max(reported_on, last_updates.get(report_id, reported_on))
+            scores[report_id] = score(severity, reported_on, last_activity, amount, linked.get(report_id, 0), now)
+        else:
+            scores[report_id] = 0
+        if scores[report_id] != old:
+            changed.append(CrimeReport(id=report_id, priority=scores[report_id]))
+    if changed:
+        CrimeReport.objects.bulk_update(changed, ['priority'])
+        # bulk_update sends no signals; cached pages and ETags show priorities
+        DataVersion.bump(CRIME_DATA)
+    return scores
+
+
+def score_reports(report_ids):
+    """Recomputes and stores the priority of ``report_ids``. Returns {id: priority}."""
+    report_ids = list(report_ids)
+    scores = {}
+    for start in range(0, len(report_ids), settings.PRIORITY_BATCH_SIZE):
+        scores.update(_score_batch(report_ids[start:start + settings.PRIORITY_BATCH_SIZE]))
+    return scores
+
+
+def linked_open_reports(report_id, limit=None):
+    """Ids of the open cases sharing an indicator with ``report_id``."""
+    indicators = {
+        (kind, value) for kind, value in ReportIndicator.objects.filter(report_id=report_id).values_list('kind', 'value')
+        if links_cases(kind, value)
+    }
+    if not indicators:
+        return []
+    matches = Q()
+    for kind, value in indicators:
+        matches |= Q(kind=kind, value=value)
+    others = (
+        ReportIndicator.objects.filter(matches, report__status__in=CrimeReport.OPEN_STATUSES)
+        .exclude(report_id=report_id).order_by().values_list('report_id', flat=True).distinct()
+    )
+    return list(others[:limit or settings.PRIORITY_LINKED_RESCORE_LIMIT])
+
+
+def queue_linked_rescore(report_ids):
+    """Queues the open cases linked to ``report_ids`` for rescoring by run_worker."""
+    PendingRescore.objects.bulk_create(
+        [PendingRescore(report_id=report_id) for report_id in report_ids], ignore_conflicts=True,
+    )
+
+
+def process_linked_rescores(batch_size=None):
+    """Rescores the open cases linked to up to ``batch_size`` queued reports.
+    Returns (reports taken from the queue, cases rescored)."""
+    report_ids = list(
+        PendingRescore.objects.order_by('queued_on')
+        .values_list('report_id', flat=True)[:batch_size or settings.PRIORITY_RESCORE_BATCH_SIZE]
+    )
+    if not report_ids:
+        return 0, 0
+    # Taken off the queue first, so a report queued again meanwhile stays
+    # queued; two workers taking the same rows just score the same cases twice
+    PendingRescore.objects.filter(report_id__in=report_ids).delete()
+    linked = set()
+    for report_id in report_ids:
+        linked.update(linked_open_reports(report_id))
+    score_reports(sorted(linked))
+    return len(report_ids), len(linked)
+
+
+def rescore_open(log=None):
+    """Rescores every open case (and any closed one still holding a priority).
+    Returns the number of cases scored."""
+    report_ids = list(
+        CrimeReport.objects.filter(Q(status__in=CrimeReport.OPEN_STATUSES) | Q(priority__gt=0))
+        .order_by('id').values_list('id', flat=True)
+    )
+    for start in range(0, len(report_ids), settings.PRIORITY_BATCH_SIZE):
+        _score_batch(report_ids[start:start + settings.PRIORITY_BATCH_SIZE])
+        if log:
+            log(f'Scored {min(start + settings.PRIORITY_BATCH_SIZE, len(report_ids))}/{len(report_ids)} cases')
+    return len(report_ids)
+
+
+def work_queue(user, limit=None, queryset=None):
+    """The open cases assigned to ``user`` (unassigned ones for None), highest
+    priority first: one range of the report_queue_idx index."""
+    queryset = CrimeReport.objects.all() if queryset is None else queryset
+    return (
+        queryset.filter(assigned_to=user, priority__gt=0)
+        .order_by('-priority', '-reported_on')[:limit or settings.PRIORITY_QUEUE_SIZE]
+    )
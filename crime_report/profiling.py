@@ -0,0 +1,201 @@
+"""Per-request instrumentation used by ``ProfilingMiddleware``.
+
+While a request is being profiled, the active ``RequestProfile`` lives in a
+context variable; the SQL, template and cache hooks installed by
+``install_hooks()`` only record into it and otherwise just pass through, so
+unsampled requests pay a single context-variable lookup per hook.
+"""
+import contextvars
+import functools
+import math
+import threading
+import time
+from collections import deque
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db.backends.signals import connection_created
+from django.db import connections
+from django.template.backends.django import Template
+
+# Upper bounds (ms) of the wall-time histogram buckets
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, math.inf)
+
+_current = contextvars.ContextVar('crime_report_profile', default=None)
+_MISSING = object()
+_hooks_installed = False
+
+
+class RequestProfile:
+    __slots__ = ('started', 'wall', 'sql_count', 'sql_time', 'template_time',
+                 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+
+
+def start_profile():
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def stop_profile(profile, token):
+    profile.finish()
+    _current.reset(token)
+
+
+class ProfileStore:
+    """Rolling window of request profiles per URL name (process-local)."""
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, view_name, profile):
+        sample = (profile.wall, profile.sql_count, profile.sql_time, profile.template_time,
+                  profile.cache_hits, profile.cache_misses)
+        with self._lock:
+            samples = self._samples.get(view_name)
+            if samples is None:
+                samples = self._samples[view_name] = deque(maxlen=self.window)
+            samples.append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        return {name: _summarize(samples) for name, samples in sorted(snapshot.items())}
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _summarize(samples):
+    count = len(samples)
+    walls = sorted(sample[0] * 1000 for sample in samples)
+    cache_hits = sum(sample[4] for sample in samples)
+    cache_lookups = cache_hits + sum(sample[5] for sample in samples)
+
+    histogram = {}
+    for bound in HISTOGRAM_BUCKETS:
+        histogram['+Inf' if bound is math.inf else f'{bound}'] = 0
+    for wall in walls:
+        for bound in HISTOGRAM_BUCKETS:
+            if wall <= bound:
+                histogram['+Inf' if bound is math.inf else f'{bound}'] += 1
+                break
+
+    return {
+        'requests': count,
+        'wall_ms': {
+            'mean': round(sum(walls) / count, 2),
+            'p50': round(_percentile(walls, 50), 2),
+            'p95': round(_percentile(walls, 95), 2),
+            'p99': round(_percentile(walls, 99), 2),
+            'max': round(walls[-1], 2),
+        },
+        'sql_queries_mean': round(sum(sample[1] for sample in samples) / count, 2),
+        'sql_ms_mean': round(sum(sample[2] for sample in samples) * 1000 / count, 2),
+        'template_ms_mean': round(sum(sample[3] for sample in samples) * 1000 / count, 2),
+        'cache_hit_ratio': round(cache_hits / cache_lookups, 3) if cache_lookups else None,
+        'wall_ms_histogram': histogram,
+    }
+
+
+def _sql_timer(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_time += time.perf_counter() - start
+        profile.sql_count += 1
+
+
+def _add_sql_timer(sender, connection, **kwargs):
+    if _sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_timer)
+
+
+def _wrap_template_render(render):
+    @functools.wraps(render)
+    def timed_render(self, *args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.template_time += time.perf_counter() - start
+    return timed_render
+
+
+def _wrap_cache_get(get):
+    @functools.wraps(get)
+    def counted_get(self, key, default=None, version=None):
+        profile = _current.get()
+        if profile is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+    return counted_get
+
+
+def _wrap_cache_get_many(get_many):
+    @functools.wraps(get_many)
+    def counted_get_many(self, keys, version=None):
+        profile = _current.get()
+        if profile is None:
+            return get_many(self, keys, version=version)
+        keys = list(keys)
+        values = get_many(self, keys, version=version)
+        profile.cache_hits += len(values)
+        profile.cache_misses += len(keys) - len(values)
+        return values
+    return counted_get_many
+
+
+def install_hooks():
+    """Hook SQL execution, template rendering and cache lookups (once per process)."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    connection_created.connect(_add_sql_timer, dispatch_uid='crime_report_profiling')
+    for connection in connections.all(initialized_only=True):
+        _add_sql_timer(None, connection)
+
+    Template.render = _wrap_template_render(Template.render)
+
+    patched = set()
+    for alias in caches:
+        backend_class = type(caches[alias])
+        if backend_class in patched:
+            continue
+        backend_class.get = _wrap_cache_get(backend_class.get)
+        # BaseCache.get_many() goes through get(), so only wrap native implementations
+        if backend_class.get_many is not BaseCache.get_many:
+            backend_class.get_many = _wrap_cache_get_many(backend_class.get_many)
+        patched.add(backend_class)
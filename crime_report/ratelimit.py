@@ -0,0 +1,153 @@
+"""Token-bucket rate limiting for abuse-prone endpoints.
+
+Each scope in ``RATELIMITS`` names the methods it counts and a
+``(requests, seconds)`` budget per client IP, per signed-in user and/or per
+account named in the submitted form: a bucket holds ``requests`` tokens and
+refills one every ``seconds / requests``. Buckets are ``RateLimitBucket`` rows
+in the database, so every worker on every host shares them, holding a single
+float, the time at which the bucket will be full again (the GCRA form of a
+token bucket). Taking tokens is one conditional UPDATE per bucket, so
+concurrent requests cannot both spend the last token, and a row is only
+deleted once its bucket is full again.
+
+A request costs one token unless the view says otherwise: a batch request
+costs one per item it creates, so batching does not multiply the budget.
+"""
+import asyncio
+import hashlib
+import ipaddress
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .error_handlers import handle_429
+from .models import RateLimitBucket
+
+
+def client_ip(request):
+    """The client address, with IPv6 clients grouped by their /64 network."""
+    ip = request.META.get(settings.RATELIMIT_IP_META) or ''
+    if ':' in ip:
+        try:
+            return str(ipaddress.ip_network(f'{ip}/64', strict=False).network_address)
+        except ValueError:
+            pass
+    return ip
+
+
+def _account(request):
+    """A digest of the account the request names (e.g. the login form's
+    username), or None when it names none."""
+    name = request.POST.get(settings.RATELIMIT_ACCOUNT_FIELD, '').strip().lower()
+    return hashlib.sha256(name.encode()).hexdigest()[:32] if name else None
+
+
+def _buckets(request, scope, rule):
+    """[(bucket key, requests, seconds)] for the buckets ``request`` draws from."""
+    buckets = []
+    user = request.user
+    if 'user' in rule and user.is_authenticated:
+        buckets.append((f'rl:{scope}:u:{user.pk}', *rule['user']))
+    elif 'user' in rule and 'ip' not in rule:
+        # Signed-out clients of a per-user scope are counted by address instead
+        buckets.append((f'rl:{scope}:i:{client_ip(request)}', *rule['user']))
+    if 'ip' in rule:
+        buckets.append((f'rl:{scope}:i:{client_ip(request)}', *rule['ip']))
+    if 'account' in rule and (account := _account(request)):
+        # Guessing one account's password from many addresses
+        buckets.append((f'rl:{scope}:a:{account}', *rule['account']))
+    return buckets
+
+
+def _take(cursor, key, seconds, refill, now):
+    """Takes the tokens that ``refill`` seconds replace from the bucket ``key``
+    of a ``seconds`` period. Returns None when taken, else the seconds until
+    they would be."""
+    # Taking a token moves the "full again" time one interval later; the
+    # bucket is empty once that is more than a whole period away
+    limit = now + seconds - refill
+    if limit < now:
+        return refill - seconds
+    # Plain SQL: building the equivalent ORM queries costs several times the
+    # round trip itself
+    quote = connection.ops.quote_name
+    table, key_column = quote(RateLimitBucket._meta.db_table), quote('key')
+    cursor.execute(
+        f'UPDATE {table} SET full_at = (CASE WHEN full_at > %s THEN full_at ELSE %s END) + %s '
+        f'WHERE {key_column} = %s AND full_at <= %s',
+        [now, now, refill, key, limit],
+    )
+    if cursor.rowcount:
+        return None
+    cursor.execute(f'SELECT full_at FROM {table} WHERE {key_column} = %s', [key])
+    row = cursor.fetchone()
+    if row:
+        return row[0] - limit
+    # A missing row is a full bucket
+    try:
+        with transaction.atomic():
+            cursor.execute(f'INSERT INTO {table} ({key_column}, full_at) VALUES (%s, %s)', [key, now + refill])
+    except IntegrityError:
+        # Created by a concurrent request since
+        return _take(cursor, key, seconds, refill, now)
+    cursor.execute(f'DELETE FROM {table} WHERE full_at < %s', [now])
+    return None
+
+
+def check(request, scope, cost=1):
+    """Takes ``cost`` tokens from each of the request's buckets for ``scope``.
+    Returns None when allowed, else the seconds until a retry would be (a
+    rejected request takes no tokens). A cost above a bucket's size is never
+    allowed."""
+    rule = settings.RATELIMITS[scope]
+    if request.method not in rule.get('methods', ('GET', 'POST')):
+        return None
+    now = time.time()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for key, requests, seconds in _buckets(request, scope, rule):
+            retry_after = _take(cursor, key, seconds, seconds / requests * cost, now)
+            if retry_after:
+                # Give back the tokens already taken from the other buckets
+                transaction.set_rollback(True)
+                return retry_after
+    return None
+
+
+def _limited(request, retry_after):
+    response = handle_429(request)
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def _cost(request, cost):
+    return cost(request) if callable(cost) else cost
+
+
+def ratelimit(scope, cost=1):
+    """Answers 429 with Retry-After once ``scope``'s budget for the client runs out.
+    ``cost`` is the tokens a request takes, or a function of the request
+    returning them."""
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                if settings.RATELIMIT_ENABLED:
+                    # Resolving request.user touches the session and database
+                    retry_after = await sync_to_async(check)(request, scope, _cost(request, cost))
+                    if retry_after:
+                        return await sync_to_async(_limited)(request, retry_after)
+                return await view_func(request, *args, **kwargs)
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                if settings.RATELIMIT_ENABLED:
+                    retry_after = check(request, scope, _cost(request, cost))
+                    if retry_after:
+                        return _limited(request, retry_after)
+                return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
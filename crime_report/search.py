@@ -0,0 +1,112 @@
+"""Full-text search over report and update text, for the admin changelists.
+
+On SQLite, each indexed table gets an FTS5 index that stores no copy of the
+text (an "external content" table over the model's own table), kept current
+by triggers. The triggers see every write, raw SQL included. Django drops a
+table's triggers when it rebuilds the table in a migration, so ``install`` runs
+after every ``migrate``. It recreates whatever is missing and refills the
+indexes that went without triggers; ``manage.py seed`` drops them on purpose
+and calls it once the data is in.
+
+Other databases have no index here; ``matching`` returns None for them and
+callers fall back to their LIKE search.
+"""
+import logging
+import re
+
+from django.apps import apps
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Model label: indexed columns
+INDEXES = {
+    'crime_report.CrimeReport': ('title', 'description'),
+    'crime_report.CrimeUpdate': ('update_text',),
+}
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tables(model):
+    table = model._meta.db_table
+    return table, f'{table}_fts'
+
+
+def _triggers(model):
+    """{trigger name: CREATE TRIGGER statement} for ``model``'s index."""
+    table, fts = _tables(model)
+    columns = INDEXES[model._meta.label]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});'
+    return {
+        f'{fts}_insert': f'CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END',
+        f'{fts}_delete': f'CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END',
+        f'{fts}_update': f'CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END',
+    }
+
+
+def install(using='default'):
+    """Creates the missing indexes and triggers, and refills every index that was
+    created or missed a trigger. Returns the labels of the models refilled."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return []
+    refilled = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for label, columns in INDEXES.items():
+            model = apps.get_model(label)
+            table, fts = _tables(model)
+            if table not in existing:
+                continue
+            triggers = _triggers(model)
+            if fts in existing and existing.issuperset(triggers):
+                continue
+            if fts not in existing:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, "
+                    f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+                )
+            for name, statement in triggers.items():
+                if name not in existing:
+                    cursor.execute(statement)
+            # Writes made while a trigger was missing are not in the index
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            refilled.append(label)
+    for label in refilled:
+        logger.info(f"Rebuilt the full-text index of {label}")
+    return refilled
+
+
+def drop_triggers(using='default'):
+    """Drops the triggers, for bulk loads that index everything at once with
+    ``install`` afterwards."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for label in INDEXES:
+            for name in _triggers(apps.get_model(label)):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def fts_query(term):
+    """An FTS5 query for ``term``: every word, as a prefix, in any indexed column.
+    Returns '' for a term without words."""
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(term))
+
+
+def matching(model, term, using='default'):
+    """SQL selecting the ids of ``model`` rows whose text has every word of ``term``
+    (words match as prefixes, as the admin's search matches substrings), as
+    (sql, params) for ``id__in=RawSQL(...)``. None where the database has no
+    index, or the term no words."""
+    query = fts_query(term)
+    if connections[using].vendor != 'sqlite' or model._meta.label not in INDEXES or not query:
+        return None
+    fts = _tables(model)[1]
+    return f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [query]
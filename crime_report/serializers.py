@@ -0,0 +1,169 @@
+"""Serializers for the JSON API (crime_report.api).
+
+Serializers built with ``fields`` keep only those fields, and ``expand`` swaps
+the listed relations' ids for embedded objects; ``api.ReportViewSet`` loads
+just the relations that end up in the response.
+"""
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+from .models import CrimeCategory, CrimeReport, CrimeUpdate, Location, normalize_place_name
+from .permissions import is_staff_role
+
+
+class SparseFieldsMixin:
+    """Accepts ``fields`` (names to keep) and ``expand`` (names from ``expandable``
+    to embed) keyword arguments. ``optional`` fields appear only when expanded."""
+    expandable = {}
+    optional = ()
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.optional:
+            if name not in expand:
+                self.fields.pop(name, None)
+        for name in expand:
+            if name in self.expandable:
+                self.fields[name] = self.expandable[name]()
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CrimeCategory
+        fields = ('id', 'name', 'description', 'severity')
+
+
+class LocationSerializer(serializers.Serializer):
+    """A place as state/city/area/pincode names; saving reuses the existing rows."""
+    id = serializers.IntegerField(read_only=True)
+    state = serializers.CharField(max_length=100)
+    city = serializers.CharField(max_length=100)
+    area = serializers.CharField(max_length=100)
+    pincode = serializers.RegexField(r'^\d{6}$', max_length=6,
+                                     error_messages={'invalid': 'Pincode must be 6 digits'})
+    latitude = serializers.FloatField(read_only=True)
+    longitude = serializers.FloatField(read_only=True)
+
+    def to_representation(self, location):
+        # Needs location__city__state, location__area and location__pincode loaded
+        return {
+            'id': location.id,
+            'state': location.city.state.name,
+            'city': location.city.name,
+            'area': location.area.name,
+            'pincode': location.pincode.code,
+            'latitude': location.pincode.latitude,
+            'longitude': location.pincode.longitude,
+        }
+
+    def validate(self, attrs):
+        for field in ('state', 'city', 'area'):
+            attrs[field] = normalize_place_name(attrs[field])
+        return attrs
+
+    def create(self, validated_data):
+        return Location.objects.resolve(**validated_data)
+
+
+class LocationField(serializers.PrimaryKeyRelatedField):
+    """A location id, or a new place as a LocationSerializer object, which is
+    resolved when the report is saved."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            location = LocationSerializer(data=data)
+            location.is_valid(raise_exception=True)
+            return location
+        return super().to_internal_value(data)
+
+
+class UpdateSerializer(serializers.ModelSerializer):
+    report = serializers.PrimaryKeyRelatedField(source='crime_report', queryset=CrimeReport.objects.all())
+    updated_by = serializers.SlugRelatedField(slug_field='username', read_only=True)
+
+    class Meta:
+        model = CrimeUpdate
+        fields = ('id', 'report', 'update_text', 'updated_by', 'updated_on')
+        read_only_fields = ('updated_on',)
+
+    def validate_report(self, report):
+        user = self.context['request'].user
+        # Police and admins see every report, so only others need the query
+        if not is_staff_role(user) and not CrimeReport.objects.visible_to(user).filter(pk=report.pk).exists():
+            raise serializers.ValidationError('No such report.')
+        return report
+
+
+class ReportFilterSerializer(serializers.Serializer):
+    """Query parameters filtering the report list."""
+    status = serializers.ChoiceField(choices=CrimeReport.STATUS_CHOICES, required=False)
+    category = serializers.IntegerField(required=False)
+    city = serializers.CharField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+
+class ReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = serializers.PrimaryKeyRelatedField(queryset=CrimeCategory.objects.all())
+    location = LocationField(queryset=Location.objects.all())
+    reported_by = serializers.SlugRelatedField(slug_field='username', read_only=True)
+    assigned_to = serializers.SlugRelatedField(
+        slug_field='username',
+        queryset=User.objects.filter(profile__user_type__in=['police', 'admin']),
+        required=False,
+        allow_null=True,
+    )
+    updates = UpdateSerializer(many=True, read_only=True)
+
+    expandable = {
+        'category': lambda: CategorySerializer(read_only=True),
+        'location': lambda: LocationSerializer(read_only=True),
+    }
+    optional = ('updates',)
+
+    class Meta:
+        model = CrimeReport
+        fields = (
+            'id', 'title', 'description', 'date_of_crime', 'time_of_crime', 'status', 'category',
+            'location', 'reported_by', 'reported_on', 'assigned_to', 'priority', 'updates',
+        )
+        read_only_fields = ('reported_on', 'priority')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        # Citizens file reports; only police and admins triage them
+        if request is not None and not is_staff_role(request.user):
+            for name in ('status', 'assigned_to'):
+                if name in self.fields:
+                    self.fields[name].read_only = True
+
+    def validate(self, attrs):
+        values = {name: value for name, value in attrs.items() if name != 'location'}
+        report = CrimeReport(**{**self._current_values(), **values})
+        try:
+            report.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        return attrs
+
+    def _current_values(self):
+        if self.instance is None or not isinstance(self.instance, CrimeReport):
+            return {}
+        return {'date_of_crime': self.instance.date_of_crime, 'assigned_to': self.instance.assigned_to}
+
+    def _resolve_location(self, validated_data):
+        location = validated_data.get('location')
+        if isinstance(location, LocationSerializer):
+            validated_data['location'] = location.save()
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self._resolve_location(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self._resolve_location(validated_data))
@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, post_migrate
 from django.contrib.auth.models import User
-from django.dispatch import receiver
-from .models import UserProfile
+from django.dispatch import receiver, Signal
+from django.utils import timezone
+from .models import (
+    UserProfile, CrimeReport, CrimeUpdate, CrimeCategory, State, City, Area, Pincode, Location, DataVersion,
+    ArchivedReport,
+)
+from . import archive, counters, detection, inbox, iocs, notifications, priority, search
+from .events import hub, report_event
+from .geo import pincode_centroid, pincode_index
+from .http_cache import CRIME_DATA, USER_DATA
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -13,3 +22,155 @@ def save_user_profile(sender, instance, **kwargs):
     if not hasattr(instance, 'profile'):
         UserProfile.objects.create(user=instance)
     instance.profile.save()
+
+@receiver(post_save, sender=User)
+def count_new_user(sender, instance, created, **kwargs):
+    if created:
+        counters.user_joined(instance)
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    counters.user_left(instance)
+
+# Sent after bulk status/assignment changes, which bypass post_save
+reports_bulk_updated = Signal()
+
+@receiver(post_save, sender=CrimeReport)
+def publish_report_event(sender, instance, created, **kwargs):
+    event = report_event('report_created' if created else 'report_updated', instance)
+    transaction.on_commit(lambda: hub.publish([event]))
+
+@receiver(post_save, sender=CrimeUpdate)
+def publish_update_event(sender, instance, created, **kwargs):
+    if not created:
+        return
+    event = report_event('update_created', instance.crime_report, update_id=instance.id)
+    transaction.on_commit(lambda: hub.publish([event]))
+
+@receiver(post_save, sender=CrimeReport)
+def index_report_text(sender, instance, created, raw=False, **kwargs):
+    # Status and assignment changes leave the text, and so the indexes, as they were
+    if raw or not (created or instance.text_changed()):
+        return
+    detection.index_report(instance)
+    iocs.index_report(instance)
+    instance._loaded_text = (instance.title, instance.description)
+    # Cases sharing its indicators now have another linked report
+    priority.queue_linked_rescore([instance.id])
+
+@receiver(pre_save, sender=CrimeReport)
+def extract_reported_amount(sender, instance, **kwargs):
+    if instance.pk is None or instance.text_changed():
+        instance.reported_amount = priority.extract_amount(instance.description)
+
+@receiver(post_save, sender=CrimeReport)
+def score_report(sender, instance, **kwargs):
+    # After index_report_text, so its indicators are current
+    instance.priority = priority.score_reports([instance.id])[instance.id]
+
+@receiver(post_save, sender=CrimeReport)
+def file_assigned_report(sender, instance, created, **kwargs):
+    # Before count_saved_report, which replaces the state the report was loaded with
+    before = {'assigned_to_id': None} if created else getattr(instance, '_loaded_counted', None) or {}
+    if 'assigned_to_id' not in before or before['assigned_to_id'] != instance.assigned_to_id:
+        inbox.assign([instance.id], instance.assigned_to_id, timezone.now())
+
+@receiver(post_save, sender=CrimeReport)
+def count_saved_report(sender, instance, created, **kwargs):
+    counters.report_saved(instance, created)
+
+@receiver(post_delete, sender=CrimeReport)
+@receiver(post_delete, sender=ArchivedReport)
+def count_deleted_report(sender, instance, **kwargs):
+    # Archived cases still count; archive_batch deletes them from the live tables
+    if not archive.is_archiving():
+        counters.report_deleted(instance)
+
+@receiver(pre_delete, sender=CrimeReport)
+def clear_inbox_items(sender, instance, **kwargs):
+    inbox.report_deleted(instance)
+
+@receiver(post_save, sender=CrimeUpdate)
+def index_update_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        iocs.index_update(instance)
+
+@receiver(post_save, sender=CrimeUpdate)
+def score_updated_report(sender, instance, created, **kwargs):
+    if created:
+        priority.score_reports([instance.crime_report_id])
+
+@receiver(post_save, sender=CrimeUpdate)
+def mark_update_unread(sender, instance, created, **kwargs):
+    if created:
+        inbox.record_updates([instance])
+
+@receiver(post_save, sender=CrimeUpdate)
+def queue_update_notification(sender, instance, created, raw=False, **kwargs):
+    # Written in the update's transaction; run_worker sends it later
+    if created and not raw:
+        notifications.enqueue([instance])
+
+@receiver(reports_bulk_updated, sender=CrimeReport)
+def publish_bulk_events(sender, report_ids, updates, **kwargs):
+    update_ids = {update.crime_report_id: update.id for update in updates}
+    for start in range(0, len(report_ids), 500):
+        reports = CrimeReport.objects.filter(
+            id__in=report_ids[start:start + 500]
+        ).only('id', 'title', 'status', 'reported_by_id', 'assigned_to_id')
+        hub.publish([
+            report_event('report_updated', report, update_id=update_ids.get(report.id))
+            for report in reports
+        ])
+
+@receiver([post_save, post_delete], sender=CrimeReport)
+@receiver([post_save, post_delete], sender=CrimeUpdate)
+@receiver([post_save, post_delete], sender=CrimeCategory)
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=State)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Area)
+@receiver([post_save, post_delete], sender=Pincode)
+def bump_crime_data_version(sender, **kwargs):
+    # archive_batch bumps once per batch rather than once per row
+    if not archive.is_archiving():
+        DataVersion.bump(CRIME_DATA)
+
+@receiver(reports_bulk_updated, sender=CrimeReport)
+def bump_crime_data_version_bulk(sender, **kwargs):
+    DataVersion.bump(CRIME_DATA)
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def bump_user_data_version(sender, **kwargs):
+    # Every login saves last_login, which no cached fragment shows
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    DataVersion.bump(USER_DATA)
+
+@receiver(pre_save, sender=Pincode)
+def locate_pincode(sender, instance, **kwargs):
+    if instance.latitude is None and instance.longitude is None:
+        centroid = pincode_centroid(instance.code)
+        if centroid:
+            instance.latitude, instance.longitude = centroid
+
+@receiver(post_save, sender=Location)
+def index_new_location(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: pincode_index.add(instance))
+
+@receiver(post_delete, sender=Location)
+@receiver([post_save, post_delete], sender=State)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Area)
+def reset_pincode_index(sender, created=False, **kwargs):
+    # Renames and deletions are rare (admin only); reload on the next lookup
+    if not created:
+        pincode_index.clear()
+
+@receiver(post_migrate)
+def install_search_indexes(sender, using, **kwargs):
+    # Rebuilding a table in a migration drops its triggers; put them back
+    if sender.name == 'crime_report':
+        search.install(using)
@@ -0,0 +1,189 @@
+"""WSGI and ASGI middleware serving collected static files ahead of Django.
+
+``STATIC_ROOT`` is indexed once at startup, so restart the workers after
+``collectstatic``. Content-hashed files listed in ``staticfiles.json`` get
+far-future immutable caching; anything else is revalidated with its ETag.
+Precompressed ``.br``/``.gz`` variants written by
+``crime_report.storage.CompressedManifestStaticFilesStorage`` are picked from
+the request's Accept-Encoding.
+"""
+import asyncio
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.http import http_date
+
+BLOCK_SIZE = 64 * 1024
+
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('font/ttf', '.ttf')
+
+
+class StaticFile:
+    __slots__ = ('path', 'size', 'content_type', 'etag', 'last_modified', 'cache_control', 'variants')
+
+    def __init__(self, path, immutable):
+        stat = path.stat()
+        self.path = path
+        self.size = stat.st_size
+        content_type, _ = mimetypes.guess_type(path.name)
+        self.content_type = content_type or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type in (
+                'application/javascript', 'text/javascript', 'application/json', 'image/svg+xml'):
+            self.content_type += '; charset=utf-8'
+        self.etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        self.last_modified = http_date(stat.st_mtime)
+        if immutable:
+            self.cache_control = f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+        else:
+            self.cache_control = 'public, no-cache'
+        # encoding -> (path, size)
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                self.variants[encoding] = (variant, variant.stat().st_size)
+
+
+class StaticFilesApplication:
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = Path(root or settings.STATIC_ROOT)
+        self.prefix = prefix or settings.STATIC_URL
+        if not self.prefix.startswith('/'):
+            # Static files are on another host or a CDN; nothing to serve here
+            self.files = {}
+        else:
+            self.prefix = '/' + self.prefix.strip('/') + '/'
+            self.files = self._scan()
+
+    def _scan(self):
+        if not self.root.is_dir():
+            return {}
+        hashed = set()
+        manifest = self.root / 'staticfiles.json'
+        if manifest.is_file():
+            with open(manifest) as fh:
+                hashed = set(json.load(fh).get('paths', {}).values())
+
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(suffixes) or filename == 'staticfiles.json':
+                    continue
+                path = Path(dirpath) / filename
+                name = path.relative_to(self.root).as_posix()
+                files[self.prefix + name] = StaticFile(path, immutable=name in hashed)
+        return files
+
+    def _respond(self, path_info, method, accept_encoding, if_none_match):
+        """(status, headers, file to send or None) for a request, or None when it
+        is not for a static file."""
+        static_file = self.files.get(path_info)
+        if static_file is None or method not in ('GET', 'HEAD'):
+            return None
+
+        headers = [
+            ('Cache-Control', static_file.cache_control),
+            ('Last-Modified', static_file.last_modified),
+        ]
+        if static_file.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        path, size, etag = static_file.path, static_file.size, static_file.etag
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in static_file.variants:
+                path, size = static_file.variants[encoding]
+                etag = f'{etag[:-1]}-{encoding}"'
+                headers.append(('Content-Encoding', encoding))
+                break
+        headers.append(('ETag', etag))
+
+        if etag in if_none_match:
+            return '304 Not Modified', headers, None
+
+        headers += [('Content-Type', static_file.content_type), ('Content-Length', str(size))]
+        return '200 OK', headers, None if method == 'HEAD' else path
+
+    def __call__(self, environ, start_response):
+        response = self._respond(
+            environ.get('PATH_INFO', ''), environ.get('REQUEST_METHOD'),
+            environ.get('HTTP_ACCEPT_ENCODING', ''), environ.get('HTTP_IF_NONE_MATCH', ''),
+        )
+        if response is None:
+            return self.application(environ, start_response)
+        status, headers, path = response
+        start_response(status, headers)
+        if path is None:
+            return []
+        fh = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(fh, BLOCK_SIZE)
+        return _read_blocks(fh)
+
+
+class ASGIStaticFilesApplication(StaticFilesApplication):
+    """The same, in front of an ASGI application (cybercell.asgi)."""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.application(scope, receive, send)
+        # The path below the mount point, as WSGI's PATH_INFO
+        path_info = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path_info.startswith(root_path):
+            path_info = path_info[len(root_path):]
+        request_headers = {name: value.decode('latin-1') for name, value in scope['headers']}
+        response = self._respond(
+            path_info, scope['method'],
+            request_headers.get(b'accept-encoding', ''), request_headers.get(b'if-none-match', ''),
+        )
+        if response is None:
+            return await self.application(scope, receive, send)
+
+        status, headers, path = response
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split()[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        if path is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        with open(path, 'rb') as fh:
+            while True:
+                # Off the event loop; the file may not be in the page cache
+                block = await asyncio.to_thread(fh.read, BLOCK_SIZE)
+                more = len(block) == BLOCK_SIZE
+                await send({'type': 'http.response.body', 'body': block, 'more_body': more})
+                if not more:
+                    break
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _read_blocks(fh):
+    with fh:
+        while True:
+            block = fh.read(BLOCK_SIZE)
+            if not block:
+                break
+            yield block
@@ -0,0 +1,87 @@
+"""Static files storage used by ``collectstatic``.
+
+On top of ``ManifestStaticFilesStorage`` (content-hashed names plus
+``staticfiles.json``) it concatenates the ``STATIC_BUNDLES`` before hashing and
+writes gzip (and brotli, when the ``brotli`` package is installed) variants next
+to every hashed file, for ``crime_report.static_handler`` to serve.
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vendored files ship with source map comments whose .map files we do not collect
+SOURCE_MAP_RE = re.compile(rb'^\s*(?://|/\*)# sourceMappingURL=.*$', re.MULTILINE)
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.ttf', '.eot', '.html', '.xml')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def url(self, name, force=False):
+        # Until collectstatic has written a manifest (development, test runs) use
+        # the source names instead of failing on every {% static %} tag
+        if not self.hashed_files and not force:
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        missing = [path for path in settings.STATIC_VENDOR_ASSETS if path not in paths]
+        if missing:
+            raise ValueError(
+                f"{len(missing)} vendored file(s) were not collected, e.g. '{missing[0]}'. "
+                f"Run 'python manage.py vendor_static' to download the vendored libraries."
+            )
+        for name, sources in settings.STATIC_BUNDLES.items():
+            self._build_bundle(name, sources)
+            paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        for hashed_name in set(self.hashed_files.values()):
+            self._compress(hashed_name)
+
+    def _build_bundle(self, name, sources):
+        separator = b'\n;\n' if name.endswith('.js') else b'\n'
+        parts = []
+        for source in sources:
+            if not self.exists(source):
+                raise ValueError(
+                    f"Bundle '{name}' needs '{source}', which was not collected. "
+                    f"Run 'python manage.py vendor_static' to download the vendored libraries."
+                )
+            with self.open(source) as fh:
+                parts.append(SOURCE_MAP_RE.sub(b'', fh.read()).strip())
+        self._replace(name, separator.join(parts) + b'\n')
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as fh:
+            content = fh.read()
+        if len(content) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return
+
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+        for suffix, compressed in variants.items():
+            # Not worth a second lookup on the serving side unless it saves 5%
+            if len(compressed) < len(content) * 0.95:
+                self._replace(name + suffix, compressed)
+
+    def _replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
@@ -0,0 +1,178 @@
+"""Streaming response formats for the report and stats APIs, chosen through ``Accept``.
+
+* ``application/x-ndjson``: one JSON object per line.
+* ``application/vnd.msgpack`` (the registered type; ``application/msgpack`` and
+  ``application/x-msgpack`` are accepted too, and answered with the type asked
+  for) when ``msgpack`` is installed: a sequence of
+  MessagePack maps ``{'columns': [...], 'rows': n, 'data': [[column values], ...]}``,
+  one per ``STREAM_BATCH_SIZE`` rows. Column-wise batches repeat no keys, so
+  they are much smaller than JSON; read them with ``msgpack.Unpacker``.
+
+Rows come from ``values_list(...).iterator()``, so neither format holds the
+whole result in memory, unlike ``JsonResponse``.
+"""
+import datetime
+import decimal
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer
+
+from .geo import reports_by_city
+from .models import CrimeCategory, CrimeReport
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+NDJSON = 'application/x-ndjson'
+MSGPACK = 'application/x-msgpack'
+# Every name MessagePack goes by
+MSGPACK_TYPES = ('application/vnd.msgpack', 'application/msgpack', MSGPACK)
+
+# The crime_stats_api series as flat rows; ``state`` is only set for cities
+STATS_COLUMNS = ('series', 'label', 'state', 'count')
+
+
+def available_formats():
+    return [NDJSON, *MSGPACK_TYPES] if msgpack is not None else [NDJSON]
+
+
+def negotiate(request):
+    """The streaming media type ``request`` accepts, or None for plain JSON.
+    The first supported type listed in Accept wins."""
+    available = available_formats()
+    for media_type in request.META.get('HTTP_ACCEPT', '').split(','):
+        media_type = media_type.split(';')[0].strip().lower()
+        if media_type in available:
+            return media_type
+    return None
+
+
+def _encode(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f'Cannot encode {type(value).__name__}')
+
+
+def _batches(rows):
+    rows = iter(rows)
+    while batch := list(islice(rows, settings.STREAM_BATCH_SIZE)):
+        yield batch
+
+
+def _ndjson_chunks(columns, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for batch in _batches(rows):
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in batch)
+
+
+def _msgpack_chunks(columns, rows):
+    for batch in _batches(rows):
+        yield msgpack.packb(
+            {'columns': list(columns), 'rows': len(batch), 'data': [list(values) for values in zip(*batch)]},
+            default=_encode,
+        )
+
+
+async def _async_chunks(chunks):
+    # The rows come from a database cursor, which must stay on one thread
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def stream_rows(request, media_type, columns, rows):
+    """StreamingHttpResponse encoding ``rows`` (tuples matching ``columns``) as
+    ``media_type``, one batch per chunk."""
+    if media_type in MSGPACK_TYPES:
+        chunks = _msgpack_chunks(columns, rows)
+    else:
+        chunks = _ndjson_chunks(columns, rows)
+    # Under ASGI a sync iterator would be consumed completely before sending
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=media_type)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def stats_rows():
+    """The crime_stats_api series as STATS_COLUMNS rows, one query per series,
+    run as the stream reaches it."""
+    categories = CrimeCategory.objects.annotate(count=Count('crimereport')).values_list('name', 'count')
+    for name, count in categories.iterator():
+        yield ('crime_by_category', name, None, count)
+
+    for row in reports_by_city():
+        yield ('crime_by_location', row['city'], row['state'], row['count'])
+
+    counts = dict(CrimeReport.objects.order_by().values_list('status').annotate(count=Count('id')))
+    for status, label in CrimeReport.STATUS_CHOICES:
+        yield ('crime_by_status', label, None, counts.get(status, 0))
+
+    # Last 12 months, oldest first
+    now = timezone.now()
+    months = [((now.year * 12 + now.month - 1 - i) // 12, (now.month - 1 - i) % 12 + 1) for i in range(11, -1, -1)]
+    first_year, first_month = months[0]
+    start = now.replace(year=first_year, month=first_month, day=1, hour=0, minute=0, second=0, microsecond=0)
+    rows = (
+        CrimeReport.objects.filter(reported_on__gte=start)
+        .annotate(month=TruncMonth('reported_on')).order_by().values_list('month').annotate(count=Count('id'))
+    )
+    month_counts = {(month.year, month.month): count for month, count in rows.iterator()}
+    for year, month in months:
+        yield ('crime_by_month', f'{year}-{month:02d}', None, month_counts.get((year, month), 0))
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Lets DRF views accept NDJSON; non-streamed data (a single object, errors)
+    is rendered as one line, or one line per item for a list."""
+    media_type = NDJSON
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(item, cls=DjangoJSONEncoder) + '\n' for item in items).encode()
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode)
+
+
+class VndMessagePackRenderer(MessagePackRenderer):
+    media_type = 'application/vnd.msgpack'
+
+
+class PlainMessagePackRenderer(MessagePackRenderer):
+    media_type = 'application/msgpack'
+
+
+def renderer_classes():
+    """The streaming renderers DRF can negotiate here."""
+    if msgpack is None:
+        return [NDJSONRenderer]
+    return [NDJSONRenderer, VndMessagePackRenderer, PlainMessagePackRenderer, MessagePackRenderer]
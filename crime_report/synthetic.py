@@ -0,0 +1,240 @@
+"""Deterministic synthetic data for benchmarks and ``manage.py seed``.
+
+Rows are inserted with ``bulk_create`` in batches, so the ``User`` post_save
+profile signals never fire; profiles are bulk-created alongside their users.
+Nothing else that hangs off post_save runs either: build the detection and
+indicator indexes afterwards with ``manage.py index_reports``.
+"""
+import datetime
+import random
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CrimeCategory, Location, CrimeReport, CrimeUpdate, UserProfile
+from .priority import extract_amount
+
+FIXTURES = ['categories', 'user_profiles', 'crime_reports']
+
+CITIES = [
+    ('Mumbai', 'Maharashtra', '400'), ('Pune', 'Maharashtra', '411'),
+    ('Delhi', 'Delhi', '110'), ('Bangalore', 'Karnataka', '560'),
+    ('Chennai', 'Tamil Nadu', '600'), ('Hyderabad', 'Telangana', '500'),
+    ('Kolkata', 'West Bengal', '700'), ('Ahmedabad', 'Gujarat', '380'),
+    ('Jaipur', 'Rajasthan', '302'), ('Lucknow', 'Uttar Pradesh', '226'),
+]
+AREAS = ['Central', 'North', 'South', 'East', 'West', 'Old City', 'Cantonment', 'Industrial Area',
+         'University Road', 'Station Road', 'Market', 'Airport Road']
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Rohan',
+               'Saanvi', 'Arjun', 'Priya', 'Rahul', 'Neha', 'Vikram', 'Pooja']
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Iyer', 'Khan', 'Singh', 'Gupta', 'Das', 'Nair', 'Joshi']
+TITLES = {
+    'Phishing': ['Fake bank email asking for password', 'SMS with link to update KYC'],
+    'Identity Theft': ['Loan taken in my name', 'Someone opened a SIM using my Aadhaar'],
+    'Ransomware': ['Office files encrypted with ransom note', 'Laptop locked demanding bitcoin'],
+    'Data Breach': ['Customer data leaked online', 'My details found on a leak site'],
+    'Online Harassment': ['Abusive messages on social media', 'Fake profile using my photos'],
+    'Hacking': ['Email account hacked', 'Social media account taken over'],
+    'Online Fraud': ['Paid for product never delivered', 'UPI payment to fake seller'],
+    'Malware Distribution': ['App installed malware on my phone', 'Infected attachment received'],
+}
+# Category severities (1-5) for case priority
+SEVERITIES = {'Ransomware': 5, 'Online Fraud': 5, 'Identity Theft': 4, 'Data Breach': 4}
+DESCRIPTIONS = [
+    'I received a call from {phone} claiming to be from customer support and was asked to share an OTP.',
+    'The seller asked me to pay Rs. {amount} via UPI to {upi} and stopped responding afterwards.',
+    'A message asked me to visit {url} to verify my account, after which money was debited.',
+    'An email from {email} contained an attachment that my antivirus flagged as malicious.',
+]
+UPDATE_TEXTS = [
+    'Initial review completed and the case has been logged for investigation.',
+    'Requested transaction details from the bank and awaiting their response.',
+    'Contacted the service provider to trace the number used in the fraud.',
+    'Evidence reviewed; the complainant has been asked for additional screenshots.',
+]
+STATUS_WEIGHTS = {'pending': 40, 'investigating': 30, 'resolved': 20, 'closed': 10}
+
+
+def ensure_categories():
+    """Creates the categories the titles above are written for, if missing."""
+    CrimeCategory.objects.bulk_create(
+        [CrimeCategory(name=name, severity=SEVERITIES.get(name, 3)) for name in TITLES], ignore_conflicts=True
+    )
+
+
+def _select(weights, available, what):
+    """``weights`` restricted to names in ``available``; unknown names are an error."""
+    unknown = set(weights) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown {what}: {', '.join(sorted(unknown))}")
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def _insert_rows(model, fields, rows):
+    """Inserts value tuples for ``fields`` with one executemany(). For millions of
+    rows, building model instances and preparing each of their values makes up
+    most of bulk_create's time; the values here are already in database form."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_dataset(reports, users=None, officers=None, updates_per_report=2, seed=42,
+                     batch_size=5000, log=None, status_weights=None, category_weights=None,
+                     city_weights=None):
+    """Add ``reports`` synthetic crime reports plus the users, officers, locations
+    and updates they reference. The same arguments always produce the same rows
+    (with dates relative to now).
+
+    ``status_weights``, ``category_weights`` and ``city_weights`` map names to
+    relative frequencies; statuses default to STATUS_WEIGHTS, categories and
+    cities to uniform. Only the names given are used."""
+    # Check the names before anything is written
+    status_weights = _select(status_weights or STATUS_WEIGHTS, STATUS_WEIGHTS, 'status(es)')
+    if category_weights:
+        category_weights = _select(category_weights, CrimeCategory.objects.values_list('name', flat=True),
+                                   'category(ies)')
+    if city_weights:
+        known_cities = {city for city, _, _ in CITIES} | set(Location.objects.values_list('city__name', flat=True))
+        city_weights = _select(city_weights, known_cities, 'city(ies)')
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    adapt_date = connection.ops.adapt_datefield_value
+    adapt_datetime = connection.ops.adapt_datetimefield_value
+    adapt_decimal = connection.ops.adapt_decimalfield_value
+    users = users or max(10, reports // 10)
+    officers = officers or max(5, users // 100)
+    now = timezone.now()
+    password = make_password('benchmark-password')
+    prefix = f'synth{seed}'
+
+    # Users and profiles: citizens, police officers and a handful of admins
+    admins = max(1, officers // 10)
+    roles = ['admin'] * admins + ['police'] * officers + ['citizen'] * users
+    for batch in _batches(enumerate(roles), batch_size):
+        created = User.objects.bulk_create([
+            User(
+                username=f'{prefix}_{user_type}_{i}',
+                email=f'{prefix}_{i}@example.com',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=password,
+                is_staff=user_type == 'admin',
+                date_joined=now - datetime.timedelta(days=rng.randint(0, 730)),
+            )
+            for i, user_type in batch
+        ])
+        if created[0].pk is None:
+            created = User.objects.filter(username__in=[user.username for user in created])
+        by_name = {user.username: user for user in created}
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=by_name[f'{prefix}_{user_type}_{i}'],
+                phone_number=f'9{rng.randint(100000000, 999999999)}',
+                user_type=user_type,
+                police_id=f'{prefix}-P{i}' if user_type == 'police' else None,
+                department='Cyber Crime' if user_type == 'police' else None,
+            )
+            for i, user_type in batch
+        ])
+    log(f'Created {len(roles)} users with profiles')
+
+    citizen_ids = list(
+        User.objects.filter(profile__user_type='citizen').order_by('id').values_list('id', flat=True)
+    )
+    officer_ids = list(
+        User.objects.filter(profile__user_type__in=['police', 'admin']).order_by('id').values_list('id', flat=True)
+    )
+
+    # Locations: every area of every city, with a distinct pincode each
+    for city, state, prefix_digits in CITIES:
+        for index, area in enumerate(AREAS):
+            Location.objects.resolve(state, city, area, f'{prefix_digits}{index + 1:03d}')
+    locations = list(Location.objects.order_by('id').values_list('id', 'city__name'))
+    location_ids = [location_id for location_id, _ in locations]
+    categories = list(CrimeCategory.objects.order_by('id').values_list('id', 'name'))
+    if category_weights:
+        categories = [(id_, name) for id_, name in categories if name in category_weights]
+        category_cum_weights = list(accumulate(category_weights[name] for _, name in categories))
+    if city_weights:
+        cities = list(city_weights)
+        city_cum_weights = list(accumulate(city_weights.values()))
+        city_locations = {city: [id_ for id_, name in locations if name == city] for city in cities}
+    statuses = list(status_weights)
+    # choices() with precomputed cumulative weights picks the same as with weights
+    status_cum_weights = list(accumulate(status_weights.values()))
+
+    def report_rows():
+        for _ in range(reports):
+            if category_weights:
+                category_id, category_name = rng.choices(categories, cum_weights=category_cum_weights)[0]
+            else:
+                category_id, category_name = rng.choice(categories)
+            status = rng.choices(statuses, cum_weights=status_cum_weights)[0]
+            reported_on = now - datetime.timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            description = rng.choice(DESCRIPTIONS).format(
+                phone=f'+91{rng.randint(7000000000, 9999999999)}',
+                amount=rng.randint(500, 500000),
+                upi=f'seller{rng.randint(1, 5000)}@okaxis',
+                url=f'http://verify-{rng.randint(1, 2000)}.example.net/login',
+                email=f'support{rng.randint(1, 2000)}@mail.example.org',
+            )
+            yield (
+                rng.choice(TITLES.get(category_name, ['Cyber crime incident'])),
+                description,
+                adapt_date((reported_on - datetime.timedelta(days=rng.randint(0, 30))).date()),
+                (
+                    rng.choice(city_locations[rng.choices(cities, cum_weights=city_cum_weights)[0]])
+                    if city_weights else rng.choice(location_ids)
+                ),
+                category_id,
+                rng.choice(citizen_ids),
+                adapt_datetime(reported_on),
+                status,
+                rng.choice(officer_ids) if status != 'pending' else None,
+                adapt_decimal(extract_amount(description)),
+                # Scored by `manage.py score_reports`
+                0,
+            )
+
+    report_fields = ('title', 'description', 'date_of_crime', 'location', 'category', 'reported_by',
+                     'reported_on', 'status', 'assigned_to', 'reported_amount', 'priority')
+    first_report_id = (CrimeReport.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    for count, batch in enumerate(_batches(report_rows(), batch_size), start=1):
+        _insert_rows(CrimeReport, report_fields, batch)
+        log(f'Created {min(count * batch_size, reports)}/{reports} reports')
+
+    def update_rows():
+        report_rows = CrimeReport.objects.filter(id__gte=first_report_id).exclude(status='pending')
+        for report_id, reported_on, assigned_to_id in report_rows.values_list(
+                'id', 'reported_on', 'assigned_to_id').iterator(chunk_size=batch_size):
+            for _ in range(rng.randint(1, updates_per_report * 2 - 1) if updates_per_report else 0):
+                yield (
+                    report_id,
+                    rng.choice(UPDATE_TEXTS),
+                    assigned_to_id,
+                    adapt_datetime(reported_on + datetime.timedelta(hours=rng.randint(1, 24 * 30))),
+                )
+
+    total_updates = 0
+    for batch in _batches(update_rows(), batch_size):
+        _insert_rows(CrimeUpdate, ('crime_report', 'update_text', 'updated_by', 'updated_on'), batch)
+        total_updates += len(batch)
+    log(f'Created {total_updates} case updates')
+    return {'users': len(roles), 'reports': reports, 'updates': total_updates}
@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset_bundle(name):
+    """Renders the <link>/<script> tags for a STATIC_BUNDLES entry: the collected,
+    hashed bundle in production and its individual source files otherwise."""
+    sources = settings.STATIC_BUNDLES[name]
+    if not settings.DEBUG and name in getattr(staticfiles_storage, 'hashed_files', {}):
+        urls = [static(name)]
+    else:
+        urls = [static(path) for path in sources]
+
+    if name.endswith('.css'):
+        return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in urls))
+
+
+@register.simple_tag
+def vendor_static(path):
+    """{% static %} for a STATIC_VENDOR_ASSETS file. There is no CDN fallback: a
+    missing file fails the system checks (crime_report.checks) and collectstatic."""
+    return static(path)
@@ -1,3 +1,726 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import tempfile
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.core import mail
+from django.core.cache import cache, caches
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import archive, async_views, counters, detection, notifications, priority, search, streaming, synthetic
+from .bulk import bulk_update_reports
+from .checks import check_vendor_assets, check_vendor_assets_deployed
+from .events import event_filter, report_event
+from .geo import pincode_index, reports_by_city
+from .http_cache import CRIME_DATA
+from .iocs import extract_iocs
+from .management.commands import benchmark
+from .middleware import ProfilingMiddleware
+from .models import (
+    ArchivedReport, City, CrimeCategory, CrimeReport, CrimeUpdate, DataVersion, Location, Notification,
+    PendingRescore, Pincode, ReportIndicator, SignupMonth, UserProfile, UserStats,
+)
+
+
+def make_user(username, user_type='citizen'):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pw-12345678')
+    user.profile.user_type = user_type
+    if user_type == 'police':
+        user.profile.police_id = f'P-{username}'
+        user.profile.department = 'Cyber Cell'
+    user.profile.save()
+    return user
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = make_user('citizen')
+        cls.officer = make_user('officer', 'police')
+        cls.category = CrimeCategory.objects.create(name='Phishing')
+        cls.location = Location.objects.resolve('Maharashtra', 'Mumbai', 'Andheri', '400053')
+        cls.reports = [
+            CrimeReport.objects.create(
+                title=f'Report {i}', description='Fake bank call', date_of_crime=datetime.date(2024, 1, 1),
+                location=cls.location, category=cls.category, reported_by=cls.citizen,
+            )
+            for i in range(5)
+        ]
+
+    def report_data(self, **fields):
+        return {
+            'title': 'Lottery scam', 'description': 'Asked to pay a processing fee',
+            'date_of_crime': '2024-02-01', 'category': self.category.id, 'location': self.location.id,
+            **fields,
+        }
+
+    def post(self, user, path, data):
+        self.client.force_login(user)
+        return self.client.post(path, data, content_type='application/json')
+
+
+class ReportBatchTests(ApiTestCase):
+    def test_batch_creates_every_item(self):
+        response = self.post(self.citizen, '/api/v1/reports/batch/', [self.report_data(title=f'B{i}') for i in range(3)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['title'] for item in response.json()], ['B0', 'B1', 'B2'])
+        self.assertEqual(CrimeReport.objects.count(), 8)
+
+    def test_one_invalid_item_creates_nothing(self):
+        items = [self.report_data(title='Valid'), self.report_data(date_of_crime='2999-01-01')]
+        response = self.post(self.citizen, '/api/v1/reports/batch/', items)
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('date_of_crime', errors[1])
+        self.assertEqual(CrimeReport.objects.count(), 5)
+
+    def test_batch_takes_a_rate_limit_token_per_item(self):
+        budget = settings.RATELIMITS['report_crime']['user'][0]
+        response = self.post(self.citizen, '/api/v1/reports/batch/', [self.report_data()] * budget)
+        self.assertEqual(response.status_code, 201)
+        response = self.post(self.citizen, '/api/v1/reports/batch/', [self.report_data()])
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(CrimeReport.objects.count(), 5 + budget)
+
+
+class ReportQueryTests(ApiTestCase):
+    def test_fields_and_expand(self):
+        self.client.force_login(self.officer)
+        response = self.client.get('/api/v1/reports/?fields=id,title,category,location&expand=category')
+        self.assertEqual(response.status_code, 200)
+        report = response.json()['results'][0]
+        self.assertEqual(set(report), {'id', 'title', 'category', 'location'})
+        self.assertEqual(report['category']['name'], 'Phishing')
+        self.assertEqual(report['location'], self.location.id)
+
+    def test_updates_only_when_expanded(self):
+        self.client.force_login(self.officer)
+        self.assertNotIn('updates', self.client.get('/api/v1/reports/').json()['results'][0])
+        report = self.client.get('/api/v1/reports/?expand=updates').json()['results'][0]
+        self.assertEqual(report['updates'], [])
+
+    def test_cursor_pagination(self):
+        self.client.force_login(self.officer)
+        seen = []
+        url = '/api/v1/reports/?page_size=2&fields=id'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            seen += [report['id'] for report in page['results']]
+            url = page['next']
+        expected = list(CrimeReport.objects.order_by('-reported_on', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    @unittest.skipIf(streaming.msgpack is None, 'msgpack is not installed')
+    def test_messagepack_aliases(self):
+        self.client.force_login(self.officer)
+        paths = {'/api/v1/reports/?fields=id': ['id'], '/api/crime-stats/': list(streaming.STATS_COLUMNS)}
+        for media_type in streaming.MSGPACK_TYPES:
+            for path, columns in paths.items():
+                response = self.client.get(path, HTTP_ACCEPT=media_type)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], media_type)
+                batch = streaming.msgpack.unpackb(b''.join(response.streaming_content))
+                self.assertEqual(batch['columns'], columns)
+
+    def test_unknown_filter_value(self):
+        self.client.force_login(self.officer)
+        self.assertEqual(self.client.get('/api/v1/reports/?status=bogus').status_code, 400)
+
+
+class ReportTriageTests(ApiTestCase):
+    def test_citizen_cannot_set_status_or_assignee(self):
+        response = self.post(self.citizen, '/api/v1/reports/', self.report_data(status='closed', assigned_to='officer'))
+        self.assertEqual(response.status_code, 201)
+        report = CrimeReport.objects.get(pk=response.json()['id'])
+        self.assertEqual(report.status, 'pending')
+        self.assertIsNone(report.assigned_to)
+
+    def test_citizen_cannot_update_reports(self):
+        self.client.force_login(self.citizen)
+        response = self.client.patch(f'/api/v1/reports/{self.reports[0].id}/', {'status': 'closed'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.reports[0].refresh_from_db()
+        self.assertEqual(self.reports[0].status, 'pending')
+
+    def test_officer_sets_status_and_assignee(self):
+        self.client.force_login(self.officer)
+        response = self.client.patch(f'/api/v1/reports/{self.reports[0].id}/',
+                                     {'status': 'investigating', 'assigned_to': 'officer'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.reports[0].refresh_from_db()
+        self.assertEqual((self.reports[0].status, self.reports[0].assigned_to), ('investigating', self.officer))
+
+
+class InboxTests(ApiTestCase):
+    def test_reading_a_case_changes_page_validators(self):
+        report = self.reports[0]
+        report.assigned_to = self.officer
+        report.save()
+        self.client.force_login(self.officer)
+        # Sets the CSRF cookie, which is part of the validators too
+        self.client.get(f'/crime/{self.reports[1].id}/')
+        etag = self.client.get('/crimes/')['ETag']
+        self.assertEqual(self.client.get('/crimes/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.get(f'/crime/{report.id}/')
+        response = self.client.get('/crimes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['inbox_unread'], 0)
+
+
+class HttpCacheTests(ApiTestCase):
+    def test_stats_etag_changes_with_the_data(self):
+        self.client.force_login(self.officer)
+        etag = self.client.get('/api/crime-stats/')['ETag']
+        self.assertEqual(self.client.get('/api/crime-stats/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.reports[0].status = 'resolved'
+        self.reports[0].save()
+        response = self.client.get('/api/crime-stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_stats_validators_expire_at_local_midnight(self):
+        self.client.force_login(self.officer)
+        response = self.client.get('/api/crime-stats/')
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        with mock.patch('crime_report.http_cache.timezone.localdate', return_value=tomorrow):
+            self.assertEqual(self.client.get(
+                '/api/crime-stats/', HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code, 200)
+            self.assertEqual(self.client.get(
+                '/api/crime-stats/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code, 200)
+
+
+class NotificationTests(ApiTestCase):
+    def add_updates(self, *texts):
+        report = self.reports[0]
+        for text in texts:
+            CrimeUpdate.objects.create(crime_report=report, update_text=text, updated_by=self.officer)
+        return report
+
+    def make_due(self):
+        Notification.objects.update(send_after=timezone.now())
+
+    def test_updates_within_the_window_are_sent_as_one_email(self):
+        report = self.add_updates('Case taken up', 'Bank contacted')
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(notifications.process_batch(), (0, 0))
+
+        self.make_due()
+        self.assertEqual(notifications.process_batch(), (1, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['citizen@example.com'])
+        self.assertIn(f'2 updates on your report #{report.id}', mail.outbox[0].subject)
+        self.assertIn('Bank contacted', mail.outbox[0].body)
+        self.assertEqual(Notification.objects.get().status, 'sent')
+
+    def test_failed_sends_are_retried_with_backoff(self):
+        self.add_updates('Case taken up')
+        self.make_due()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(notifications.process_batch(), (1, 0))
+        notification = Notification.objects.get()
+        self.assertEqual((notification.status, notification.attempts, notification.last_error), ('pending', 1, 'down'))
+        self.assertGreater(notification.send_after, timezone.now())
+        self.assertEqual(notifications.process_batch(), (0, 0))
+
+    def test_reporters_are_not_told_about_their_own_notes(self):
+        CrimeUpdate.objects.create(crime_report=self.reports[0], update_text='More screenshots', updated_by=self.citizen)
+        self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(RATELIMITS={**settings.RATELIMITS, 'login': {'methods': ('POST',), 'ip': (3, 60), 'account': (2, 60)}})
+class RateLimitTests(TestCase):
+    def login(self, username, ip):
+        return self.client.post('/login/', {'username': username, 'password': 'wrong'}, REMOTE_ADDR=ip)
+
+    def test_login_is_limited_per_address(self):
+        for i in range(3):
+            self.assertEqual(self.login(f'user{i}', '10.0.0.1').status_code, 200)
+        response = self.login('user3', '10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.login('user3', '10.0.0.2').status_code, 200)
+
+    def test_login_is_limited_per_account(self):
+        self.assertEqual(self.login('victim', '10.0.0.1').status_code, 200)
+        self.assertEqual(self.login('Victim', '10.0.0.2').status_code, 200)
+        self.assertEqual(self.login('victim', '10.0.0.3').status_code, 429)
+        self.assertEqual(self.login('someone', '10.0.0.3').status_code, 200)
+
+    def test_rejected_request_takes_no_tokens(self):
+        self.login('victim', '10.0.0.1')
+        self.login('victim', '10.0.0.1')
+        # Over the account budget: the address keeps its third token
+        self.assertEqual(self.login('victim', '10.0.0.1').status_code, 429)
+        self.assertEqual(self.login('someone', '10.0.0.1').status_code, 200)
+        self.assertEqual(self.login('other', '10.0.0.1').status_code, 429)
+
+
+class ChangelistTests(ApiTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        admin = make_user('admin', 'admin')
+        User.objects.filter(id=admin.id).update(is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+
+    def changelist(self, path='/admin/crime_report/crimereport/', **params):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in captured], response
+
+    def test_query_count_does_not_grow_with_the_rows(self):
+        self.changelist()  # fills the filter choice cache
+        before = len(self.changelist()[0])
+        for i in range(20):
+            other = Location.objects.resolve('Karnataka', f'City {i}', 'Central', f'56{i:04d}')
+            CrimeReport.objects.create(
+                title='More', description='Fake call', date_of_crime=datetime.date(2024, 3, 1),
+                location=other, category=self.category, reported_by=make_user(f'reporter{i}'),
+            )
+        # New cities only show up in the sidebar once the cached choices expire
+        self.assertEqual(len(self.changelist()[0]), before)
+        self.changelist('/admin/crime_report/crimeupdate/')
+
+    def test_search_uses_the_full_text_index(self):
+        report = self.reports[0]
+        CrimeReport.objects.filter(id=report.id).update(description='Scammer asked for an anydesk session')
+        queries, response = self.changelist(q='anyd')
+        self.assertEqual([row.id for row in response.context['cl'].result_list], [report.id])
+        self.assertTrue(any(' MATCH ' in sql for sql in queries))
+        self.assertFalse(any('"description" LIKE' in sql for sql in queries))
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=3)
+    def test_counts_stop_at_the_limit(self):
+        _, response = self.changelist(status__exact='pending')
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+
+class PasswordHashingTests(TestCase):
+    def test_old_hashes_are_upgraded_at_login(self):
+        user = make_user('legacy')
+        user.password = make_password('pw-12345678', hasher='pbkdf2_sha1')
+        user.save()
+        self.assertTrue(self.client.login(username='legacy', password='pw-12345678'))
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, get_hasher().algorithm)
+        self.assertTrue(user.check_password('pw-12345678'))
+
+    def test_registration_hashes_the_password_once(self):
+        hasher = type(get_hasher())
+        with mock.patch.object(hasher, 'encode', autospec=True, side_effect=hasher.encode) as encode, \
+                mock.patch.object(hasher, 'verify', autospec=True, side_effect=hasher.verify) as verify:
+            response = self.client.post('/register/', {
+                'username': 'newcomer', 'email': 'newcomer@example.com', 'first_name': 'New', 'last_name': 'Comer',
+                'password1': 'Pw-long-enough-42', 'password2': 'Pw-long-enough-42', 'phone_number': '9876543210',
+            })
+        self.assertRedirects(response, '/')
+        self.assertEqual((encode.call_count, verify.call_count), (1, 0))
+        self.assertEqual(int(self.client.session['_auth_user_id']), User.objects.get(username='newcomer').id)
+
+
+class RoleTests(ApiTestCase):
+    def test_demoted_officer_loses_access_on_the_next_request(self):
+        self.client.force_login(self.officer)
+        self.assertEqual(len(self.client.get('/api/v1/reports/').json()['results']), 5)
+        # As another worker would: no signal reaches this process
+        UserProfile.objects.filter(user=self.officer).update(user_type='citizen')
+        self.assertEqual(self.client.get('/api/v1/reports/').json()['results'], [])
+
+
+class EventFilterTests(ApiTestCase):
+    def test_officers_get_their_cases_and_the_unassigned_queue(self):
+        other = make_user('other', 'police')
+        mine, theirs, unassigned = self.reports[:3]
+        CrimeReport.objects.filter(id=mine.id).update(assigned_to=self.officer)
+        CrimeReport.objects.filter(id=theirs.id).update(assigned_to=other)
+        events = {
+            report.id: report_event('report_created', CrimeReport.objects.get(id=report.id))
+            for report in (mine, theirs, unassigned)
+        }
+        accepts = event_filter(self.officer.id, 'police')
+        self.assertEqual({id for id, event in events.items() if accepts(event)}, {mine.id, unassigned.id})
+        self.assertFalse(accepts(report_event('report_updated', unassigned)))
+        self.assertTrue(all(map(event_filter(self.citizen.id, 'citizen'), events.values())))
+        self.assertFalse(any(map(event_filter(make_user('bystander').id, 'citizen'), events.values())))
+
+
+class IndicatorTests(TestCase):
+    def test_email_domain_is_kept_unless_it_is_a_mail_provider(self):
+        self.assertEqual(
+            extract_iocs('Mail kyc@sbi-kyc.top or Helpdesk.SBI@gmail.com'),
+            {('email', 'kyc@sbi-kyc.top'), ('domain', 'sbi-kyc.top'), ('email', 'helpdesk.sbi@gmail.com')},
+        )
+
+    def test_common_domains_are_not_indicators(self):
+        iocs = extract_iocs('Saw the ad on https://www.facebook.com/loan-offers, then got mail from gmail.com')
+        self.assertEqual(iocs, {('url', 'facebook.com/loan-offers')})
+
+    def test_normalized_phone_and_upi(self):
+        self.assertEqual(extract_iocs('Call +91 98765-43210, pay refund.desk@okaxis'),
+                         {('phone', '9876543210'), ('upi', 'refund.desk@okaxis')})
+
+
+class LinkedPriorityTests(ApiTestCase):
+    def file_report(self, description):
+        return CrimeReport.objects.create(
+            title='Fake KYC call', description=description, date_of_crime=datetime.date(2024, 1, 1),
+            location=self.location, category=self.category, reported_by=self.citizen,
+        )
+
+    def priority_of(self, report):
+        report.refresh_from_db()
+        return report.priority
+
+    def test_linked_cases_are_rescored_by_the_worker(self):
+        priority.process_linked_rescores()
+        first = self.file_report('Caller on +91 98765 43210 asked for my OTP')
+        before = self.priority_of(first)
+        second = self.file_report('Same caller, 9876543210, again')
+        self.assertEqual(self.priority_of(first), before)
+        self.assertTrue(PendingRescore.objects.filter(report=second).exists())
+
+        self.assertEqual(priority.process_linked_rescores(), (2, 2))
+        self.assertGreater(self.priority_of(first), before)
+        self.assertFalse(PendingRescore.objects.exists())
+
+    def test_common_domains_and_private_addresses_do_not_link(self):
+        first, second = self.reports[:2]
+        for report in (first, second):
+            ReportIndicator.objects.create(report=report, kind='domain', value='gmail.com')
+            ReportIndicator.objects.create(report=report, kind='ip', value='192.168.1.1')
+        self.assertEqual(priority.linked_open_reports(first.id), [])
+        ReportIndicator.objects.create(report=first, kind='upi', value='refund.desk@okaxis')
+        ReportIndicator.objects.create(report=second, kind='upi', value='refund.desk@okaxis')
+        self.assertEqual(priority.linked_open_reports(first.id), [second.id])
+
+
+class DetectionTests(ApiTestCase):
+    def file_report(self, title, description):
+        return CrimeReport.objects.create(
+            title=title, description=description, date_of_crime=datetime.date(2024, 1, 1),
+            location=self.location, category=self.category, reported_by=self.citizen,
+        )
+
+    def test_near_identical_reports_are_duplicates(self):
+        text = 'Received a call from a man claiming to be from the bank KYC desk who asked for the OTP sent to my phone'
+        first = self.file_report('KYC fraud call', text)
+        second = self.file_report('KYC fraud call', text + ' yesterday')
+        other = self.file_report('Job offer', 'A recruiter on a messaging app wanted a registration fee for a data entry job')
+        duplicates = [report.id for report, _ in detection.find_duplicates(second)]
+        self.assertIn(first.id, duplicates)
+        self.assertNotIn(other.id, duplicates)
+
+    def test_reports_are_linked_on_discriminating_indicators_only(self):
+        first = self.file_report('Refund scam', 'Paid refund.desk@okaxis after a mail from help@gmail.com')
+        second = self.file_report('Refund scam', 'They sent refund.desk@okaxis; mail came from support@gmail.com')
+        ReportIndicator.objects.create(report=first, kind='domain', value='gmail.com')
+        ReportIndicator.objects.create(report=second, kind='domain', value='gmail.com')
+        linked = [(indicator.kind, indicator.value, [report.id for report in reports], total)
+                  for indicator, reports, total in detection.find_linked_reports(first)]
+        self.assertEqual(linked, [('upi', 'refund.desk@okaxis', [second.id], 1)])
+
+
+@override_settings(STATIC_VENDOR_ASSETS={'vendor/missing/missing.js': 'https://cdn.example.com/missing.js'})
+class VendorAssetTests(TestCase):
+    def test_missing_vendored_file_fails_the_deployment_checks(self):
+        self.assertEqual([error.id for error in check_vendor_assets_deployed(None)], ['crime_report.E001'])
+        with override_settings(DEBUG=True):
+            self.assertEqual([error.id for error in check_vendor_assets(None)], ['crime_report.W001'])
+
+    def test_pages_never_link_the_cdn(self):
+        html = Template("{% load assets %}{% vendor_static 'vendor/missing/missing.js' %}").render(Context())
+        self.assertEqual(html, '/static/vendor/missing/missing.js')
+
+    def test_collectstatic_stops_on_a_missing_vendored_file(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root, STATIC_BUNDLES={}):
+            with self.assertRaisesMessage(ValueError, 'vendor/missing/missing.js'):
+                call_command('collectstatic', interactive=False, verbosity=0)
+
+
+class LocationTests(ApiTestCase):
+    def setUp(self):
+        pincode_index.clear()
+        self.addCleanup(pincode_index.clear)
+
+    def test_spellings_of_a_place_share_one_row(self):
+        self.assertEqual(Location.objects.resolve(' maharashtra', 'mumbai ', 'ANDHERI', '400053 '), self.location)
+        self.assertEqual(City.objects.count(), 1)
+
+    def test_city_filter_uses_the_city_key(self):
+        other = Location.objects.resolve('Maharashtra', 'Pune', 'Kothrud', '411038')
+        CrimeReport.objects.filter(id=self.reports[0].id).update(location=other)
+        self.client.force_login(self.officer)
+        self.assertEqual(len(self.client.get('/crimes/', {'city': other.city_id}).context['reports']), 1)
+        self.assertEqual(len(self.client.get('/crimes/', {'city': 'mumbai'}).context['reports']), 4)
+        self.assertEqual([(row['city'], row['count']) for row in reports_by_city()], [('Mumbai', 4), ('Pune', 1)])
+
+    def test_pincode_index_sees_new_areas(self):
+        self.client.force_login(self.citizen)
+        self.assertEqual(
+            [area['area'] for area in self.client.get('/api/pincode/400053/').json()['areas']], ['Andheri']
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Location.objects.resolve('Maharashtra', 'Mumbai', 'Versova', '400053')
+        self.assertEqual([area['area'] for area in pincode_index.lookup('400053')], ['Andheri', 'Versova'])
+
+
+class LocatePincodesTests(TestCase):
+    def test_reports_district_fallbacks_and_unplaced_pincodes(self):
+        for code in ('400053', '400099', '999999'):
+            Location.objects.resolve('Maharashtra', 'Mumbai', f'Area {code}', code)
+        Pincode.objects.update(latitude=None, longitude=None)
+        out = io.StringIO()
+        call_command('locate_pincodes', stdout=out)
+        self.assertIn('Located 2 pincode(s), 1 of them only at their sorting district', out.getvalue())
+        self.assertIn('Could not place 1 pincode(s), e.g. 999999', out.getvalue())
+        self.assertEqual(Pincode.objects.get(code='400053').latitude, 19.1364)
+        self.assertIsNone(Pincode.objects.get(code='999999').latitude)
+
+
+class AsyncViewTests(ApiTestCase):
+    def test_middleware_runs_natively_under_asgi(self):
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), 'async_capable', False), path)
+
+    async def test_request_id_under_asgi(self):
+        response = await self.async_client.get('/', headers={'X-Request-ID': 'abcdef123456'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Request-ID'], 'abcdef123456')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    # On the test's own connection, which sees the test data
+    @mock.patch.object(async_views, '_run_query', lambda query: sync_to_async(query)())
+    def test_async_stats_match_the_sync_view(self):
+        self.client.force_login(self.officer)
+        expected = self.client.get('/api/crime-stats/').json()
+        request = AsyncRequestFactory().get('/api/crime-stats/')
+        request.user = self.officer
+        response = async_to_sync(async_views.crime_stats_api)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), expected)
+        self.assertEqual(expected['crime_by_status'][0], {'status': 'Pending', 'count': 5})
+
+
+class FragmentCacheTests(ApiTestCase):
+    def setUp(self):
+        # Data versions restart with every test's transaction, fragments would not
+        caches['template_fragments'].clear()
+        self.addCleanup(caches['template_fragments'].clear)
+
+    def test_report_rows_are_cached_until_the_data_version_changes(self):
+        self.client.force_login(self.officer)
+        report = self.reports[0]
+        self.assertContains(self.client.get('/crimes/'), '<td>Report 0</td>')
+        # Without a data version bump the cached row is served
+        CrimeReport.objects.filter(id=report.id).update(title='Renamed')
+        self.assertContains(self.client.get('/crimes/'), '<td>Report 0</td>')
+
+        report.title = 'Renamed'
+        report.save()
+        response = self.client.get('/crimes/')
+        self.assertContains(response, '<td>Renamed</td>')
+        self.assertNotContains(response, '<td>Report 0</td>')
+
+    def test_a_cache_hit_skips_the_fragment_queries(self):
+        self.client.force_login(self.officer)
+        self.client.get('/crimes/')
+        with CaptureQueriesContext(connection) as cold:
+            caches['template_fragments'].clear()
+            self.client.get('/crimes/')
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get('/crimes/')
+        self.assertLess(len(warm), len(cold))
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_LOG_INTERVAL=0)
+class ProfilingTests(ApiTestCase):
+    def setUp(self):
+        ProfilingMiddleware.store.clear()
+        self.addCleanup(ProfilingMiddleware.store.clear)
+
+    def test_requests_are_broken_down_per_url_name(self):
+        admin = make_user('admin', 'admin')
+        self.client.force_login(admin)
+        self.client.get('/crimes/')
+        self.client.get('/crimes/', {'status': 'pending'})
+        crime_list = self.client.get('/api/profiling/').json()['views']['crime_list']
+        self.assertEqual(crime_list['requests'], 2)
+        self.assertGreater(crime_list['sql_queries_mean'], 0)
+        self.assertGreater(crime_list['template_ms_mean'], 0)
+        self.assertEqual(sum(crime_list['wall_ms_histogram'].values()), 2)
+
+    def test_admins_only(self):
+        self.client.force_login(self.officer)
+        self.assertEqual(self.client.get('/api/profiling/').status_code, 403)
+
+
+class SyntheticDatasetTests(TestCase):
+    def generate(self, **options):
+        with transaction.atomic():
+            synthetic.ensure_categories()
+            totals = synthetic.generate_dataset(40, seed=7, **options)
+            rows = list(CrimeReport.objects.order_by('id').values_list(
+                'title', 'status', 'category__name', 'location__city__name', 'reported_by__username'
+            ))
+            transaction.set_rollback(True)
+        return totals, rows
+
+    def test_same_seed_same_dataset(self):
+        totals, rows = self.generate()
+        self.assertEqual((totals['reports'], len(rows)), (40, 40))
+        self.assertEqual(self.generate(), (totals, rows))
+
+    def test_weights_restrict_the_values(self):
+        _, rows = self.generate(status_weights={'resolved': 1}, city_weights={'Pune': 1})
+        self.assertEqual({(status, city) for _, status, _, city, _ in rows}, {('resolved', 'Pune')})
+        with self.assertRaisesMessage(ValueError, 'Unknown city(ies): Atlantis'):
+            synthetic.generate_dataset(10, city_weights={'Atlantis': 1})
+
+    def test_benchmark_comparison_flags_regressions(self):
+        command = benchmark.Command(stdout=io.StringIO())
+        baseline = {'meta': {}, 'scenarios': {
+            'home': {'p50_ms': 10.0, 'queries': 4}, 'crime_list': {'p50_ms': 10.0, 'queries': 6},
+        }}
+        results = {'scenarios': {
+            'home': {'p50_ms': 10.5, 'queries': 4},
+            'crime_list': {'p50_ms': 9.0, 'queries': 7},
+            'crime_detail': {'p50_ms': 8.0, 'queries': 5},
+        }}
+        self.assertEqual(command._compare(baseline, results, threshold=10.0), 1)
+        results['scenarios']['home']['p50_ms'] = 12.0
+        self.assertEqual(command._compare(baseline, results, threshold=10.0), 2)
+
+
+class CounterTests(ApiTestCase):
+    def stats(self):
+        return list(UserStats.objects.order_by('user_id').values('user_id', *counters.COUNTERS, 'last_report_on'))
+
+    def assertCountersConsistent(self):
+        kept = self.stats()
+        counters.rebuild()
+        self.assertEqual(kept, self.stats())
+
+    def test_bulk_update_keeps_counters_consistent(self):
+        reports = CrimeReport.objects.filter(id__in=[report.id for report in self.reports[:3]])
+        updated = bulk_update_reports(reports, self.officer, 'Taken up', status='investigating', assigned_to=self.officer)
+        self.assertEqual(updated, 3)
+        self.assertEqual(UserStats.objects.get(user=self.officer).cases_open, 3)
+        self.assertCountersConsistent()
+
+        bulk_update_reports(CrimeReport.objects.filter(status='investigating'), self.officer, 'Done', status='resolved')
+        stats = UserStats.objects.get(user=self.officer)
+        self.assertEqual((stats.cases_open, stats.cases_resolved), (0, 3))
+        self.assertCountersConsistent()
+
+    def test_report_writes_update_the_counters(self):
+        report = CrimeReport.objects.create(
+            title='New', description='Fake call', date_of_crime=datetime.date(2024, 3, 1),
+            location=self.location, category=self.category, reported_by=self.citizen,
+        )
+        self.assertEqual(UserStats.objects.get(user=self.citizen).reports_filed, 6)
+        report.assigned_to = self.officer
+        report.status = 'investigating'
+        report.save()
+        self.assertEqual(UserStats.objects.get(user=self.officer).cases_open, 1)
+        report.status = 'resolved'
+        report.save()
+        stats = UserStats.objects.get(user=self.officer)
+        self.assertEqual((stats.cases_assigned, stats.cases_open, stats.cases_resolved), (1, 0, 1))
+        report.delete()
+        self.assertEqual(UserStats.objects.get(user=self.citizen).reports_filed, 5)
+        self.assertCountersConsistent()
+
+    def test_manage_users_query_count_does_not_grow(self):
+        admin = make_user('admin', 'admin')
+        self.client.force_login(admin)
+
+        def count_queries():
+            caches['template_fragments'].clear()
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get('/manage-users/')
+            self.assertEqual(response.status_code, 200)
+            return len(captured)
+
+        before = count_queries()
+        for i in range(10):
+            reporter = make_user(f'reporter{i}')
+            CrimeReport.objects.create(
+                title='More', description='Fake call', date_of_crime=datetime.date(2024, 3, 1),
+                location=self.location, category=self.category, reported_by=reporter,
+            )
+        self.assertEqual(count_queries(), before)
+        self.assertEqual(SignupMonth.objects.get().count, User.objects.count())
+
+    def test_archival_moves_old_closed_cases_and_keeps_counters(self):
+        ids = [report.id for report in self.reports[:3]]
+        bulk_update_reports(CrimeReport.objects.filter(id__in=ids), self.officer, 'Done',
+                            status='resolved', assigned_to=self.officer)
+        old = timezone.now() - datetime.timedelta(days=400)
+        CrimeReport.objects.filter(id__in=ids).update(reported_on=old)
+        CrimeUpdate.objects.filter(crime_report_id__in=ids).update(updated_on=old)
+        counters.rebuild()
+        kept = self.stats()
+        version = DataVersion.current(CRIME_DATA)[0]
+
+        self.assertEqual(archive.archive_cases(batch_size=2), 3)
+        self.assertEqual(CrimeReport.objects.count(), 2)
+        self.assertFalse(CrimeUpdate.objects.filter(crime_report_id__in=ids).exists())
+        self.assertEqual(ArchivedReport.objects.get(id=ids[0]).updates[0]['update_text'], 'Done')
+        # One bump per batch, not per case
+        self.assertEqual(DataVersion.current(CRIME_DATA)[0], version + 2)
+        self.assertEqual(kept, self.stats())
+        self.assertCountersConsistent()
+
+        cases = archive.search_cases(self.citizen)
+        self.assertEqual(sorted(case['id'] for case in cases if case['archived']), ids)
+        self.assertEqual(len(cases), 5)
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, *args):
+        call_command('seed', '--reports=30', '--seed=3', *args, stdout=io.StringIO())
+
+    def test_seeded_rows_are_complete_without_signals(self):
+        self.seed('--status=resolved=1', '--city=Pune=1')
+        self.assertEqual(CrimeReport.objects.filter(status='resolved', location__city__name='Pune').count(), 30)
+        self.assertFalse(User.objects.filter(profile__isnull=True).exists())
+        self.assertEqual(UserStats.objects.count(), User.objects.count())
+        kept = list(UserStats.objects.order_by('user_id').values_list('user_id', 'reports_filed', 'cases_resolved'))
+        counters.rebuild()
+        self.assertEqual(kept, list(UserStats.objects.order_by('user_id').values_list(
+            'user_id', 'reports_filed', 'cases_resolved')))
+        # The text index is refilled after the bulk insert
+        report = CrimeReport.objects.first()
+        sql, params = search.matching(CrimeReport, report.title)
+        self.assertIn(report.id, CrimeReport.objects.filter(id__in=RawSQL(sql, params)).values_list('id', flat=True))
+
+    def test_bad_arguments_are_command_errors(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown city(ies): Atlantis'):
+            self.seed('--city=Atlantis=1')
+        with self.assertRaisesMessage(CommandError, 'Expected name=weight, got "Pune"'):
+            self.seed('--city=Pune')
+        self.seed()
+        with self.assertRaisesMessage(CommandError, 'already has the dataset for seed 3'):
+            self.seed()
@@ -1,12 +1,26 @@
-from django.urls import path
+from django.urls import include, path, re_path
+from django.conf import settings
 from django.contrib.auth import views as auth_views
-from . import views
+from . import views, async_views, api
+from .ratelimit import ratelimit
+
+# Read-heavy pages get their async variants when serving through cybercell.asgi
+if settings.USE_ASYNC_VIEWS:
+    home_view = async_views.home
+    crime_list_view = async_views.crime_list
+    admin_dashboard_view = async_views.admin_dashboard
+    crime_stats_api_view = async_views.crime_stats_api
+else:
+    home_view = views.home
+    crime_list_view = views.crime_list
+    admin_dashboard_view = views.admin_dashboard
+    crime_stats_api_view = views.crime_stats_api
 
 urlpatterns = [
     # Home and authentication
-    path('', views.home, name='home'),
+    path('', home_view, name='home'),
     path('register/', views.register, name='register'),
-    path('login/', auth_views.LoginView.as_view(template_name='crime_report/login.html'), name='login'),
+    path('login/', ratelimit('login')(auth_views.LoginView.as_view(template_name='crime_report/login.html')), name='login'),
     path('logout/', auth_views.LogoutView.as_view(template_name='crime_report/logout.html'), name='logout'),
     path('profile/', views.profile, name='profile'),
     
@@ -32,16 +46,26 @@ urlpatterns = [
     
     # Crime reports
     path('report/', views.report_crime, name='report_crime'),
-    path('crimes/', views.CrimeListView.as_view(), name='crime_list'),
+    path('crimes/', crime_list_view, name='crime_list'),
     path('crime/<int:pk>/', views.CrimeDetailView.as_view(), name='crime_detail'),
+    path('archive/<int:pk>/', views.archived_report, name='archived_report'),
+    path('archive/<int:pk>/evidence/', views.archived_evidence, name='archived_evidence'),
     
     # Admin/Police dashboard
-    path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('dashboard/', admin_dashboard_view, name='admin_dashboard'),
     path('manage-reports/', views.manage_reports, name='manage_reports'),
+    path('inbox/', views.officer_inbox, name='inbox'),
     path('update-report/<int:pk>/', views.update_report_status, name='update_report_status'),
     path('manage-users/', views.manage_users, name='manage_users'),
     path('update-user-type/<int:pk>/', views.update_user_type, name='update_user_type'),
     
     # API
-    path('api/crime-stats/', views.crime_stats_api, name='crime_stats_api'),
+    path('api/crime-stats/', crime_stats_api_view, name='crime_stats_api'),
+    path('api/live-events/', views.live_events, name='live_events'),
+    path('api/pincode/<str:code>/', views.pincode_lookup, name='pincode_lookup'),
+    path('api/iocs/', views.ioc_lookup, name='ioc_lookup'),
+    path('api/cases/', views.case_search, name='case_search'),
+    path('api/hotspots/<int:z>/<int:x>/<int:y>.geojson', views.hotspot_tile, name='hotspot_tile'),
+    path('api/profiling/', views.profiling_stats, name='profiling_stats'),
+    re_path(r'^api/(?P<version>v1)/', include((api.router.urls, 'api'), namespace='v1')),
 ]
\ No newline at end of file
@@ -1,57 +1,51 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth import login, authenticate
+from django.contrib.auth import login
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.utils import timezone
-from django.http import JsonResponse, Http404
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
-from django.views.generic import ListView, DetailView
+from django.views.generic import DetailView
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import transaction
+import asyncio
+import datetime
+import json
 import logging
 
-from .models import CrimeReport, CrimeCategory, Location, CrimeUpdate, UserProfile
+from .models import ArchivedReport, CrimeReport, CrimeCategory, City, CrimeUpdate, SignupMonth, UserProfile, UserStats
 from .forms import (
     UserRegistrationForm, UserProfileForm, CrimeReportForm, 
     LocationForm, CrimeUpdateForm, CrimeStatusUpdateForm, UserTypeUpdateForm,
-    UserProfileUpdateForm, ProfileUpdateForm
+    UserProfileUpdateForm, ProfileUpdateForm, BulkReportUpdateForm
 )
+from .bulk import bulk_update_reports
+from .events import READ_BATCH_SIZE, hub, event_filter
+from .middleware import ProfilingMiddleware
+from .http_cache import conditional_on_data_version, get_data_version
 from .decorators import police_or_admin_required, admin_required
+from .ratelimit import ratelimit
+from .geo import city_q, pincode_index
+from . import archive, detection, hotspots, inbox, iocs, pages, streaming
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Home view
 def home(request):
-    # Get crime categories
-    crime_categories = CrimeCategory.objects.all()[:5]
-    
-    # Get recent reports that are public or belong to the user
-    if request.user.is_authenticated:
-        recent_reports = CrimeReport.objects.order_by('-reported_on')[:5]
-    else:
-        recent_reports = CrimeReport.objects.filter(status='resolved').order_by('-reported_on')[:5]
-    
-    # Get statistics
-    total_reports = CrimeReport.objects.count()
-    resolved_reports = CrimeReport.objects.filter(status='resolved').count()
-    pending_reports = CrimeReport.objects.filter(status='pending').count()
-    investigating_reports = CrimeReport.objects.filter(status='investigating').count()
-    
-    context = {
-        'crime_categories': crime_categories,
-        'recent_reports': recent_reports,
-        'total_reports': total_reports,
-        'resolved_reports': resolved_reports,
-        'pending_reports': pending_reports,
-        'investigating_reports': investigating_reports,
-        'show_all_reports': request.user.is_authenticated,
-    }
-    return render(request, 'crime_report/home.html', context)
+    data = pages.run_queries(pages.home_queries(request.user))
+    return render(request, 'crime_report/home.html', pages.home_context(request.user, data))
 
 # Authentication views
+@ratelimit('register')
 def register(request):
     if request.method == 'POST':
         user_form = UserRegistrationForm(request.POST)
@@ -72,9 +66,8 @@ def register(request):
                 profile.save()
                 
                 username = user_form.cleaned_data.get('username')
-                password = user_form.cleaned_data.get('password1')
-                user = authenticate(username=username, password=password)
-                login(request, user)
+                # The form just set the password; authenticate() would hash it again
+                login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
                 
                 messages.success(request, f'Welcome to CyberCell, {username}! Your account has been created successfully.')
                 return redirect('home')
@@ -105,24 +98,25 @@ def profile(request):
         user_form = UserProfileUpdateForm(instance=request.user)
         profile_form = ProfileUpdateForm(instance=request.user.profile)
     
-    # Get user's reports and updates
+    # Get user's reports and the latest cases in their inbox
     user_reports = CrimeReport.objects.filter(reported_by=request.user).order_by('-reported_on')
     if hasattr(request.user, 'profile') and request.user.profile.user_type in ['police', 'admin']:
-        assigned_reports = CrimeReport.objects.filter(assigned_to=request.user).order_by('-reported_on')
+        inbox_items = inbox.items(request.user)[:settings.INBOX_PREVIEW_SIZE]
     else:
-        assigned_reports = None
+        inbox_items = None
     
     context = {
         'user_form': user_form,
         'profile_form': profile_form,
         'user_reports': user_reports,
-        'assigned_reports': assigned_reports,
+        'inbox_items': inbox_items,
     }
     
     return render(request, 'crime_report/profile.html', context)
 
 # Crime Report views
 @login_required
+@ratelimit('report_crime')
 def report_crime(request):
     if request.method == 'POST':
         crime_form = CrimeReportForm(request.POST, request.FILES)
@@ -131,14 +125,8 @@ def report_crime(request):
         if crime_form.is_valid() and location_form.is_valid():
             try:
                 with transaction.atomic():
-                    # Check for existing location
-                    location_data = location_form.cleaned_data
-                    location, created = Location.objects.get_or_create(
-                        city=location_data['city'],
-                        state=location_data['state'],
-                        area=location_data['area'],
-                        pincode=location_data['pincode']
-                    )
+                    # Reuses the existing location (and state/city/area/pincode rows)
+                    location = location_form.save()
                     
                     crime_report = crime_form.save(commit=False)
                     crime_report.location = location
@@ -159,74 +147,46 @@ def report_crime(request):
         'location_form': location_form
     })
 
-class CrimeListView(ListView):
-    model = CrimeReport
-    template_name = 'crime_report/crime_list.html'
-    context_object_name = 'reports'
-    paginate_by = 10
-    
-    def get_queryset(self):
-        queryset = CrimeReport.objects.all()
-        
-        # Apply filters
-        filters = Q()
-        
-        category = self.request.GET.get('category')
-        if category:
-            filters &= Q(category_id=category)
-            
-        status = self.request.GET.get('status')
-        if status:
-            filters &= Q(status=status)
-            
-        city = self.request.GET.get('city')
-        if city:
-            filters &= Q(location__city__icontains=city)
-            
-        date_from = self.request.GET.get('date_from')
-        if date_from:
-            filters &= Q(date_of_crime__gte=date_from)
-            
-        date_to = self.request.GET.get('date_to')
-        if date_to:
-            filters &= Q(date_of_crime__lte=date_to)
-        
-        return queryset.filter(filters).order_by('-reported_on')
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['categories'] = CrimeCategory.objects.all()
-        context['filters'] = self.request.GET
-        context['locations'] = Location.objects.values('city', 'state').distinct()
-        
-        # Add statistics
-        context['total_reports'] = CrimeReport.objects.count()
-        context['resolved_reports'] = CrimeReport.objects.filter(status='resolved').count()
-        context['pending_reports'] = CrimeReport.objects.filter(status='pending').count()
-        
-        return context
+@conditional_on_data_version()
+def crime_list(request):
+    paginator = pages.crime_list_paginator(request, request.user)
+    data = pages.run_queries(pages.crime_list_queries(request, paginator), pages.CRIME_LIST_FRAGMENTS)
+    return render(request, 'crime_report/crime_list.html', pages.crime_list_context(request, paginator, data))
 
+@method_decorator(conditional_on_data_version(), name='get')
 class CrimeDetailView(LoginRequiredMixin, DetailView):
     model = CrimeReport
     template_name = 'crime_report/crime_detail.html'
     context_object_name = 'crime'
     
-    def get_object(self, queryset=None):
-        obj = super().get_object(queryset)
-        if not obj.can_view_details(self.request.user):
-            raise Http404("You don't have permission to view this report.")
-        return obj
+    def get_queryset(self):
+        # Reports the user may not open are simply not found
+        return CrimeReport.objects.visible_to(self.request.user)
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            response = super().get(request, *args, **kwargs)
+        except Http404:
+            # Old links to cases that have since been archived
+            if ArchivedReport.objects.visible_to(request.user).filter(pk=self.kwargs['pk']).exists():
+                return redirect('archived_report', pk=self.kwargs['pk'])
+            raise
+        if self.object.assigned_to_id == request.user.pk:
+            inbox.mark_read(request.user, self.object.id)
+        return response
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['updates'] = self.object.updates.all().order_by('-updated_on')
         if self.request.user.profile.user_type in ['police', 'admin']:
             context['update_form'] = CrimeUpdateForm()
+            context['possible_duplicates'] = detection.find_duplicates(self.object)
+            context['linked_reports'] = detection.find_linked_reports(self.object)
         
         # Get similar reports based on category and location
-        similar_reports = CrimeReport.objects.filter(
-            Q(category=self.object.category) | Q(location__city=self.object.location.city)
-        ).exclude(id=self.object.id).order_by('-reported_on')[:5]
+        similar_reports = CrimeReport.objects.listed_for(self.request.user).filter(
+            Q(category=self.object.category) | Q(location__city_id=self.object.location.city_id)
+        ).exclude(id=self.object.id).select_related('location__city__state').order_by('-reported_on')[:5]
         context['similar_reports'] = similar_reports
         
         return context
@@ -254,84 +214,14 @@ class CrimeDetailView(LoginRequiredMixin, DetailView):
 @login_required
 @police_or_admin_required
 def admin_dashboard(request):
-    # Get statistics
-    total_reports = CrimeReport.objects.count()
-    pending_reports = CrimeReport.objects.filter(status='pending').count()
-    investigating_reports = CrimeReport.objects.filter(status='investigating').count()
-    resolved_reports = CrimeReport.objects.filter(status='resolved').count()
-    closed_reports = CrimeReport.objects.filter(status='closed').count()
-    
-    # Calculate investigating percentage
-    investigating_percentage = (investigating_reports / total_reports * 100) if total_reports > 0 else 0
-    
-    stats = {
-        'total_reports': total_reports,
-        'pending_reports': pending_reports,
-        'investigating_reports': investigating_reports,
-        'resolved_reports': resolved_reports,
-        'closed_reports': closed_reports,
-    }
-    
-    # Crime by category
-    crime_by_category = CrimeCategory.objects.annotate(count=Count('crimereport'))
-    
-    # Crime by location (city)
-    crime_by_location = Location.objects.values('city').annotate(
-        count=Count('crimereport')
-    ).order_by('-count')[:10]
-    
-    # Recent reports
-    recent_reports = CrimeReport.objects.order_by('-reported_on')[:10]
-    
-    # Reports assigned to this officer (if police)
-    if request.user.profile.user_type == 'police':
-        assigned_reports = CrimeReport.objects.filter(
-            assigned_to=request.user
-        ).order_by('-reported_on')
-    else:
-        assigned_reports = None
-    
-    # Calculate location percentages and trends
-    total_location_reports = sum(loc['count'] for loc in crime_by_location)
-    top_locations = []
-    for loc in crime_by_location:
-        percentage = (loc['count'] / total_location_reports * 100) if total_location_reports > 0 else 0
-        # For demo purposes, generate a random trend between -20 and 20
-        import random
-        trend = random.randint(-20, 20)
-        top_locations.append({
-            'city': loc['city'],
-            'count': loc['count'],
-            'percentage': round(percentage, 1),
-            'trend': trend
-        })
-
-    # Get total users count for quick actions
-    total_users = User.objects.count()
-
-    context = {
-        'stats': stats,
-        'crime_by_category': crime_by_category,
-        'crime_by_location': crime_by_location,
-        'recent_reports': recent_reports,
-        'assigned_reports': assigned_reports,
-        'user_type': request.user.profile.user_type,
-        'investigating_percentage': round(investigating_percentage, 1),
-        'total_reports': total_reports,
-        'pending_reports': pending_reports,
-        'investigating_reports': investigating_reports,
-        'resolved_reports': resolved_reports,
-        'top_locations': top_locations,
-        'total_users': total_users,
-        'today': timezone.now()
-    }
-    
-    return render(request, 'crime_report/admin_dashboard.html', context)
+    user_type = request.user.profile.user_type
+    data = pages.run_queries(pages.dashboard_queries(request.user, user_type), pages.DASHBOARD_FRAGMENTS)
+    return render(request, 'crime_report/admin_dashboard.html', pages.dashboard_context(user_type, data))
 
 @login_required
 @police_or_admin_required
 def manage_reports(request):
-    reports = CrimeReport.objects.all()
+    reports = CrimeReport.objects.select_related('category', 'location__city__state', 'assigned_to')
     
     # Apply filters
     status = request.GET.get('status')
@@ -344,7 +234,7 @@ def manage_reports(request):
     
     city = request.GET.get('city')
     if city:
-        reports = reports.filter(location__city__icontains=city)
+        reports = reports.filter(city_q(city))
     
     # Filter by assigned officer
     if request.user.profile.user_type == 'police':
@@ -356,20 +246,74 @@ def manage_reports(request):
         if officer_id:
             reports = reports.filter(assigned_to_id=officer_id)
     
+    # Bulk actions apply to the selected rows or to the whole filter result
+    if request.method == 'POST':
+        if request.POST.get('scope') == 'filtered':
+            targets = reports
+        else:
+            report_ids = [pk for pk in request.POST.getlist('report_ids') if pk.isdigit()]
+            targets = reports.filter(id__in=report_ids)
+        
+        bulk_form = BulkReportUpdateForm(request.POST, reports=targets)
+        if bulk_form.is_valid():
+            updated = bulk_update_reports(
+                targets,
+                request.user,
+                bulk_form.cleaned_data['update_text'],
+                status=bulk_form.cleaned_data['status'],
+                assigned_to=bulk_form.cleaned_data['assigned_to'],
+            )
+            messages.success(request, f'{updated} report(s) updated successfully!')
+        else:
+            for errors in bulk_form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+        
+        redirect_url = reverse('manage_reports')
+        if request.GET:
+            redirect_url = f'{redirect_url}?{request.GET.urlencode()}'
+        return redirect(redirect_url)
+    
+    # Open cases by priority (see crime_report.priority), then the rest by date
+    sort = 'recent' if request.GET.get('sort') == 'recent' else 'priority'
+    ordering = ['-reported_on'] if sort == 'recent' else ['-priority', '-reported_on']
+    
     # Pagination
-    paginator = Paginator(reports.order_by('-reported_on'), 20)
+    paginator = Paginator(reports.order_by(*ordering), 20)
     page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
         'page_obj': page_obj,
+        'sort': sort,
         'categories': CrimeCategory.objects.all(),
         'officers': User.objects.filter(profile__user_type='police'),
+        'cities': City.objects.select_related('state').order_by('name'),
         'filters': request.GET,
-        'user_type': request.user.profile.user_type
+        'user_type': request.user.profile.user_type,
+        'status_choices': CrimeReport.STATUS_CHOICES,
     }
     
     return render(request, 'crime_report/manage_reports.html', context)
 
+@login_required
+@police_or_admin_required
+def officer_inbox(request):
+    """Cases assigned to the user, latest activity first, from their inbox (see
+    crime_report.inbox) rather than a query over every report."""
+    if request.method == 'POST':
+        read = inbox.mark_all_read(request.user)
+        messages.success(request, f'{read} case(s) marked as read.')
+        return redirect('inbox')
+    
+    unread_only = request.GET.get('unread') == '1'
+    paginator = Paginator(inbox.items(request.user, unread_only=unread_only), settings.INBOX_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    return render(request, 'crime_report/inbox.html', {
+        'page_obj': page_obj,
+        'unread_only': unread_only,
+    })
+
 @login_required
 @police_or_admin_required
 def update_report_status(request, pk):
@@ -415,60 +359,16 @@ def update_report_status(request, pk):
 @login_required
 @admin_required
 def manage_users(request):
-    users = User.objects.select_related('profile').all()
+    """Served from UserStats and SignupMonth (see crime_report.counters) in four
+    queries, however many users and reports there are."""
+    user_profiles = UserProfile.objects.select_related('user', 'user__stats')
     
     # Apply filters
     user_type = request.GET.get('user_type')
-    if user_type:
-        users = users.filter(profile__user_type=user_type)
-    
-    search = request.GET.get('search')
-    if search:
-        users = users.filter(
-            Q(username__icontains=search) |
-            Q(email__icontains=search) |
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search) |
-            Q(profile__phone_number__icontains=search)
-        )
-    
-    # Get statistics
-    user_stats = {
-        'total': users.count(),
-        'police': users.filter(profile__user_type='police').count(),
-        'admin': users.filter(profile__user_type='admin').count(),
-        'citizen': users.filter(profile__user_type='citizen').count(),
-    }
-    
-    # Get top reporters
-    from django.db.models import Count, Max
-    top_reporters = User.objects.annotate(
-        report_count=Count('reported_crimes'),
-        last_report_date=Max('reported_crimes__reported_on')
-    ).filter(report_count__gt=0).order_by('-report_count')[:5]
-    
-    # Get new users per month
-    from django.db.models.functions import TruncMonth
-    new_users_by_month = User.objects.annotate(
-        month=TruncMonth('date_joined')
-    ).values('month').annotate(
-        count=Count('id')
-    ).order_by('-month')[:6]
-    
-    months = [item['month'].strftime('%b %Y') for item in new_users_by_month][::-1]
-    new_users_data = [item['count'] for item in new_users_by_month][::-1]
-    
-    # Pagination
-    paginator = Paginator(users.order_by('-date_joined'), 20)
-    page_obj = paginator.get_page(request.GET.get('page'))
-    
-    # Get UserProfile objects directly
-    user_profiles = UserProfile.objects.select_related('user').all()
-    
-    # Apply filters to UserProfile queryset
     if user_type:
         user_profiles = user_profiles.filter(user_type=user_type)
     
+    search = request.GET.get('search')
     if search:
         user_profiles = user_profiles.filter(
             Q(user__username__icontains=search) |
@@ -478,8 +378,28 @@ def manage_users(request):
             Q(phone_number__icontains=search)
         )
     
+    # Get statistics, in one query
+    user_stats = user_profiles.aggregate(
+        total=Count('pk'),
+        police=Count('pk', filter=Q(user_type='police')),
+        admin=Count('pk', filter=Q(user_type='admin')),
+        citizen=Count('pk', filter=Q(user_type='citizen')),
+    )
+    
+    # Get top reporters; only queried when the cached fragment has expired
+    top_reporters = UserStats.objects.select_related('user__profile').filter(
+        reports_filed__gt=0
+    ).order_by('-reports_filed')[:5]
+    
+    # Get new users per month
+    new_users_by_month = list(SignupMonth.objects.filter(count__gt=0).order_by('-month')[:6])[::-1]
+    months = [item.month.strftime('%b %Y') for item in new_users_by_month]
+    new_users_data = [item.count for item in new_users_by_month]
+    
     # Pagination
     paginator = Paginator(user_profiles.order_by('-user__date_joined'), 20)
+    # Same filters as user_stats, so no second COUNT
+    paginator.count = user_stats['total']
     page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
@@ -526,54 +446,213 @@ def update_user_type(request, pk):
 
 # API views
 @login_required
+@ratelimit('crime_stats_api')
+@conditional_on_data_version(per_user=False, use_last_modified=True)
 def crime_stats_api(request):
+    """Dashboard chart data; streamed as NDJSON or MessagePack rows when the
+    client accepts them (see crime_report.streaming)."""
     if not request.user.profile.user_type in ['police', 'admin']:
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    # Crime by category
-    crime_by_category = list(
-        CrimeCategory.objects.annotate(count=Count('crimereport')).values('name', 'count')
-    )
+    media_type = streaming.negotiate(request)
+    if media_type is not None:
+        return streaming.stream_rows(request, media_type, streaming.STATS_COLUMNS, streaming.stats_rows())
     
-    # Crime by location (city)
-    crime_by_location = list(
-        Location.objects.values('city').annotate(count=Count('crimereport')).order_by('-count')[:10]
-    )
+    now = timezone.now()
+    data = pages.run_queries(pages.stats_queries(now))
+    response = JsonResponse(pages.stats_payload(now, data))
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+@login_required
+@conditional_on_data_version(per_user=False, use_last_modified=True)
+def hotspot_tile(request, z, x, y):
+    """GeoJSON hotspot cells for one map tile over the ``?days=`` window."""
+    if not request.user.profile.user_type in ['police', 'admin']:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    days = request.GET.get('days', str(settings.HOTSPOT_DEFAULT_WINDOW))
+    if not days.isdigit() or int(days) not in settings.HOTSPOT_WINDOWS:
+        return JsonResponse({'error': f'days must be one of {settings.HOTSPOT_WINDOWS}'}, status=400)
+    if z > settings.HOTSPOT_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        return JsonResponse({'error': 'No such tile'}, status=404)
+    
+    version, _ = get_data_version(request)
+    response = JsonResponse(hotspots.hotspot_tile(int(days), z, x, y, version))
+    response['Content-Type'] = 'application/geo+json'
+    return response
+
+@login_required
+def pincode_lookup(request, code):
+    """Known areas for a pincode, used to prefill the report form."""
+    return JsonResponse({'pincode': code, 'areas': pincode_index.lookup(code)})
+
+@login_required
+@conditional_on_data_version(per_user=False, use_last_modified=True)
+def ioc_lookup(request):
+    """Cases mentioning the phone number, URL, domain, IP, email, wallet or UPI ID in ``?q=``."""
+    if not request.user.profile.user_type in ['police', 'admin']:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    # Crime by status
-    crime_by_status = [
-        {'status': status[1], 'count': CrimeReport.objects.filter(status=status[0]).count()}
-        for status in CrimeReport.STATUS_CHOICES
+    query = request.GET.get('q', '')
+    indicators = iocs.parse_query(query)
+    if not indicators:
+        return JsonResponse({'error': 'No indicator found in q'}, status=400)
+    
+    cases, truncated = iocs.linked_cases(indicators, limit=settings.IOC_LOOKUP_MAX_CASES)
+    return JsonResponse({
+        'query': query,
+        'indicators': [{'kind': kind, 'value': value} for kind, value in sorted(indicators)],
+        'cases': cases,
+        'truncated': truncated,
+    })
+
+@login_required
+def case_search(request):
+    """Live and archived cases the user may open, searched by ``?q=`` (title and
+    description), ``status``, ``category``, ``date_from`` and ``date_to``;
+    ``archived=0|1`` limits the search to one of the two."""
+    params = request.GET
+    try:
+        category = int(params['category']) if params.get('category') else None
+        date_from = datetime.date.fromisoformat(params['date_from']) if params.get('date_from') else None
+        date_to = datetime.date.fromisoformat(params['date_to']) if params.get('date_to') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid category or date'}, status=400)
+    archived = {'1': True, '0': False}.get(params.get('archived'))
+    
+    cases = archive.search_cases(
+        request.user, query=params.get('q', '').strip(), status=params.get('status'), category=category,
+        date_from=date_from, date_to=date_to, archived=archived,
+    )
+    page = Paginator(cases, settings.CASE_SEARCH_PAGE_SIZE).get_page(params.get('page'))
+    results = []
+    for case in page:
+        case['url'] = reverse('archived_report' if case['archived'] else 'crime_detail', args=[case['id']])
+        results.append(case)
+    return JsonResponse({
+        'count': page.paginator.count,
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'results': results,
+    })
+
+@login_required
+def archived_report(request, pk):
+    crime = get_object_or_404(
+        ArchivedReport.objects.visible_to(request.user).select_related(
+            'category', 'location__area', 'location__city__state', 'location__pincode', 'reported_by', 'assigned_to'
+        ),
+        pk=pk,
+    )
+    updates = [
+        {**update, 'updated_on': datetime.datetime.fromisoformat(update['updated_on'])}
+        for update in reversed(crime.updates)
     ]
+    return render(request, 'crime_report/archived_report.html', {'crime': crime, 'updates': updates})
+
+@login_required
+def archived_evidence(request, pk):
+    """Evidence of an archived case, from cold storage (not served under MEDIA_URL)."""
+    crime = get_object_or_404(ArchivedReport.objects.visible_to(request.user), pk=pk)
+    if not crime.evidence_file:
+        raise Http404('No evidence file')
+    return FileResponse(crime.evidence_file.open('rb'), as_attachment=True,
+                        filename=crime.evidence_file.name.rsplit('/', 1)[-1])
+
+@login_required
+def profiling_stats(request):
+    if request.user.profile.user_type != 'admin':
+        return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    # Crime by month (last 12 months)
-    now = timezone.now()
-    crime_by_month = []
-    
-    for i in range(12):
-        month = now.month - i
-        year = now.year
-        if month <= 0:
-            month += 12
-            year -= 1
-        
-        count = CrimeReport.objects.filter(
-            reported_on__year=year,
-            reported_on__month=month
-        ).count()
-        
-        crime_by_month.append({
-            'month': f'{year}-{month:02d}',
-            'count': count
-        })
-    
-    crime_by_month.reverse()
-    
-    data = {
-        'crime_by_category': crime_by_category,
-        'crime_by_location': crime_by_location,
-        'crime_by_status': crime_by_status,
-        'crime_by_month': crime_by_month
-    }
+    if not settings.PROFILING_ENABLED:
+        return JsonResponse({'error': 'Profiling is disabled'}, status=404)
     
-    return JsonResponse(data)
\ No newline at end of file
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        ProfilingMiddleware.store.clear()
+    
+    return JsonResponse({
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'window': ProfilingMiddleware.store.window,
+        'views': ProfilingMiddleware.store.summary(),
+    })
+
+async def live_events(request):
+    """Server-Sent Events stream of new reports, status changes and case updates.
+    
+    Only served under ASGI (cybercell.asgi); police receive events for their
+    assigned cases and new unassigned reports, admins receive everything. Streams end
+    after LIVE_EVENTS_MAX_DURATION and clients reconnect with Last-Event-ID.
+    """
+    user_info = await sync_to_async(_live_events_user)(request)
+    if user_info is None:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Live events require the ASGI server'}, status=501)
+    
+    accepts = event_filter(*user_info)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    
+    async def stream():
+        queue = await hub.subscribe(accepts)
+        sent_id = 0
+        # Django does not notice a client going away from a streaming response,
+        # so every stream ends after a while and the client reconnects
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.LIVE_EVENTS_MAX_DURATION
+        try:
+            yield 'retry: 3000\n\n'
+            # Replay what a reconnecting client missed, then switch to live events
+            since = last_event_id
+            while since is not None:
+                events = await asyncio.to_thread(hub.store.read_since, since)
+                for event in events:
+                    if accepts(event):
+                        sent_id = event['id']
+                        yield _format_event(event)
+                since = events[-1]['id'] if len(events) == READ_BATCH_SIZE else None
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=min(remaining, settings.LIVE_EVENTS_KEEPALIVE)
+                    )
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                if event['id'] > sent_id:
+                    sent_id = event['id']
+                    yield _format_event(event)
+            # Send what is queued, then move the client's Last-Event-ID to the
+            # hub's position so it resumes past the events it does not receive
+            cursor = hub.cursor
+            for event in [queue.get_nowait() for _ in range(queue.qsize())]:
+                if event is None:
+                    return
+                if event['id'] > sent_id:
+                    sent_id = event['id']
+                    yield _format_event(event)
+            yield f'id: {max(sent_id, cursor)}\n\n'
+        finally:
+            hub.unsubscribe(queue)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _live_events_user(request):
+    user = request.user
+    if not user.is_authenticated or not hasattr(user, 'profile'):
+        return None
+    if user.profile.user_type not in ['police', 'admin']:
+        return None
+    return user.id, user.profile.user_type
+
+def _format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
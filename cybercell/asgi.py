@@ -14,3 +14,19 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cybercell.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.PINCODE_INDEX_PRELOAD:
+    from django.db import connections  # noqa: E402
+    from crime_report.geo import pincode_index  # noqa: E402
+
+    pincode_index.load()
+    # Don't hand the startup connection on to forked workers
+    connections.close_all()
+
+if settings.SERVE_STATIC_FILES:
+    from crime_report.static_handler import ASGIStaticFilesApplication  # noqa: E402
+
+    # Collected, precompressed static files are answered before reaching Django
+    application = ASGIStaticFilesApplication(application)
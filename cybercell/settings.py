@@ -6,6 +6,11 @@ from pathlib import Path
 import os
 from django.core.exceptions import ImproperlyConfigured
 
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,10 +38,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'crime_report',
 ]
 
 MIDDLEWARE = [
+    # First, so its wall time covers the rest of the stack; a no-op unless PROFILING_ENABLED
+    'crime_report.middleware.ProfilingMiddleware',
+    'crime_report.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +70,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'crime_report.context_processors.fragment_cache',
+                'crime_report.context_processors.inbox_unread',
             ],
         },
     },
@@ -76,6 +87,31 @@ DATABASES = {
     }
 }
 
+# Password hashing (crime_report.hashers). New and changed passwords use the
+# profile's hasher; hashes from the others still verify and are upgraded at the
+# owner's next login. Argon2 needs argon2-cffi and falls back to scrypt without it.
+PASSWORD_HASHER_PROFILE = os.environ.get('CYBERCELL_PASSWORD_HASHER', 'argon2')  # argon2, scrypt or pbkdf2
+# About 30-45 ms per hash on one core; `manage.py benchmark_auth` times them
+PASSWORD_ARGON2_PARAMS = {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1}  # memory in KiB
+PASSWORD_SCRYPT_PARAMS = {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1}
+
+PASSWORD_HASHER_PROFILES = {
+    'argon2': 'crime_report.hashers.Argon2PasswordHasher',
+    'scrypt': 'crime_report.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+if PASSWORD_HASHER_PROFILE not in PASSWORD_HASHER_PROFILES:
+    raise ImproperlyConfigured(
+        f"CYBERCELL_PASSWORD_HASHER must be one of {', '.join(PASSWORD_HASHER_PROFILES)}"
+    )
+if PASSWORD_HASHER_PROFILE == 'argon2' and argon2 is None:
+    PASSWORD_HASHER_PROFILE = 'scrypt'
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(path for name, path in PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER_PROFILE),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,6 +143,73 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Evidence of archived cases (crime_report.archive); not served under MEDIA_URL
+    'archive': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'archive_media'},
+    },
+    # Hashed names, STATIC_BUNDLES and precompressed .gz/.br variants on collectstatic
+    'staticfiles': {
+        'BACKEND': 'crime_report.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+STATIC_COMPRESS_MIN_SIZE = 1024  # bytes; smaller files are not worth precompressing
+STATIC_MAX_AGE = 31536000  # 1 year, for content-hashed files
+# Serve STATIC_ROOT from cybercell.wsgi (crime_report.static_handler) instead of a separate server
+SERVE_STATIC_FILES = os.environ.get('CYBERCELL_SERVE_STATIC', '1') == '1'
+
+# Third-party browser libraries, vendored under static/vendor/ by
+# "python manage.py vendor_static" (the deployment has no internet access)
+STATIC_VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome/css/all.min.css':
+        'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+    'vendor/chartjs/chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js',
+    'vendor/flatpickr/flatpickr.min.js': 'https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/flatpickr.min.js',
+    'vendor/flatpickr/flatpickr.min.css': 'https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/flatpickr.min.css',
+    'vendor/leaflet/leaflet.js': 'https://cdn.jsdelivr.net/npm/leaflet@1.9.4/dist/leaflet.js',
+    'vendor/leaflet/leaflet.css': 'https://cdn.jsdelivr.net/npm/leaflet@1.9.4/dist/leaflet.css',
+}
+# Referenced from the Font Awesome stylesheet; downloaded but never linked directly
+STATIC_VENDOR_ASSETS.update({
+    f'vendor/fontawesome/webfonts/{font}.{ext}':
+        f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/{font}.{ext}'
+    for font in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+    for ext in ('woff2', 'ttf')
+})
+# Referenced from the Leaflet stylesheet
+STATIC_VENDOR_ASSETS.update({
+    f'vendor/leaflet/images/{image}': f'https://cdn.jsdelivr.net/npm/leaflet@1.9.4/dist/images/{image}'
+    for image in ('layers.png', 'layers-2x.png', 'marker-icon.png', 'marker-icon-2x.png', 'marker-shadow.png')
+})
+
+# Concatenated by collectstatic into one hashed file each; see {% asset_bundle %}
+STATIC_BUNDLES = {
+    'css/core.bundle.css': [
+        'vendor/bootstrap/bootstrap.min.css',
+        'vendor/flatpickr/flatpickr.min.css',
+        'css/style.css',
+    ],
+    'js/core.bundle.js': [
+        'vendor/bootstrap/bootstrap.bundle.min.js',
+        'vendor/flatpickr/flatpickr.min.js',
+        'js/main.js',
+    ],
+    'js/charts.bundle.js': [
+        'vendor/chartjs/chart.umd.js',
+    ],
+    'js/maps.bundle.js': [
+        'vendor/leaflet/leaflet.js',
+        'js/hotspots.js',
+    ],
+}
 
 # Media files
 MEDIA_URL = '/media/'
@@ -153,6 +256,32 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@cybercell.com')
 
+# Case update emails to reporters, sent by `manage.py run_worker` (crime_report.notifications)
+NOTIFICATIONS_ENABLED = True
+NOTIFICATION_SITE_URL = os.environ.get('CYBERCELL_SITE_URL', 'http://localhost:8000')  # for links in emails
+NOTIFICATION_COALESCE_WINDOW = 300  # seconds updates to one report are collected into one email
+NOTIFICATION_BATCH_SIZE = 100  # emails sent per mail server connection
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BACKOFF = 60  # seconds before the first retry, doubled for each one after
+NOTIFICATION_LEASE = 600  # seconds before a crashed worker's batch is picked up again
+NOTIFICATION_POLL_INTERVAL = 10  # seconds between checks of an empty queue
+
+# Create logs directory if it doesn't exist
+LOGS_DIR = BASE_DIR / 'logs'
+LOGS_DIR.mkdir(exist_ok=True)
+
+# Logging pipeline (crime_report.log): loggers only enqueue records, a background
+# listener writes them to the console and to a rotating, gzipped JSON-lines file
+LOG_FILE = LOGS_DIR / 'cybercell.log'
+LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate at 10MB...
+LOG_ROTATION_INTERVAL = 24 * 3600  # ...or daily, whichever comes first
+LOG_BACKUP_COUNT = 14  # rotated .gz files kept
+LOG_QUEUE_SIZE = 10000  # records buffered before new ones are dropped
+# Fraction of below-WARNING records kept per logger (longest prefix wins)
+LOG_SAMPLE_RATES = {
+    'django.server': 0.1,
+}
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -166,44 +295,199 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'crime_report.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'request_id': {
+            '()': 'crime_report.log.RequestIdFilter',
+        },
+        'sampling': {
+            '()': 'crime_report.log.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
     },
+    # dictConfig sets up handlers in name order: 'console' and 'file' must
+    # sort before 'queue', which hands records to them
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'cybercell.log',
-            'formatter': 'verbose',
+            'class': 'crime_report.log.CompressedRotatingFileHandler',
+            'filename': LOG_FILE,
+            'max_bytes': LOG_MAX_BYTES,
+            'interval': LOG_ROTATION_INTERVAL,
+            'backup_count': LOG_BACKUP_COUNT,
+            'formatter': 'json',
+            'delay': True,
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'queue': {
+            'class': 'crime_report.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['request_id', 'sampling'],
+        },
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': True,
         },
+        # Replaces Django's default handler for the runserver access log
+        'django.server': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'crime_report': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': True,
         },
     },
 }
 
-# Create logs directory if it doesn't exist
-LOGS_DIR = BASE_DIR / 'logs'
-LOGS_DIR.mkdir(exist_ok=True)
-
 # Cache settings
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Used by {% cache %}; fragments are keyed on data versions, so writes never
+    # need to delete anything and superseded entries just age out
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+FRAGMENT_CACHE_TIMEOUT = 3600  # seconds
+
+# Token-bucket rate limits (crime_report.ratelimit): per scope, the methods that
+# count and a (requests, seconds) budget per client IP, signed-in user and/or
+# account named in the form. Buckets are rows of the database (RateLimitBucket),
+# so every worker on every host shares them
+RATELIMIT_ENABLED = os.environ.get('CYBERCELL_RATELIMIT', '1') == '1'
+RATELIMIT_IP_META = 'REMOTE_ADDR'  # e.g. 'HTTP_X_REAL_IP' behind a reverse proxy that sets it
+RATELIMIT_ACCOUNT_FIELD = 'username'  # the form field naming the account, for 'account' budgets
+RATELIMITS = {
+    'login': {'methods': ('POST',), 'ip': (10, 60), 'account': (10, 900)},
+    'register': {'methods': ('POST',), 'ip': (5, 3600)},
+    'report_crime': {'methods': ('POST',), 'user': (10, 3600), 'ip': (30, 3600)},
+    'crime_stats_api': {'methods': ('GET',), 'user': (60, 60)},
+}
+
+# Pincode -> areas lookup table (crime_report.geo.pincode_index), rebuilt after
+# the TTL; preload it when the WSGI/ASGI application starts instead of on first use
+PINCODE_INDEX_TTL = 600  # seconds
+PINCODE_INDEX_PRELOAD = os.environ.get('CYBERCELL_PRELOAD_PINCODES', '') == '1'
+
+# Pincode centroids used to place locations on the hotspot map; entries are
+# 6-digit pincodes or 3-digit sorting districts (the fallback). The bundled file
+# is a small sample (major cities only): point this at a complete dataset
+PINCODE_CENTROIDS_FILE = BASE_DIR / 'crime_report' / 'data' / 'pincode_centroids.csv'
+
+# Hotspot map (crime_report.hotspots)
+HOTSPOT_WINDOWS = [7, 30, 90, 365]  # days selectable on the dashboard
+HOTSPOT_DEFAULT_WINDOW = 30
+HOTSPOT_GRID_SIZE = 16  # cells per tile side
+HOTSPOT_MAX_ZOOM = 14
+HOTSPOT_CACHE_TIMEOUT = 3600  # seconds; entries are keyed on the data version
+HOTSPOT_BASE_TILES = 'https://tile.openstreetmap.org/{z}/{x}/{y}.png'
+
+# Duplicate and campaign detection (crime_report.detection). Changing the
+# permutations or bands needs `manage.py index_reports` to rebuild the index.
+DETECTION_MINHASH_PERMUTATIONS = 128
+DETECTION_LSH_BANDS = 32  # 4 rows each: reports over ~45% alike almost always share a bucket
+DETECTION_DUPLICATE_THRESHOLD = 0.5  # estimated Jaccard similarity shown as a possible duplicate
+DETECTION_MAX_CANDIDATES = 200  # bucket matches scored per lookup
+IOC_LOOKUP_MAX_CASES = 500  # cases returned by /api/iocs/ for one query
+
+# Archival of old closed cases by `manage.py archive_reports` (crime_report.archive)
+ARCHIVE_STATUSES = ('closed', 'resolved')
+ARCHIVE_AFTER_DAYS = 365  # days without a new update before a case is archived
+ARCHIVE_BATCH_SIZE = 200  # cases moved per transaction
+CASE_SEARCH_PAGE_SIZE = 50  # results per page of /api/cases/
+
+# Case priority (crime_report.priority): points per factor, summed into
+# CrimeReport.priority. `manage.py score_reports` refreshes the time-based ones.
+PRIORITY_SEVERITY_POINTS = 100  # per level of the category's severity (1-5)
+PRIORITY_AGE_POINTS = 5  # per day since the report was filed...
+PRIORITY_AGE_MAX_DAYS = 30  # ...up to this many days
+PRIORITY_STALE_POINTS = 10  # per day since the last case update...
+PRIORITY_STALE_MAX_DAYS = 14  # ...up to this many days
+PRIORITY_AMOUNT_POINTS = 60  # per power of ten of the largest amount (INR) in the description
+PRIORITY_LINKED_POINTS = 50  # per doubling of the other reports sharing an indicator...
+PRIORITY_LINKED_MAX = 63  # ...counting at most this many
+PRIORITY_LINKED_RESCORE_LIMIT = 200  # linked open cases rescored at once when a report's text changes
+PRIORITY_RESCORE_BATCH_SIZE = 50  # queued reports whose linked cases run_worker rescores per batch
+PRIORITY_BATCH_SIZE = 1000  # reports scored per query batch
+PRIORITY_QUEUE_SIZE = 10  # cases returned by the work queue by default
+
+# Officers' inboxes (crime_report.inbox)
+INBOX_PAGE_SIZE = 20  # cases per page of the inbox view
+INBOX_PREVIEW_SIZE = 5  # latest cases shown on the dashboard
+INBOX_BATCH_SIZE = 500  # cases per query when a bulk update changes inboxes
+
+# Admin performance mode for the report and update changelists (crime_report.changelist):
+# estimated counts, cached filter choices, full-text search (crime_report.search) and no
+# date drill-down. Turning it off restores the stock changelists (the drill-down after a restart).
+ADMIN_PERFORMANCE_MODE = True
+ADMIN_EXACT_COUNT_LIMIT = 10000  # rows a changelist counts before showing an estimate
+ADMIN_FILTER_CACHE_TIMEOUT = 600  # seconds sidebar filter choices are cached
+
+# JSON API under /api/v1/ (crime_report.api)
+REST_FRAMEWORK = {
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'EXCEPTION_HANDLER': 'crime_report.api.api_exception_handler',
+}
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500  # largest ?page_size=
+API_BATCH_MAX_ITEMS = 100  # items per batch request
+STREAM_BATCH_SIZE = 1000  # rows fetched and encoded per chunk of NDJSON/MessagePack responses
+
+# Serve the async variants of the read-heavy views (enable under ASGI)
+USE_ASYNC_VIEWS = os.environ.get('CYBERCELL_ASYNC_VIEWS', '') == '1'
+
+# Live event feed (Server-Sent Events, served through cybercell.asgi)
+LIVE_EVENTS_ENABLED = True
+LIVE_EVENTS_DB = BASE_DIR / 'live_events.sqlite3'
+LIVE_EVENTS_POLL_INTERVAL = 0.5  # seconds between fan-out polls per worker
+LIVE_EVENTS_KEEPALIVE = 15  # seconds between keepalive comments
+LIVE_EVENTS_RETENTION = 3600  # seconds events are kept for Last-Event-ID replay
+LIVE_EVENTS_MAX_DURATION = 300  # seconds before a stream is ended; the client reconnects
+
+# Request profiling (crime_report.middleware.ProfilingMiddleware)
+PROFILING_ENABLED = os.environ.get('CYBERCELL_PROFILING', '') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('CYBERCELL_PROFILING_SAMPLE_RATE', 1.0))
+PROFILING_WINDOW = 1000  # most recent requests kept per URL name
+PROFILING_LOG_INTERVAL = 300  # seconds between summaries in the log; 0 disables
+
+# Cache-Control for pages and APIs served with data-version ETags, by user role.
+# "no-cache" lets browsers keep a copy but revalidate it (a cheap 304) on every use.
+HTTP_CACHE_POLICIES = {
+    'anonymous': 'public, max-age=60',
+    'citizen': 'private, no-cache',
+    'police': 'private, no-cache',
+    'admin': 'private, no-cache',
 }
 
 # Messages settings
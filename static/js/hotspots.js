@@ -0,0 +1,91 @@
+// CyberCell - Crime hotspot map on the admin dashboard
+// Draws the GeoJSON grid tiles from the hotspot API over a Leaflet map, loading
+// only the tiles in view and dropping them again once they scroll out.
+
+document.addEventListener('DOMContentLoaded', function() {
+    var element = document.getElementById('locationMap');
+    if (!element || typeof L === 'undefined') {
+        return;
+    }
+
+    var windowSelect = document.getElementById('hotspotWindow');
+    var days = windowSelect ? windowSelect.value : '';
+    var maxZoom = parseInt(element.dataset.maxZoom, 10);
+    // The URL is rendered for tile 0/0/0; swap in the real coordinates
+    var tileUrl = element.dataset.tileUrl.replace(/0\/0\/0\.geojson$/, '');
+
+    var map = L.map(element, {maxZoom: maxZoom}).setView([22.5, 79], 4);
+    if (element.dataset.baseTiles) {
+        L.tileLayer(element.dataset.baseTiles, {
+            maxZoom: maxZoom,
+            attribution: '&copy; OpenStreetMap contributors'
+        }).addTo(map);
+    }
+    var hotspots = L.layerGroup().addTo(map);
+    var loaded = new Map();  // "days/z/x/y" -> layer (null while loading)
+
+    function style(feature) {
+        return {
+            stroke: false,
+            fillColor: '#dc3545',
+            fillOpacity: 0.15 + 0.6 * feature.properties.intensity
+        };
+    }
+
+    function loadTile(key, zoom, x, y) {
+        loaded.set(key, null);
+        fetch(tileUrl + zoom + '/' + x + '/' + y + '.geojson?days=' + days)
+            .then(function(response) { return response.ok ? response.json() : null; })
+            .then(function(data) {
+                // Skip tiles that scrolled out or belong to another period by now
+                if (!data || !loaded.has(key)) {
+                    return;
+                }
+                var layer = L.geoJSON(data, {
+                    style: style,
+                    onEachFeature: function(feature, cell) {
+                        cell.bindTooltip(feature.properties.count + ' report(s)');
+                    }
+                });
+                loaded.set(key, layer);
+                hotspots.addLayer(layer);
+            })
+            .catch(function(error) {
+                loaded.delete(key);
+                console.error('Error loading hotspots:', error);
+            });
+    }
+
+    function refresh() {
+        var zoom = map.getZoom();
+        var bounds = map.getPixelBounds();
+        var last = Math.pow(2, zoom) - 1;
+        var wanted = new Set();
+        for (var x = Math.max(Math.floor(bounds.min.x / 256), 0); x <= Math.min(Math.floor(bounds.max.x / 256), last); x++) {
+            for (var y = Math.max(Math.floor(bounds.min.y / 256), 0); y <= Math.min(Math.floor(bounds.max.y / 256), last); y++) {
+                var key = days + '/' + zoom + '/' + x + '/' + y;
+                wanted.add(key);
+                if (!loaded.has(key)) {
+                    loadTile(key, zoom, x, y);
+                }
+            }
+        }
+        loaded.forEach(function(layer, key) {
+            if (!wanted.has(key)) {
+                if (layer) {
+                    hotspots.removeLayer(layer);
+                }
+                loaded.delete(key);
+            }
+        });
+    }
+
+    map.on('moveend', refresh);
+    if (windowSelect) {
+        windowSelect.addEventListener('change', function() {
+            days = windowSelect.value;
+            refresh();
+        });
+    }
+    refresh();
+});
@@ -464,6 +464,37 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize dashboard charts if they exist on the page
     initDashboardCharts();
 
+    // Live feed of new reports and case updates (Server-Sent Events)
+    const liveFeed = document.getElementById('liveFeed');
+    if (liveFeed && typeof EventSource !== 'undefined') {
+        const liveFeedCount = liveFeed.querySelector('.live-feed-count');
+        const liveFeedLatest = liveFeed.querySelector('.live-feed-latest');
+        const eventLabels = {
+            report_created: 'New report',
+            report_updated: 'Report updated',
+            update_created: 'Case update'
+        };
+        let newEvents = 0;
+        const source = new EventSource(liveFeed.getAttribute('data-url'));
+
+        Object.keys(eventLabels).forEach(function(eventType) {
+            source.addEventListener(eventType, function(e) {
+                const data = JSON.parse(e.data);
+                newEvents += 1;
+                liveFeedCount.textContent = newEvents;
+                liveFeedLatest.textContent = eventLabels[eventType] + ': #' + data.report_id + ' ' + data.title;
+                liveFeed.classList.remove('d-none');
+            });
+        });
+
+        source.onerror = function() {
+            // The feed is only served under ASGI; stop retrying if it is unavailable
+            if (source.readyState === EventSource.CLOSED) {
+                source.close();
+            }
+        };
+    }
+
     // Print functionality
     const printButtons = document.querySelectorAll('.btn-print');
     printButtons.forEach(button => {